@@ -1,5 +1,14 @@
 PRAGMA foreign_keys = ON;
 
+-- BUILD INFO
+-- One row, written by csv_to_sql.py at the end of each build; the frontend
+-- keys its result cache on build_id.
+DROP TABLE IF EXISTS BuildInfo;
+CREATE TABLE BuildInfo (
+    build_id  TEXT NOT NULL,
+    built_at  TEXT NOT NULL
+);
+
 -- CONFERENCE TABLE
 DROP TABLE IF EXISTS Conference;
 CREATE TABLE Conference (
@@ -20,40 +29,28 @@ CREATE TABLE University (
 );
 
 -- RANKINGS TABLE
+-- One row per poll entry. university_id is resolved from the poll's school
+-- name by rankings.py and is NULL when no University matched.
 DROP TABLE IF EXISTS Rankings;
 CREATE TABLE Rankings (
-    rank_week  INTEGER PRIMARY KEY,
-    rank_1     VARCHAR(100),
-    rank_2     VARCHAR(100),
-    rank_3     VARCHAR(100),
-    rank_4     VARCHAR(100),
-    rank_5     VARCHAR(100),
-    rank_6     VARCHAR(100),
-    rank_7     VARCHAR(100),
-    rank_8     VARCHAR(100),
-    rank_9     VARCHAR(100),
-    rank_10    VARCHAR(100),
-    rank_11    VARCHAR(100),
-    rank_12    VARCHAR(100),
-    rank_13    VARCHAR(100),
-    rank_14    VARCHAR(100),
-    rank_15    VARCHAR(100),
-    rank_16    VARCHAR(100),
-    rank_17    VARCHAR(100),
-    rank_18    VARCHAR(100),
-    rank_19    VARCHAR(100),
-    rank_20    VARCHAR(100),
-    rank_21    VARCHAR(100),
-    rank_22    VARCHAR(100),
-    rank_23    VARCHAR(100),
-    rank_24    VARCHAR(100),
-    rank_25    VARCHAR(100)
+    season        INTEGER NOT NULL,
+    rank_week     INTEGER NOT NULL,
+    rank          INTEGER NOT NULL,
+    university_id INTEGER,
+    team_name     VARCHAR(100) NOT NULL,
+
+    PRIMARY KEY (season, rank_week, rank),
+
+    FOREIGN KEY (university_id)
+        REFERENCES University(university_id)
+        ON DELETE SET NULL
 );
 
 -- GAME TABLE
 DROP TABLE IF EXISTS Game;
 CREATE TABLE Game (
     game_id       INTEGER PRIMARY KEY,
+    season        INTEGER NOT NULL,
     home_team_id  INTEGER,
     away_team_id  INTEGER,
     home_score    INTEGER,
@@ -69,6 +66,276 @@ CREATE TABLE Game (
         ON DELETE CASCADE
 );
 
+-- TEAMGAME TABLE
+-- One row per team per game (home and away side of every Game row), with
+-- the result from that team's point of view. Filled by the Game triggers
+-- below as games load.
+DROP TABLE IF EXISTS TeamGame;
+CREATE TABLE TeamGame (
+    game_id                 INTEGER NOT NULL,
+    university_id           INTEGER NOT NULL,
+    season                  INTEGER NOT NULL,
+    game_date               DATE,
+    is_home                 BOOLEAN NOT NULL,
+    opponent_id             INTEGER NOT NULL,
+    conference_id           INTEGER,
+    opponent_conference_id  INTEGER,
+    goals_for               INTEGER,
+    goals_against           INTEGER,
+    result                  CHAR(1),    -- 'W', 'L' or 'T'
+    shutout                 BOOLEAN,    -- goals_against = 0
+
+    PRIMARY KEY (game_id, university_id),
+
+    FOREIGN KEY (game_id)
+        REFERENCES Game(game_id)
+        ON DELETE CASCADE
+);
+
+-- TEAM ROLLUP TABLE
+-- Per-team totals from TeamGame by season and week (week = 0 is the whole
+-- season), split into in-conference and non-conference games. Rebuilt by
+-- csv_to_sql.refresh_rollups after each load.
+DROP TABLE IF EXISTS TeamRollup;
+CREATE TABLE TeamRollup (
+    season                INTEGER NOT NULL,
+    week                  INTEGER NOT NULL,
+    university_id         INTEGER NOT NULL,
+
+    -- all games
+    games                 INTEGER NOT NULL DEFAULT 0,
+    wins                  INTEGER NOT NULL DEFAULT 0,
+    losses                INTEGER NOT NULL DEFAULT 0,
+    ties                  INTEGER NOT NULL DEFAULT 0,
+    goals_for             INTEGER NOT NULL DEFAULT 0,
+    goals_against         INTEGER NOT NULL DEFAULT 0,
+    shutouts              INTEGER NOT NULL DEFAULT 0,
+
+    -- in-conference games
+    conf_games            INTEGER NOT NULL DEFAULT 0,
+    conf_wins             INTEGER NOT NULL DEFAULT 0,
+    conf_losses           INTEGER NOT NULL DEFAULT 0,
+    conf_ties             INTEGER NOT NULL DEFAULT 0,
+    conf_goals_for        INTEGER NOT NULL DEFAULT 0,
+    conf_goals_against    INTEGER NOT NULL DEFAULT 0,
+    conf_shutouts         INTEGER NOT NULL DEFAULT 0,
+
+    -- non-conference games
+    nonconf_games         INTEGER NOT NULL DEFAULT 0,
+    nonconf_wins          INTEGER NOT NULL DEFAULT 0,
+    nonconf_losses        INTEGER NOT NULL DEFAULT 0,
+    nonconf_ties          INTEGER NOT NULL DEFAULT 0,
+    nonconf_goals_for     INTEGER NOT NULL DEFAULT 0,
+    nonconf_goals_against INTEGER NOT NULL DEFAULT 0,
+    nonconf_shutouts      INTEGER NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (season, week, university_id)
+);
+
+-- CONFERENCE ROLLUP TABLE
+-- Same totals summed over a conference's teams (an in-conference game
+-- counts once for each team).
+DROP TABLE IF EXISTS ConferenceRollup;
+CREATE TABLE ConferenceRollup (
+    season                INTEGER NOT NULL,
+    week                  INTEGER NOT NULL,
+    conference_id         INTEGER NOT NULL,
+
+    -- all games
+    games                 INTEGER NOT NULL DEFAULT 0,
+    wins                  INTEGER NOT NULL DEFAULT 0,
+    losses                INTEGER NOT NULL DEFAULT 0,
+    ties                  INTEGER NOT NULL DEFAULT 0,
+    goals_for             INTEGER NOT NULL DEFAULT 0,
+    goals_against         INTEGER NOT NULL DEFAULT 0,
+    shutouts              INTEGER NOT NULL DEFAULT 0,
+
+    -- in-conference games
+    conf_games            INTEGER NOT NULL DEFAULT 0,
+    conf_wins             INTEGER NOT NULL DEFAULT 0,
+    conf_losses           INTEGER NOT NULL DEFAULT 0,
+    conf_ties             INTEGER NOT NULL DEFAULT 0,
+    conf_goals_for        INTEGER NOT NULL DEFAULT 0,
+    conf_goals_against    INTEGER NOT NULL DEFAULT 0,
+    conf_shutouts         INTEGER NOT NULL DEFAULT 0,
+
+    -- non-conference games
+    nonconf_games         INTEGER NOT NULL DEFAULT 0,
+    nonconf_wins          INTEGER NOT NULL DEFAULT 0,
+    nonconf_losses        INTEGER NOT NULL DEFAULT 0,
+    nonconf_ties          INTEGER NOT NULL DEFAULT 0,
+    nonconf_goals_for     INTEGER NOT NULL DEFAULT 0,
+    nonconf_goals_against INTEGER NOT NULL DEFAULT 0,
+    nonconf_shutouts      INTEGER NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (season, week, conference_id)
+);
+
+-- TEAMRATING TABLE
+-- Elo and least-squares goal-margin ratings after each week (same week
+-- numbering as TeamRollup), computed by ratings.py when csv_to_sql.py loads.
+DROP TABLE IF EXISTS TeamRating;
+CREATE TABLE TeamRating (
+    season         INTEGER NOT NULL,
+    week           INTEGER NOT NULL,
+    university_id  INTEGER NOT NULL,
+    games          INTEGER NOT NULL,
+    elo            REAL NOT NULL,
+    margin_rating  REAL NOT NULL,
+
+    PRIMARY KEY (season, week, university_id),
+    FOREIGN KEY (university_id)
+        REFERENCES University(university_id)
+        ON DELETE CASCADE
+);
+
+-- Win percentage, opponents' (OWP) and opponents' opponents' (OOWP) win
+-- percentage, strength of schedule and RPI after each week (same week
+-- numbering as TeamRollup), computed by rpi.py when csv_to_sql.py loads.
+-- owp/oowp/sos/rpi are NULL until a team's opponents have other results.
+DROP TABLE IF EXISTS TeamRPI;
+CREATE TABLE TeamRPI (
+    season         INTEGER NOT NULL,
+    week           INTEGER NOT NULL,
+    university_id  INTEGER NOT NULL,
+    games          INTEGER NOT NULL,
+    wins           INTEGER NOT NULL,
+    losses         INTEGER NOT NULL,
+    ties           INTEGER NOT NULL,
+    wp             REAL NOT NULL,
+    owp            REAL,
+    oowp           REAL,
+    sos            REAL,
+    rpi            REAL,
+    rpi_rank       INTEGER,
+
+    PRIMARY KEY (season, week, university_id),
+    FOREIGN KEY (university_id)
+        REFERENCES University(university_id)
+        ON DELETE CASCADE
+);
+
+-- PLAYER / TEAM FORM TABLES
+-- One row per player (team) per game with the game's stats, season-to-date
+-- running sums and rolling windows: the last 5 games (_last_games) and the
+-- last 30 days (_last_days), up to and including the game. Maintained by
+-- form.py: csv_to_sql.py rebuilds them, refresh_form(conn, game_ids) continues
+-- the stored running sums from the earliest new game on.
+DROP TABLE IF EXISTS PlayerForm;
+CREATE TABLE PlayerForm (
+    player_id                   INTEGER NOT NULL,
+    season                      INTEGER NOT NULL,
+    game_id                     INTEGER NOT NULL,
+    game_date                   DATE NOT NULL,
+    game_number                 INTEGER NOT NULL,   -- 1 = first game of the season
+    latest                      BOOLEAN NOT NULL,   -- most recent game of the season
+
+    games                       INTEGER NOT NULL,
+    games_season                INTEGER NOT NULL,
+    games_last_games            INTEGER NOT NULL,
+    games_last_days             INTEGER NOT NULL,
+
+    minutes                     INTEGER NOT NULL,
+    minutes_season              INTEGER NOT NULL,
+    minutes_last_games          INTEGER NOT NULL,
+    minutes_last_days           INTEGER NOT NULL,
+
+    goals                       INTEGER NOT NULL,
+    goals_season                INTEGER NOT NULL,
+    goals_last_games            INTEGER NOT NULL,
+    goals_last_days             INTEGER NOT NULL,
+
+    assists                     INTEGER NOT NULL,
+    assists_season              INTEGER NOT NULL,
+    assists_last_games          INTEGER NOT NULL,
+    assists_last_days           INTEGER NOT NULL,
+
+    shots                       INTEGER NOT NULL,
+    shots_season                INTEGER NOT NULL,
+    shots_last_games            INTEGER NOT NULL,
+    shots_last_days             INTEGER NOT NULL,
+
+    shots_on_target             INTEGER NOT NULL,
+    shots_on_target_season      INTEGER NOT NULL,
+    shots_on_target_last_games  INTEGER NOT NULL,
+    shots_on_target_last_days   INTEGER NOT NULL,
+
+    PRIMARY KEY (player_id, game_id),
+    FOREIGN KEY (game_id)
+        REFERENCES Game(game_id)
+        ON DELETE CASCADE
+);
+
+DROP TABLE IF EXISTS TeamForm;
+CREATE TABLE TeamForm (
+    university_id             INTEGER NOT NULL,
+    season                    INTEGER NOT NULL,
+    game_id                   INTEGER NOT NULL,
+    game_date                 DATE NOT NULL,
+    game_number               INTEGER NOT NULL,   -- 1 = first game of the season
+    latest                    BOOLEAN NOT NULL,   -- most recent game of the season
+
+    games                     INTEGER NOT NULL,
+    games_season              INTEGER NOT NULL,
+    games_last_games          INTEGER NOT NULL,
+    games_last_days           INTEGER NOT NULL,
+
+    goals_for                 INTEGER NOT NULL,
+    goals_for_season          INTEGER NOT NULL,
+    goals_for_last_games      INTEGER NOT NULL,
+    goals_for_last_days       INTEGER NOT NULL,
+
+    goals_against             INTEGER NOT NULL,
+    goals_against_season      INTEGER NOT NULL,
+    goals_against_last_games  INTEGER NOT NULL,
+    goals_against_last_days   INTEGER NOT NULL,
+
+    points                    INTEGER NOT NULL,
+    points_season             INTEGER NOT NULL,
+    points_last_games         INTEGER NOT NULL,
+    points_last_days          INTEGER NOT NULL,
+
+    PRIMARY KEY (university_id, game_id),
+    FOREIGN KEY (game_id)
+        REFERENCES Game(game_id)
+        ON DELETE CASCADE
+);
+
+-- SIMULATION TABLES
+-- Monte Carlo odds for conference standings and conference tournaments,
+-- written by simulate.py (run separately after a build; empty until then).
+-- SimRankOdds holds each team's finishing-place distribution, nonzero only.
+DROP TABLE IF EXISTS SimTeamOdds;
+CREATE TABLE SimTeamOdds (
+    season           INTEGER NOT NULL,
+    university_id    INTEGER NOT NULL,
+    conference_id    INTEGER NOT NULL,
+    as_of            DATE,              -- NULL = every scored game counted
+    runs             INTEGER NOT NULL,
+    expected_points  REAL NOT NULL,     -- conference points, 3/1/0
+    expected_rank    REAL NOT NULL,
+    p_first          REAL NOT NULL,
+    p_tournament     REAL NOT NULL,
+    p_champion       REAL NOT NULL,
+
+    PRIMARY KEY (season, university_id),
+    FOREIGN KEY (university_id)
+        REFERENCES University(university_id)
+        ON DELETE CASCADE
+);
+
+DROP TABLE IF EXISTS SimRankOdds;
+CREATE TABLE SimRankOdds (
+    season         INTEGER NOT NULL,
+    university_id  INTEGER NOT NULL,
+    rank           INTEGER NOT NULL,
+    probability    REAL NOT NULL,
+
+    PRIMARY KEY (season, university_id, rank),
+    FOREIGN KEY (university_id)
+        REFERENCES University(university_id)
+        ON DELETE CASCADE
+);
 
 -- PLAYER TABLE
 DROP TABLE IF EXISTS Player;
@@ -89,6 +356,7 @@ DROP TABLE IF EXISTS GameStats;
 CREATE TABLE GameStats (
     game_id         INTEGER NOT NULL,
     player_id       INTEGER NOT NULL,
+    season          INTEGER NOT NULL,
 
     played          BOOLEAN,
     started         BOOLEAN,
@@ -124,45 +392,45 @@ SELECT
     CASE WHEN shots_on_target > 0 THEN goals * 1.0 / shots_on_target END AS sog_pct
 FROM GameStats gs;
 
--- VIEW FOR PLAYER SEASON STATS, from GameStats
+-- PLAYER SEASON STATS TABLE
+-- Materialized per-season totals from GameStats, kept current by the
+-- GameStats triggers below; join Player for names/team.
 DROP VIEW IF EXISTS PlayerSeasonStats;
-CREATE VIEW PlayerSeasonStats AS
-SELECT
-    gs.player_id,
-    gs.first_name,
-    gs.last_name,
-    gs.position,
-    gs.university_id,
-
-    COUNT(DISTINCT gs.game_id)            AS games_played,
-    SUM(gs.started)                       AS games_started,
-    SUM(gs.minutes)                       AS total_minutes,
-
-    SUM(gs.goals)                         AS total_goals,
-    SUM(gs.assists)                       AS total_assists,
-    SUM(gs.goals * 2 + gs.assists)        AS total_points,
-
-    SUM(gs.shots)                         AS total_shots,
-    SUM(gs.shots_on_target)               AS total_sog,
-
-    CASE
-        WHEN SUM(gs.shots) > 0
-        THEN 1.0 * SUM(gs.shots_on_target) / SUM(gs.shots)
-    END                                   AS season_shot_pct,
-
-    CASE
-        WHEN SUM(gs.shots_on_target) > 0
-        THEN 1.0 * SUM(gs.goals) / SUM(gs.shots_on_target)
-    END                                   AS season_sog_pct
-
-FROM GameStats gs
-GROUP BY gs.player_id;
+DROP TABLE IF EXISTS PlayerSeasonStats;
+CREATE TABLE PlayerSeasonStats (
+    season          INTEGER NOT NULL,
+    player_id       INTEGER NOT NULL,
+
+    games_played    INTEGER NOT NULL DEFAULT 0,
+    games_started   INTEGER NOT NULL DEFAULT 0,
+    total_minutes   INTEGER NOT NULL DEFAULT 0,
+
+    total_goals     INTEGER NOT NULL DEFAULT 0,
+    total_assists   INTEGER NOT NULL DEFAULT 0,
+    total_points    INTEGER NOT NULL DEFAULT 0,
+
+    total_shots     INTEGER NOT NULL DEFAULT 0,
+    total_sog       INTEGER NOT NULL DEFAULT 0,
+
+    season_shot_pct REAL GENERATED ALWAYS AS (
+        CASE WHEN total_shots > 0 THEN 1.0 * total_sog / total_shots END
+    ) VIRTUAL,
+    season_sog_pct  REAL GENERATED ALWAYS AS (
+        CASE WHEN total_sog > 0 THEN 1.0 * total_goals / total_sog END
+    ) VIRTUAL,
+    goals_per_minute REAL GENERATED ALWAYS AS (
+        CASE WHEN total_minutes > 0 THEN 1.0 * total_goals / total_minutes END
+    ) VIRTUAL,
+
+    PRIMARY KEY (season, player_id)
+);
 
 -- PLAY TABLE
 DROP TABLE IF EXISTS Play;
 CREATE TABLE Play (
     play_id      INTEGER PRIMARY KEY AUTOINCREMENT,
     game_id      INTEGER NOT NULL,
+    season       INTEGER NOT NULL,
     player_id    INTEGER NULL,
     event_type VARCHAR(30),
     time_of_play TIME NULL,
@@ -177,4 +445,282 @@ CREATE TABLE Play (
         ON DELETE SET NULL
 );
 
+-- Plays in clock order per game with possession/sequence ids, the previous
+-- play and the gap to it; rebuilt by sequences.py when csv_to_sql.py loads.
+DROP TABLE IF EXISTS PlaySequence;
+CREATE TABLE PlaySequence (
+    game_id          INTEGER NOT NULL,
+    seq              INTEGER NOT NULL,
+    play_id          INTEGER NOT NULL UNIQUE,
+    season           INTEGER NOT NULL,
+    event_type       VARCHAR(30),
+    elapsed_seconds  INTEGER,
+    team_id          INTEGER,
+    possession_id    INTEGER NOT NULL,
+    sequence_id      INTEGER NOT NULL,
+    prev_event_type  VARCHAR(30),
+    gap_seconds      INTEGER,
+
+    PRIMARY KEY (game_id, seq),
+    FOREIGN KEY (play_id)
+        REFERENCES Play(play_id)
+        ON DELETE CASCADE
+);
+
+-- PLAY SEARCH
+-- FTS5 index over Play.description (external content: the text lives only
+-- in Play, keyed by play_id). Kept in sync by the trg_play_*_search triggers.
+DROP TABLE IF EXISTS PlaySearch;
+CREATE VIRTUAL TABLE PlaySearch USING fts5(
+    description,
+    content = 'Play',
+    content_rowid = 'play_id',
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+
+-- WORKLOAD INDEXES
+-- Derived from the QUERIES in src/main/python/frontend/app.py; check the
+-- plans with src/main/python/frontend/query_plans.py after changing either.
+
+-- every query filters to one season; GameStats is then grouped/joined by
+-- player (covering the goals/minutes leaderboards)
+CREATE INDEX idx_game_season_date ON Game(season, game_date);
+CREATE INDEX idx_gamestats_season_player ON GameStats(season, player_id, game_id, goals, minutes);
+CREATE INDEX idx_gamestats_player ON GameStats(player_id);
+
+-- Play is filtered by season + event_type, then joined by game
+CREATE INDEX idx_play_season_event ON Play(season, event_type, game_id);
+CREATE INDEX idx_play_game ON Play(game_id);
+CREATE INDEX idx_play_player ON Play(player_id);
+CREATE INDEX idx_playsequence_season_event ON PlaySequence(season, event_type);
+
+-- team lookups
+CREATE INDEX idx_game_home_team ON Game(home_team_id);
+CREATE INDEX idx_game_away_team ON Game(away_team_id);
+CREATE INDEX idx_player_university ON Player(university_id);
+CREATE INDEX idx_university_conference ON University(conference_id);
+
+-- team-level aggregates read TeamGame by team or by date
+CREATE INDEX idx_teamgame_team ON TeamGame(university_id, season, game_date);
+CREATE INDEX idx_teamgame_season_date ON TeamGame(season, game_date);
+CREATE INDEX idx_teamgame_conference ON TeamGame(conference_id, season, game_date);
+
+-- a team's or conference's rollups across seasons
+CREATE INDEX idx_teamrollup_team ON TeamRollup(university_id, season, week);
+CREATE INDEX idx_conferencerollup_conference ON ConferenceRollup(conference_id, season, week);
+CREATE INDEX idx_teamrating_team ON TeamRating(university_id, season, week);
+CREATE INDEX idx_teamrpi_team ON TeamRPI(university_id, season, week);
+
+-- form dashboards read each player's / team's latest row for a season;
+-- history in date order per player / team
+CREATE INDEX idx_playerform_latest ON PlayerForm(season, latest);
+CREATE INDEX idx_teamform_latest ON TeamForm(season, latest);
+CREATE INDEX idx_playerform_player ON PlayerForm(player_id, season, game_date);
+CREATE INDEX idx_teamform_team ON TeamForm(university_id, season, game_date);
+
+-- ranking history per team; the primary key already serves (season, week)
+CREATE INDEX idx_rankings_university ON Rankings(university_id, season, rank_week);
+CREATE INDEX idx_pss_player ON PlayerSeasonStats(player_id);
+
+-- leaderboards read these in index order
+CREATE INDEX idx_pss_season_minutes ON PlayerSeasonStats(season, total_minutes);
+CREATE INDEX idx_pss_season_points ON PlayerSeasonStats(season, total_points);
+CREATE INDEX idx_pss_season_goals_per_minute ON PlayerSeasonStats(season, goals_per_minute);
+
+-- PLAYER SEASON STATS TRIGGERS
+-- Each GameStats change adjusts only its own (season, player) row.
+DROP TRIGGER IF EXISTS trg_gamestats_insert_pss;
+CREATE TRIGGER trg_gamestats_insert_pss
+AFTER INSERT ON GameStats
+BEGIN
+    INSERT INTO PlayerSeasonStats (
+        season, player_id, games_played, games_started, total_minutes,
+        total_goals, total_assists, total_points, total_shots, total_sog
+    )
+    VALUES (
+        NEW.season,
+        NEW.player_id,
+        1,
+        COALESCE(NEW.started, 0),
+        COALESCE(NEW.minutes, 0),
+        COALESCE(NEW.goals, 0),
+        COALESCE(NEW.assists, 0),
+        COALESCE(NEW.goals * 2 + NEW.assists, 0),
+        COALESCE(NEW.shots, 0),
+        COALESCE(NEW.shots_on_target, 0)
+    )
+    ON CONFLICT (season, player_id) DO UPDATE SET
+        games_played  = games_played  + 1,
+        games_started = games_started + excluded.games_started,
+        total_minutes = total_minutes + excluded.total_minutes,
+        total_goals   = total_goals   + excluded.total_goals,
+        total_assists = total_assists + excluded.total_assists,
+        total_points  = total_points  + excluded.total_points,
+        total_shots   = total_shots   + excluded.total_shots,
+        total_sog     = total_sog     + excluded.total_sog;
+END;
+
+DROP TRIGGER IF EXISTS trg_gamestats_delete_pss;
+CREATE TRIGGER trg_gamestats_delete_pss
+AFTER DELETE ON GameStats
+BEGIN
+    UPDATE PlayerSeasonStats SET
+        games_played  = games_played  - 1,
+        games_started = games_started - COALESCE(OLD.started, 0),
+        total_minutes = total_minutes - COALESCE(OLD.minutes, 0),
+        total_goals   = total_goals   - COALESCE(OLD.goals, 0),
+        total_assists = total_assists - COALESCE(OLD.assists, 0),
+        total_points  = total_points  - COALESCE(OLD.goals * 2 + OLD.assists, 0),
+        total_shots   = total_shots   - COALESCE(OLD.shots, 0),
+        total_sog     = total_sog     - COALESCE(OLD.shots_on_target, 0)
+    WHERE season = OLD.season AND player_id = OLD.player_id;
+
+    DELETE FROM PlayerSeasonStats
+    WHERE season = OLD.season AND player_id = OLD.player_id AND games_played <= 0;
+END;
+
+-- an UPDATE is the DELETE of the old row plus the INSERT of the new one
+DROP TRIGGER IF EXISTS trg_gamestats_update_pss;
+CREATE TRIGGER trg_gamestats_update_pss
+AFTER UPDATE ON GameStats
+BEGIN
+    UPDATE PlayerSeasonStats SET
+        games_played  = games_played  - 1,
+        games_started = games_started - COALESCE(OLD.started, 0),
+        total_minutes = total_minutes - COALESCE(OLD.minutes, 0),
+        total_goals   = total_goals   - COALESCE(OLD.goals, 0),
+        total_assists = total_assists - COALESCE(OLD.assists, 0),
+        total_points  = total_points  - COALESCE(OLD.goals * 2 + OLD.assists, 0),
+        total_shots   = total_shots   - COALESCE(OLD.shots, 0),
+        total_sog     = total_sog     - COALESCE(OLD.shots_on_target, 0)
+    WHERE season = OLD.season AND player_id = OLD.player_id;
+
+    INSERT INTO PlayerSeasonStats (
+        season, player_id, games_played, games_started, total_minutes,
+        total_goals, total_assists, total_points, total_shots, total_sog
+    )
+    VALUES (
+        NEW.season,
+        NEW.player_id,
+        1,
+        COALESCE(NEW.started, 0),
+        COALESCE(NEW.minutes, 0),
+        COALESCE(NEW.goals, 0),
+        COALESCE(NEW.assists, 0),
+        COALESCE(NEW.goals * 2 + NEW.assists, 0),
+        COALESCE(NEW.shots, 0),
+        COALESCE(NEW.shots_on_target, 0)
+    )
+    ON CONFLICT (season, player_id) DO UPDATE SET
+        games_played  = games_played  + 1,
+        games_started = games_started + excluded.games_started,
+        total_minutes = total_minutes + excluded.total_minutes,
+        total_goals   = total_goals   + excluded.total_goals,
+        total_assists = total_assists + excluded.total_assists,
+        total_points  = total_points  + excluded.total_points,
+        total_shots   = total_shots   + excluded.total_shots,
+        total_sog     = total_sog     + excluded.total_sog;
+
+    DELETE FROM PlayerSeasonStats
+    WHERE season = OLD.season AND player_id = OLD.player_id AND games_played <= 0;
+END;
+
+-- TEAMGAME TRIGGERS
+-- Conferences are taken from University when the game loads. Deleting a
+-- Game cascades to its TeamGame rows.
+DROP TRIGGER IF EXISTS trg_game_insert_teamgame;
+CREATE TRIGGER trg_game_insert_teamgame
+AFTER INSERT ON Game
+BEGIN
+    INSERT INTO TeamGame (
+        game_id, university_id, season, game_date, is_home, opponent_id,
+        conference_id, opponent_conference_id, goals_for, goals_against,
+        result, shutout
+    )
+    SELECT
+        NEW.game_id,
+        side.team_id,
+        NEW.season,
+        NEW.game_date,
+        side.is_home,
+        side.opponent_id,
+        (SELECT conference_id FROM University WHERE university_id = side.team_id),
+        (SELECT conference_id FROM University WHERE university_id = side.opponent_id),
+        side.goals_for,
+        side.goals_against,
+        CASE
+            WHEN side.goals_for > side.goals_against THEN 'W'
+            WHEN side.goals_for < side.goals_against THEN 'L'
+            ELSE 'T'
+        END,
+        side.goals_against = 0
+    FROM (
+        SELECT NEW.home_team_id AS team_id, NEW.away_team_id AS opponent_id, 1 AS is_home,
+               NEW.home_score AS goals_for, NEW.away_score AS goals_against
+        UNION ALL
+        SELECT NEW.away_team_id, NEW.home_team_id, 0,
+               NEW.away_score, NEW.home_score
+    ) side;
+END;
+
+DROP TRIGGER IF EXISTS trg_game_update_teamgame;
+CREATE TRIGGER trg_game_update_teamgame
+AFTER UPDATE ON Game
+BEGIN
+    DELETE FROM TeamGame WHERE game_id = OLD.game_id;
+
+    INSERT INTO TeamGame (
+        game_id, university_id, season, game_date, is_home, opponent_id,
+        conference_id, opponent_conference_id, goals_for, goals_against,
+        result, shutout
+    )
+    SELECT
+        NEW.game_id,
+        side.team_id,
+        NEW.season,
+        NEW.game_date,
+        side.is_home,
+        side.opponent_id,
+        (SELECT conference_id FROM University WHERE university_id = side.team_id),
+        (SELECT conference_id FROM University WHERE university_id = side.opponent_id),
+        side.goals_for,
+        side.goals_against,
+        CASE
+            WHEN side.goals_for > side.goals_against THEN 'W'
+            WHEN side.goals_for < side.goals_against THEN 'L'
+            ELSE 'T'
+        END,
+        side.goals_against = 0
+    FROM (
+        SELECT NEW.home_team_id AS team_id, NEW.away_team_id AS opponent_id, 1 AS is_home,
+               NEW.home_score AS goals_for, NEW.away_score AS goals_against
+        UNION ALL
+        SELECT NEW.away_team_id, NEW.home_team_id, 0,
+               NEW.away_score, NEW.home_score
+    ) side;
+END;
+
+-- PLAY SEARCH TRIGGERS
+DROP TRIGGER IF EXISTS trg_play_insert_search;
+CREATE TRIGGER trg_play_insert_search
+AFTER INSERT ON Play
+BEGIN
+    INSERT INTO PlaySearch (rowid, description) VALUES (NEW.play_id, NEW.description);
+END;
+
+DROP TRIGGER IF EXISTS trg_play_delete_search;
+CREATE TRIGGER trg_play_delete_search
+AFTER DELETE ON Play
+BEGIN
+    INSERT INTO PlaySearch (PlaySearch, rowid, description)
+    VALUES ('delete', OLD.play_id, OLD.description);
+END;
 
+DROP TRIGGER IF EXISTS trg_play_update_search;
+CREATE TRIGGER trg_play_update_search
+AFTER UPDATE OF description ON Play
+BEGIN
+    INSERT INTO PlaySearch (PlaySearch, rowid, description)
+    VALUES ('delete', OLD.play_id, OLD.description);
+    INSERT INTO PlaySearch (rowid, description) VALUES (NEW.play_id, NEW.description);
+END;
@@ -2,14 +2,25 @@ import sqlite3
 import csv
 import os
 import re
+import uuid
+
+import form
+import ratings
+import rpi
+import sequences
 
 DB_FILE = "D3WomensSoccer.db"
 SCHEMA_FILE = "D3WomensSoccerSchema.sql"
+OUTPUT_DIR = "src/main/output"
+
+# Top-level CSVs predate season partitions and hold the 2025 season.
+# Rankings only load from partitions (the top-level rankings.csv is the old
+# wide layout; convert it with src/main/python/rankings.py).
+DEFAULT_SEASON = 2025
 
 CSV_TABLES = {
     "src/main/output/Conference.csv": "Conference",
     "src/main/output/University.csv": "University",
-    "src/main/output/Rankings.csv": "Rankings",
     "src/main/output/Game.csv": "Game",
     "src/main/output/Player.csv": "Player",
     "src/main/output/Play.csv": "Play",
@@ -17,15 +28,30 @@ CSV_TABLES = {
 }
 
 CREATION_ORDER = [
+    "BuildInfo",
     "Conference",
     "University",
     "Rankings",
     "Game",
+    "TeamGame",
     "Player",
     "Play",
+    "PlaySequence",
     "GameStats",
+    "PlayerSeasonStats",
+    "TeamRollup",
+    "ConferenceRollup",
+    "TeamRating",
+    "TeamRPI",
+    "PlayerForm",
+    "TeamForm",
+    "SimTeamOdds",
+    "SimRankOdds",
 ]
 
+# Tables keyed by season; their CSVs also live in OUTPUT_DIR/<season>/
+SEASONED_TABLES = {"Rankings", "Game", "GameStats", "Play"}
+
 
 # Connect to db
 
@@ -36,22 +62,48 @@ def connect():
 
 # Schema execution
 
+def split_statements(schema):
+    """
+    Split a schema file into statements. Splitting on every ";" would cut
+    trigger bodies (BEGIN ... END) apart, so a statement only ends once
+    sqlite3 agrees it is complete.
+    """
+    statements = []
+    buf = ""
+    for line in schema.splitlines(keepends=True):
+        # Drop "--" comment lines so a leading section comment doesn't hide
+        # the statement type from the DROP/CREATE checks
+        if line.strip().startswith("--"):
+            continue
+        buf += line
+        if sqlite3.complete_statement(buf):
+            stmt = buf.strip().rstrip(";").strip()
+            if stmt:
+                statements.append(stmt)
+            buf = ""
+    return statements
+
+
 def execute_schema(conn):
     with open(SCHEMA_FILE, "r", encoding="utf-8") as f:
         schema = f.read()
 
-    statements = [s.strip() for s in schema.split(";") if s.strip()]
+    statements = split_statements(schema)
 
     drops = []
     creates = {}
+    others = []  # views, indexes, triggers: created once every table exists
 
     for stmt in statements:
         if stmt.upper().startswith("DROP"):
             drops.append(stmt + ";")
         elif stmt.upper().startswith("CREATE"):
             for table in CREATION_ORDER:
-                if re.search(rf"\bCREATE\s+(TABLE|VIEW)\s+{table}\b", stmt, re.I):
+                if re.search(rf"\bCREATE\s+TABLE\s+{table}\b", stmt, re.I):
                     creates[table] = stmt + ";"
+                    break
+            else:
+                others.append(stmt + ";")
 
     cur = conn.cursor()
 
@@ -60,7 +112,13 @@ def execute_schema(conn):
 
     print("Dropping existing objects...")
     for d in drops:
-        cur.execute(d)
+        try:
+            cur.execute(d)
+        except sqlite3.OperationalError as e:
+            # object changed kind since the last build (e.g. VIEW -> TABLE);
+            # the schema's matching DROP for the other kind removes it
+            if "use DROP" not in str(e):
+                raise
     conn.commit()
 
     print("Re-enabling foreign keys...")
@@ -72,8 +130,35 @@ def execute_schema(conn):
             print(f"Creating {table}")
             cur.execute(creates[table])
 
+    print(f"Creating {len(others)} views, indexes and triggers")
+    for stmt in others:
+        cur.execute(stmt)
+
     conn.commit()
 
+# Season partitions
+
+def season_partitions():
+    """
+    Seasons with an OUTPUT_DIR/<season>/ directory, oldest first.
+    """
+    if not os.path.isdir(OUTPUT_DIR):
+        return []
+    return sorted(int(d) for d in os.listdir(OUTPUT_DIR)
+                  if d.isdigit() and os.path.isdir(os.path.join(OUTPUT_DIR, d)))
+
+
+def csv_sources(table):
+    """
+    (csv_file, season) pairs to load into table: the legacy top-level
+    CSV first, then one file per season partition.
+    """
+    sources = [(f, DEFAULT_SEASON) for f, t in CSV_TABLES.items() if t == table]
+    if table in SEASONED_TABLES or table == "Player":
+        for season in season_partitions():
+            sources.append((os.path.join(OUTPUT_DIR, str(season), f"{table}.csv"), season))
+    return [(f, season) for f, season in sources if os.path.exists(f)]
+
 # Helpers to populate Player from GameStats and Play
 
 def populate_player_from_play(conn):
@@ -107,13 +192,35 @@ def populate_player_from_play(conn):
 
 # CSV insertion
 
-def insert_csv(conn, csv_file, table):
+# csv.DictWriter writes Python bools as "True"/"False"; store them as 1/0 so
+# SUM(started) and the PlayerSeasonStats triggers count them
+BOOL_STRINGS = {"True": 1, "False": 0}
+
+
+def csv_value(value):
+    if value == "":
+        return None
+    return BOOL_STRINGS.get(value, value)
+
+
+def insert_csv(conn, csv_file, table, season=DEFAULT_SEASON):
     with open(csv_file, newline="", encoding="utf-8") as f:
         reader = csv.DictReader(f)
-        cols = reader.fieldnames
+        cols = list(reader.fieldnames)
+
+        # play_ids restart at 1 in every partition; let AUTOINCREMENT assign them
+        if table == "Play" and "play_id" in cols:
+            cols.remove("play_id")
+
+        extra = ()
+        if table in SEASONED_TABLES and "season" not in cols:
+            extra = (season,)
+            insert_cols = cols + ["season"]
+        else:
+            insert_cols = cols
 
-        placeholders = ", ".join("?" for _ in cols)
-        sql = f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({placeholders})"
+        placeholders = ", ".join("?" for _ in insert_cols)
+        sql = f"INSERT INTO {table} ({', '.join(insert_cols)}) VALUES ({placeholders})"
 
         cur = conn.cursor()
 
@@ -134,7 +241,7 @@ def insert_csv(conn, csv_file, table):
                         skipped += 1
                         continue
 
-                values = tuple(None if row[c] == "" else row[c] for c in cols)
+                values = tuple(csv_value(row[c]) for c in cols) + extra
                 cur.execute(sql, values)
                 inserted += 1
 
@@ -144,25 +251,140 @@ def insert_csv(conn, csv_file, table):
 
         conn.commit()
 
-        print(f"Inserted {inserted} rows into {table}")
+        print(f"Inserted {inserted} rows into {table} from {csv_file}")
         if skipped:
             print(f"Skipped {skipped} invalid rows in {table}")
 
+# Rollups (TeamRollup / ConferenceRollup)
+
+# per-row value summed into each rollup column, from TeamGame tg
+ROLLUP_STATS = {
+    "games": "1",
+    "wins": "tg.result = 'W'",
+    "losses": "tg.result = 'L'",
+    "ties": "tg.result = 'T'",
+    "goals_for": "tg.goals_for",
+    "goals_against": "tg.goals_against",
+    "shutouts": "tg.shutout",
+}
+
+# column prefix -> which games count
+ROLLUP_SPLITS = {
+    "": "1",
+    "conf_": "tg.opponent_conference_id = tg.conference_id",
+    "nonconf_": "tg.opponent_conference_id IS NOT tg.conference_id",
+}
+
+# Monday-based week of the year; week 0 rows hold season totals (the fall
+# season never has games before the year's first Monday)
+ROLLUP_WEEK = "CAST(strftime('%W', tg.game_date) AS INTEGER)"
+
+ROLLUP_TABLES = {
+    "TeamRollup": "university_id",
+    "ConferenceRollup": "conference_id",
+}
+
+
+def rollup_sql(table, key):
+    cols = [prefix + name for prefix in ROLLUP_SPLITS for name in ROLLUP_STATS]
+    aggs = [
+        f"COALESCE(SUM(CASE WHEN {cond} THEN {expr} ELSE 0 END), 0)"
+        for cond in ROLLUP_SPLITS.values() for expr in ROLLUP_STATS.values()
+    ]
+    return f"""
+        INSERT INTO {table} (season, week, {key}, {', '.join(cols)})
+        SELECT k.season, k.week, k.{key}, {', '.join(aggs)}
+        FROM temp.rollup_keys k
+        JOIN TeamGame tg
+          ON tg.{key} = k.{key}
+         AND tg.season = k.season
+         AND (k.week = 0 OR {ROLLUP_WEEK} = k.week)
+        GROUP BY k.season, k.week, k.{key}
+    """
+
+
+def refresh_rollups(conn, game_ids=None):
+    """
+    Recompute TeamRollup and ConferenceRollup from TeamGame. With game_ids
+    (new or changed games), only the team/conference weeks and seasons
+    those games fall in are re-aggregated; without, everything is rebuilt.
+    """
+    cur = conn.cursor()
+
+    game_filter = ""
+    if game_ids is not None:
+        cur.execute("DROP TABLE IF EXISTS temp.rollup_games")
+        cur.execute("CREATE TEMP TABLE rollup_games (game_id INTEGER PRIMARY KEY)")
+        cur.executemany("INSERT OR IGNORE INTO temp.rollup_games VALUES (?)",
+                        ((gid,) for gid in game_ids))
+        game_filter = "AND tg.game_id IN (SELECT game_id FROM temp.rollup_games)"
+
+    for table, key in ROLLUP_TABLES.items():
+        cur.execute("DROP TABLE IF EXISTS temp.rollup_keys")
+        cur.execute(f"""
+            CREATE TEMP TABLE rollup_keys AS
+            SELECT season, {ROLLUP_WEEK} AS week, {key} FROM TeamGame tg
+            WHERE tg.{key} IS NOT NULL {game_filter}
+            UNION
+            SELECT season, 0, {key} FROM TeamGame tg
+            WHERE tg.{key} IS NOT NULL {game_filter}
+        """)
+        cur.execute(f"""
+            DELETE FROM {table}
+            WHERE (season, week, {key}) IN (SELECT season, week, {key} FROM temp.rollup_keys)
+        """)
+        cur.execute(rollup_sql(table, key))
+        print(f"Refreshed {cur.rowcount} rows in {table}")
+
+    cur.execute("DROP TABLE IF EXISTS temp.rollup_keys")
+    cur.execute("DROP TABLE IF EXISTS temp.rollup_games")
+    conn.commit()
+
 #
 def main():
     conn = connect()
     execute_schema(conn)
 
-    # Insert all tables EXCEPT Play
-    for csv_file, table in CSV_TABLES.items():
-        if table != "Play" and os.path.exists(csv_file):
-            insert_csv(conn, csv_file, table)
+    # Insert all tables EXCEPT Play, every season partition
+    for table in CREATION_ORDER:
+        if table != "Play":
+            for csv_file, season in csv_sources(table):
+                insert_csv(conn, csv_file, table, season)
 
     # Populate Player from both sources
     populate_player_from_play(conn)
 
     # Insert Play last (FKs now satisfied)
-    insert_csv(conn, "src/main/output/Play.csv", "Play")
+    for csv_file, season in csv_sources("Play"):
+        insert_csv(conn, csv_file, "Play", season)
+
+    # Plays in clock order with possession/sequence ids
+    sequences.refresh_sequences(conn)
+
+    # Team/conference rollups over everything just loaded
+    refresh_rollups(conn)
+
+    # Rolling player/team form (last games, last days)
+    form.refresh_form(conn)
+
+    # Weekly team ratings (Elo, goal-margin least squares)
+    ratings.refresh_ratings(conn)
+
+    # Weekly RPI and strength of schedule
+    rpi.refresh_rpi(conn)
+
+    # Merge the play search index's per-transaction segments
+    conn.execute("INSERT INTO PlaySearch (PlaySearch) VALUES ('optimize');")
+
+    # New build id: invalidates the frontend's cached query results
+    conn.execute(
+        "INSERT INTO BuildInfo (build_id, built_at) VALUES (?, datetime('now'))",
+        (uuid.uuid4().hex,),
+    )
+
+    # Planner statistics, so season filters that match most rows still scan
+    conn.execute("ANALYZE;")
+    conn.commit()
 
     conn.close()
     print("Database build complete.")
@@ -0,0 +1,232 @@
+"""
+Rolling form, written to PlayerForm and TeamForm: one row per player (team)
+per game, in date order within the season, holding for each stat
+
+* <stat>: this game
+* <stat>_season: season to date (the running sum)
+* <stat>_last_games: the last FORM_GAMES games, this one included
+* <stat>_last_days: games in the FORM_DAYS days up to this one
+
+and `latest` = 1 on each player's (team's) most recent game of the season.
+
+Windows are differences of running sums (sum over the window = season to
+date now minus season to date just before it), so after new games load only
+the affected players' and teams' rows from the earliest new game on are
+computed, continuing from the running sums already stored. csv_to_sql.py
+calls refresh_form() after a load; pass game_ids for the incremental update.
+"""
+from datetime import date
+
+import numpy as np
+
+FORM_GAMES = 5
+FORM_DAYS = 30
+
+# table -> key column, stats and the source rows:
+# (key, season, game_date, game_id, *stats) for every game played
+FORM_TABLES = {
+    "PlayerForm": {
+        "key": "player_id",
+        "stats": ["games", "minutes", "goals", "assists", "shots", "shots_on_target"],
+        "sql": """
+            SELECT gs.player_id AS key, gs.season AS season, g.game_date AS game_date,
+                   gs.game_id AS game_id, 1,
+                   COALESCE(gs.minutes, 0), COALESCE(gs.goals, 0), COALESCE(gs.assists, 0),
+                   COALESCE(gs.shots, 0), COALESCE(gs.shots_on_target, 0)
+            FROM GameStats gs
+            JOIN Game g ON g.game_id = gs.game_id
+            WHERE g.game_date IS NOT NULL {game_filter}
+        """,
+        "game_column": "gs.game_id",
+        "key_columns": "gs.player_id, gs.season",
+    },
+    "TeamForm": {
+        "key": "university_id",
+        "stats": ["games", "goals_for", "goals_against", "points"],
+        "sql": """
+            SELECT tg.university_id AS key, tg.season AS season, tg.game_date AS game_date,
+                   tg.game_id AS game_id, 1,
+                   tg.goals_for, tg.goals_against,
+                   CASE tg.result WHEN 'W' THEN 3 WHEN 'T' THEN 1 ELSE 0 END
+            FROM TeamGame tg
+            WHERE tg.game_date IS NOT NULL AND tg.result IS NOT NULL {game_filter}
+        """,
+        "game_column": "tg.game_id",
+        "key_columns": "tg.university_id, tg.season",
+    },
+}
+
+
+def form_columns(stats):
+    return [f"{s}{suffix}" for s in stats for suffix in ("", "_season", "_last_games", "_last_days")]
+
+
+def day_number(iso_date):
+    return date.fromisoformat(str(iso_date)[:10]).toordinal()
+
+
+def group_starts(keys):
+    """
+    Index of the first row of each run of equal keys, for every row.
+    """
+    first = np.r_[True, keys[1:] != keys[:-1]] if len(keys) else np.zeros(0, dtype=bool)
+    return np.maximum.accumulate(np.where(first, np.arange(len(keys)), 0))
+
+
+def compute_form(groups, days, game_values, stored_season, stored_number, stored):
+    """
+    Rolling windows for rows sorted by (group, date). Stored rows (already
+    in the table, always ahead of the new ones in their group) keep their
+    running sums and game numbers; new rows continue them with their game
+    values. A group starts either at its season's first game or with
+    enough stored rows to cover the new rows' windows.
+    Returns (season to date, last games, last days, game number, latest).
+    """
+    n = len(groups)
+    start = group_starts(groups)
+    position = np.arange(n) - start
+    number = np.where(stored[start], stored_number[start], 1) + position
+
+    # each row's step in the running sum: a stored row's difference from
+    # the stored row before it (its whole sum if first), a new row's game
+    previous = np.where((position > 0)[:, None], np.roll(stored_season, 1, axis=0), 0)
+    steps = np.where(stored[:, None], stored_season - previous, game_values)
+    total = np.cumsum(steps, axis=0)
+    season = total - (total[start] - steps[start])
+
+    def season_at(idx):
+        # season to date at row idx, 0 where idx falls before the group
+        valid = idx >= start
+        out = np.zeros_like(season)
+        out[valid] = season[idx[valid]]
+        return out
+
+    last_games = season - season_at(np.arange(n) - FORM_GAMES)
+    # last row of the same group at least FORM_DAYS days back
+    composite = groups * 10 ** 7 + days
+    cutoff = np.searchsorted(composite, composite - FORM_DAYS, side="right") - 1
+    last_days = season - season_at(cutoff)
+
+    latest = np.r_[groups[1:] != groups[:-1], True]
+    return season, last_games, last_days, number, latest
+
+
+def refresh_form(conn, game_ids=None):
+    """
+    Update PlayerForm and TeamForm. With game_ids (new or changed games),
+    only the players and teams in those games are touched, from their
+    earliest such game in the season on; without, everything is rebuilt.
+    """
+    cur = conn.cursor()
+    if game_ids is not None:
+        cur.execute("DROP TABLE IF EXISTS temp.form_games")
+        cur.execute("CREATE TEMP TABLE form_games (game_id INTEGER PRIMARY KEY)")
+        cur.executemany("INSERT OR IGNORE INTO temp.form_games VALUES (?)",
+                        ((gid,) for gid in game_ids))
+
+    for table, spec in FORM_TABLES.items():
+        key, stats = spec["key"], spec["stats"]
+        width = len(stats)
+        columns = form_columns(stats)
+
+        if game_ids is None:
+            cur.execute(f"DELETE FROM {table}")
+            source = conn.execute(spec["sql"].format(game_filter="")).fetchall()
+            stored_rows = []
+        else:
+            # (key, season) -> earliest changed game, recomputed from there on
+            changed = spec["sql"].format(
+                game_filter=f"AND {spec['game_column']} IN (SELECT game_id FROM temp.form_games)")
+            cur.execute("DROP TABLE IF EXISTS temp.form_keys")
+            cur.execute("""
+                CREATE TEMP TABLE form_keys (
+                    key INTEGER, season INTEGER, from_date DATE,
+                    first_number INTEGER,   -- first stored game the new rows' windows reach
+                    PRIMARY KEY (key, season)
+                )
+            """)
+            cur.execute(f"""
+                INSERT INTO temp.form_keys (key, season, from_date)
+                SELECT key, season, MIN(game_date) FROM ({changed}) GROUP BY key, season
+            """)
+            # the last FORM_GAMES stored games, and from the last game at
+            # least FORM_DAYS days back (every stored game when there is none)
+            cur.execute(f"""
+                UPDATE temp.form_keys SET first_number = MIN(
+                    (SELECT MAX(game_number) FROM {table} f
+                     WHERE f.{key} = form_keys.key AND f.season = form_keys.season
+                       AND f.game_date < form_keys.from_date) - {FORM_GAMES} + 1,
+                    COALESCE((SELECT MAX(game_number) FROM {table} f
+                              WHERE f.{key} = form_keys.key AND f.season = form_keys.season
+                                AND f.game_date <= date(form_keys.from_date, '-{FORM_DAYS} days')), 1)
+                )
+            """)
+
+            affected = spec["sql"].format(
+                game_filter=f"AND ({spec['key_columns']}) IN (SELECT key, season FROM temp.form_keys)")
+            source = conn.execute(f"""
+                SELECT src.* FROM ({affected}) AS src
+                JOIN temp.form_keys k ON k.key = src.key AND k.season = src.season
+                WHERE src.game_date >= k.from_date
+            """).fetchall()
+            # CROSS JOIN keeps form_keys as the outer loop (SQLite)
+            stored_rows = conn.execute(f"""
+                SELECT f.{key}, f.season, f.game_date, f.game_id,
+                       {", ".join(f"f.{s}" for s in stats)}, {", ".join(f"f.{s}_season" for s in stats)},
+                       f.game_number
+                FROM temp.form_keys k
+                CROSS JOIN {table} f
+                WHERE f.{key} = k.key AND f.season = k.season
+                  AND f.game_date < k.from_date AND f.game_number >= k.first_number
+            """).fetchall()
+            cur.execute(f"""
+                DELETE FROM {table} WHERE rowid IN (
+                    SELECT f.rowid FROM temp.form_keys k
+                    CROSS JOIN {table} f
+                    WHERE f.{key} = k.key AND f.season = k.season AND f.game_date >= k.from_date
+                )
+            """)
+
+        rows = [tuple(r) + (0,) * width + (0, False) for r in source]
+        rows += [tuple(r) + (True,) for r in stored_rows]
+        rows.sort(key=lambda r: r[:4])
+        if not rows:
+            print(f"Refreshed 0 rows in {table}")
+            continue
+
+        _, groups = np.unique(np.array([r[:2] for r in rows], dtype=np.int64), axis=0, return_inverse=True)
+        groups = groups.reshape(-1)
+        days = np.array([day_number(r[2]) for r in rows], dtype=np.int64)
+        game_values = np.array([r[4:4 + width] for r in rows], dtype=np.int64)
+        stored_season = np.array([r[4 + width:4 + 2 * width] for r in rows], dtype=np.int64)
+        stored_number = np.array([r[-2] for r in rows], dtype=np.int64)
+        stored = np.array([r[-1] for r in rows], dtype=bool)
+
+        season, last_games, last_days, number, latest = compute_form(
+            groups, days, game_values, stored_season, stored_number, stored)
+
+        new = np.flatnonzero(~stored)
+        # per row: stat by stat, (game, season, last games, last days)
+        values = np.stack([game_values, season, last_games, last_days], axis=2)[new].reshape(len(new), -1)
+        out = [
+            (rows[i][0], rows[i][1], rows[i][3], rows[i][2], n, l, *v)
+            for i, n, l, v in zip(new.tolist(), number[new].tolist(), latest[new].astype(int).tolist(), values.tolist())
+        ]
+        placeholders = ", ".join("?" * (6 + len(columns)))
+        cur.executemany(
+            f"INSERT INTO {table} ({key}, season, game_id, game_date, game_number, latest, "
+            f"{', '.join(columns)}) VALUES ({placeholders})",
+            out,
+        )
+        # the last stored row of each group held `latest` until now; it
+        # keeps it only if no newer game came in
+        last_stored = stored & ~np.r_[stored[1:] & (groups[1:] == groups[:-1]), False]
+        cur.executemany(
+            f"UPDATE {table} SET latest = ? WHERE {key} = ? AND game_id = ?",
+            [(int(latest[i]), rows[i][0], rows[i][3]) for i in np.flatnonzero(last_stored)],
+        )
+        print(f"Refreshed {len(out)} rows in {table}")
+
+    cur.execute("DROP TABLE IF EXISTS temp.form_keys")
+    cur.execute("DROP TABLE IF EXISTS temp.form_games")
+    conn.commit()
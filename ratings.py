@@ -0,0 +1,192 @@
+"""
+Team ratings by week, written to TeamRating:
+
+* elo: game-by-game Elo in date order (margin-of-victory multiplier, home
+  edge, ties count half). Each season starts from the previous season's
+  final ratings regressed toward the mean.
+* margin_rating: least-squares (Massey) goal-margin rating, i.e. goals per
+  game better than an average team, with a fitted home edge. Solved every
+  week from sparse normal equations that are accumulated week by week and
+  warm-started from the previous week's solution.
+
+csv_to_sql.py calls refresh_ratings() after a load. update_ratings() redoes
+only the weeks from the earliest new game on, starting from the stored
+ratings of the week before.
+"""
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import cg
+
+ELO_START = 1500.0
+ELO_K = 20.0
+ELO_HOME = 60.0        # rating points added to the home side's expectation
+ELO_REGRESS = 1 / 3    # share of the distance to ELO_START lost between seasons
+
+# Ridge on the least-squares ratings: keeps the system solvable early in
+# the season and pulls teams with few games toward average
+RIDGE = 0.5
+
+# Same Monday-based week as TeamRollup
+WEEK = "CAST(strftime('%W', game_date) AS INTEGER)"
+
+GAMES_SQL = f"""
+SELECT {WEEK}, home_team_id, away_team_id, home_score, away_score
+FROM Game
+WHERE season = ?
+  AND home_score IS NOT NULL AND away_score IS NOT NULL
+  AND home_team_id IS NOT NULL AND away_team_id IS NOT NULL
+ORDER BY game_date, game_time, game_id
+"""
+
+
+def load_games(conn, season):
+    rows = conn.execute(GAMES_SQL, (season,)).fetchall()
+    return np.array(rows, dtype=np.int64).reshape(len(rows), 5)
+
+
+def mov_multiplier(margin):
+    """
+    World Football Elo style: wins by 2 count 1.5x, by 3+ (11 + margin) / 8.
+    """
+    margin = abs(margin)
+    if margin <= 1:
+        return 1.0
+    if margin == 2:
+        return 1.5
+    return (11 + margin) / 8
+
+
+def stored_ratings(conn, season, week):
+    """
+    university_id -> (elo, margin_rating) from the latest stored week of
+    `season` before `week` (every week if week is None).
+    """
+    row = conn.execute(
+        "SELECT MAX(week) FROM TeamRating WHERE season = ? AND (? IS NULL OR week < ?)",
+        (season, week, week),
+    ).fetchone()
+    if row[0] is None:
+        return {}
+    return {
+        r[0]: (r[1], r[2]) for r in conn.execute(
+            "SELECT university_id, elo, margin_rating FROM TeamRating WHERE season = ? AND week = ?",
+            (season, row[0]),
+        )
+    }
+
+
+def rate_season(conn, season, from_week=None):
+    """
+    Recompute TeamRating for `season` from `from_week` on (None: the whole
+    season). Returns the number of rows written.
+    """
+    games = load_games(conn, season)
+    if not len(games):
+        return 0
+
+    weeks = games[:, 0]
+    teams = np.unique(games[:, 1:3])
+    n = len(teams)
+    home = np.searchsorted(teams, games[:, 1])
+    away = np.searchsorted(teams, games[:, 2])
+    margin = (games[:, 3] - games[:, 4]).astype(np.float64)
+
+    # starting point: stored ratings before from_week; teams without one
+    # (no game yet) start from last season's final, regressed
+    last = stored_ratings(conn, season - 1, None)
+    start = np.array([
+        ELO_START + (1 - ELO_REGRESS) * (last[int(t)][0] - ELO_START) if int(t) in last else ELO_START
+        for t in teams
+    ])
+    prior = stored_ratings(conn, season, from_week) if from_week is not None else {}
+    if not prior:
+        from_week = int(weeks.min())
+        elo = start
+        x = np.zeros(n + 1)
+    else:
+        elo = np.array([prior[int(t)][0] if int(t) in prior else s for t, s in zip(teams, start)])
+        x = np.array([prior[int(t)][1] if int(t) in prior else 0.0 for t in teams] + [0.0])
+
+    # normal equations (X'X + ridge) r = X'y over games before from_week.
+    # Columns: one per team (+1 home, -1 away) and a last one for the home edge.
+    normal = RIDGE * sparse.identity(n + 1, format="csr")
+    rhs = np.zeros(n + 1)
+    played = np.zeros(n, dtype=np.int64)
+
+    def add_games(mask):
+        nonlocal normal, rhs
+        rows = np.flatnonzero(mask)
+        m = len(rows)
+        X = sparse.csr_matrix(
+            (np.r_[np.ones(m), -np.ones(m), np.ones(m)],
+             (np.r_[np.arange(m), np.arange(m), np.arange(m)],
+              np.r_[home[rows], away[rows], np.full(m, n)])),
+            shape=(m, n + 1),
+        )
+        normal = normal + X.T @ X
+        rhs = rhs + X.T @ margin[rows]
+        np.add.at(played, home[rows], 1)
+        np.add.at(played, away[rows], 1)
+
+    add_games(weeks < from_week)
+
+    out = []
+    for week in np.unique(weeks[weeks >= from_week]):
+        this_week = np.flatnonzero(weeks == week)
+
+        for g in this_week:
+            h, a = home[g], away[g]
+            expected = 1 / (1 + 10 ** (-(elo[h] + ELO_HOME - elo[a]) / 400))
+            result = 1.0 if margin[g] > 0 else 0.0 if margin[g] < 0 else 0.5
+            delta = ELO_K * mov_multiplier(margin[g]) * (result - expected)
+            elo[h] += delta
+            elo[a] -= delta
+
+        add_games(weeks == week)
+        x, _ = cg(normal, rhs, x0=x, rtol=1e-8)
+
+        for t in np.flatnonzero(played):
+            out.append((season, int(week), int(teams[t]), int(played[t]), float(elo[t]), float(x[t])))
+
+    conn.execute("DELETE FROM TeamRating WHERE season = ? AND week >= ?", (season, from_week))
+    conn.executemany(
+        "INSERT INTO TeamRating (season, week, university_id, games, elo, margin_rating) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        out,
+    )
+    return len(out)
+
+
+def refresh_ratings(conn):
+    """
+    Rebuild TeamRating for every season, oldest first (each season starts
+    from the one before).
+    """
+    conn.execute("DELETE FROM TeamRating")
+    for (season,) in conn.execute("SELECT DISTINCT season FROM Game ORDER BY season").fetchall():
+        count = rate_season(conn, season)
+        print(f"Rated season {season}: {count} TeamRating rows")
+    conn.commit()
+
+
+def update_ratings(conn, game_ids):
+    """
+    Refresh TeamRating after the given games were added or changed: the
+    earliest affected season from its earliest affected week on, then every
+    later season in full (each starts from the one before).
+    """
+    placeholders = ",".join("?" * len(game_ids))
+    affected = conn.execute(
+        f"SELECT season, MIN({WEEK}) FROM Game WHERE game_id IN ({placeholders}) GROUP BY season",
+        list(game_ids),
+    ).fetchall()
+    if not affected:
+        return
+
+    season, week = min(affected)
+    rate_season(conn, season, week)
+    for (later,) in conn.execute(
+        "SELECT DISTINCT season FROM Game WHERE season > ? ORDER BY season", (season,)
+    ).fetchall():
+        rate_season(conn, later)
+    conn.commit()
@@ -0,0 +1,161 @@
+"""
+Rating Percentage Index and strength of schedule by week, written to TeamRPI.
+
+The season's results are held as two sparse team-by-team matrices, built
+up one week at a time: G[t, o] = games t played against o, W[t, o] = t's
+wins against o (ties count half). Every team's win percentage (WP),
+opponents' win percentage (OWP, each opponent's record with its games
+against t removed) and opponents' opponents' win percentage (OOWP) then
+come out of sparse matrix-vector products, for every team at once:
+
+    rpi = 0.25 * WP + 0.50 * OWP + 0.25 * OOWP
+    sos = (2 * OWP + OOWP) / 3
+
+OWP and OOWP average over games, so an opponent played twice counts twice.
+
+csv_to_sql.py calls refresh_rpi() after a load; update_rpi() redoes the
+affected seasons from the earliest week the given games touch.
+"""
+import numpy as np
+from scipy import sparse
+
+WP_WEIGHT = 0.25
+OWP_WEIGHT = 0.50
+OOWP_WEIGHT = 0.25
+
+# Same Monday-based week as TeamRollup and TeamRating
+WEEK = "CAST(strftime('%W', game_date) AS INTEGER)"
+
+GAMES_SQL = f"""
+SELECT {WEEK}, home_team_id, away_team_id, home_score, away_score
+FROM Game
+WHERE season = ?
+  AND home_score IS NOT NULL AND away_score IS NOT NULL
+  AND home_team_id IS NOT NULL AND away_team_id IS NOT NULL
+"""
+
+
+def _divide(num, den):
+    """
+    num / den, NaN where den is 0.
+    """
+    out = np.full(len(num), np.nan)
+    np.divide(num, den, out=out, where=den > 0)
+    return out
+
+
+def _null(value):
+    return None if np.isnan(value) else float(value)
+
+
+def rpi_season(conn, season, from_week=None):
+    """
+    Recompute TeamRPI for `season` from `from_week` on (None: the whole
+    season). Returns the number of rows written.
+    """
+    rows = conn.execute(GAMES_SQL, (season,)).fetchall()
+    games = np.array(rows, dtype=np.int64).reshape(len(rows), 5)
+    if not len(games):
+        return 0
+
+    weeks = games[:, 0]
+    teams = np.unique(games[:, 1:3])
+    n = len(teams)
+    home = np.searchsorted(teams, games[:, 1])
+    away = np.searchsorted(teams, games[:, 2])
+    diff = games[:, 3] - games[:, 4]
+    home_result = np.where(diff > 0, 1.0, np.where(diff < 0, 0.0, 0.5))
+    if from_week is None:
+        from_week = int(weeks.min())
+
+    G = sparse.csr_matrix((n, n))
+    W = sparse.csr_matrix((n, n))
+    wins = np.zeros(n, dtype=np.int64)
+    losses = np.zeros(n, dtype=np.int64)
+    ties = np.zeros(n, dtype=np.int64)
+    ones = np.ones(n)
+
+    out = []
+    for week in np.unique(weeks):
+        idx = np.flatnonzero(weeks == week)
+        # each game is two directed entries: home vs away and away vs home
+        t = np.r_[home[idx], away[idx]]
+        o = np.r_[away[idx], home[idx]]
+        result = np.r_[home_result[idx], 1 - home_result[idx]]
+        G = G + sparse.csr_matrix((np.ones(len(t)), (t, o)), shape=(n, n))
+        W = W + sparse.csr_matrix((result, (t, o)), shape=(n, n))
+        np.add.at(wins, t, result == 1)
+        np.add.at(losses, t, result == 0)
+        np.add.at(ties, t, result == 0.5)
+        if week < from_week:
+            continue
+
+        played = G @ ones
+        won = W @ ones
+        wp = _divide(won, played)
+
+        # opponent o's win percentage without its games against t, for
+        # every (t, o) pair that met
+        pairs = G.tocoo()
+        t_idx, o_idx, met = pairs.row, pairs.col, pairs.data
+        o_won_vs_t = np.asarray(W[o_idx, t_idx]).ravel()
+        o_wp = _divide(won[o_idx] - o_won_vs_t, played[o_idx] - met)
+        counted = ~np.isnan(o_wp)
+
+        weighted = sparse.csr_matrix(
+            (met[counted] * o_wp[counted], (t_idx[counted], o_idx[counted])), shape=(n, n))
+        weights = sparse.csr_matrix(
+            (met[counted], (t_idx[counted], o_idx[counted])), shape=(n, n))
+        owp = _divide(weighted @ ones, weights @ ones)
+
+        has_owp = ~np.isnan(owp)
+        oowp = _divide(G @ np.where(has_owp, owp, 0.0), G @ has_owp.astype(np.float64))
+
+        rpi = WP_WEIGHT * wp + OWP_WEIGHT * owp + OOWP_WEIGHT * oowp
+        sos = (2 * owp + oowp) / 3
+
+        rated = np.flatnonzero(~np.isnan(rpi))
+        rank = np.zeros(n, dtype=np.int64)
+        rank[rated[np.argsort(-rpi[rated], kind="stable")]] = np.arange(1, len(rated) + 1)
+
+        for i in np.flatnonzero(played):
+            out.append((
+                season, int(week), int(teams[i]), int(played[i]),
+                int(wins[i]), int(losses[i]), int(ties[i]),
+                float(wp[i]), _null(owp[i]), _null(oowp[i]), _null(sos[i]), _null(rpi[i]),
+                int(rank[i]) or None,
+            ))
+
+    conn.execute("DELETE FROM TeamRPI WHERE season = ? AND week >= ?", (season, from_week))
+    conn.executemany(
+        "INSERT INTO TeamRPI (season, week, university_id, games, wins, losses, ties, "
+        "wp, owp, oowp, sos, rpi, rpi_rank) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        out,
+    )
+    return len(out)
+
+
+def refresh_rpi(conn):
+    """
+    Rebuild TeamRPI for every season.
+    """
+    conn.execute("DELETE FROM TeamRPI")
+    for (season,) in conn.execute("SELECT DISTINCT season FROM Game ORDER BY season").fetchall():
+        count = rpi_season(conn, season)
+        print(f"RPI for season {season}: {count} TeamRPI rows")
+    conn.commit()
+
+
+def update_rpi(conn, game_ids):
+    """
+    Refresh TeamRPI after the given games were added or changed: each
+    affected season from its earliest affected week on.
+    """
+    placeholders = ",".join("?" * len(game_ids))
+    affected = conn.execute(
+        f"SELECT season, MIN({WEEK}) FROM Game WHERE game_id IN ({placeholders}) GROUP BY season",
+        list(game_ids),
+    ).fetchall()
+    for season, week in affected:
+        rpi_season(conn, season, week)
+    conn.commit()
@@ -0,0 +1,131 @@
+"""
+Play sequences, written to PlaySequence: one pass over Play, a game at a
+time, that puts each game's plays in clock order and records for every play
+
+* seq: its position in the game (1, 2, ...)
+* elapsed_seconds: time_of_play ("MM:SS", minutes counting up from kickoff)
+  in seconds
+* team_id: the acting player's university
+* possession_id: numbered runs of plays by one team; a new one starts when
+  another team acts or after a goal (kickoff). Plays with no known team stay
+  in the current possession.
+* sequence_id: runs within a possession with no gap over SEQUENCE_GAP seconds
+* prev_event_type / gap_seconds: the play before it and the time since
+
+so "shots within 30 seconds of a corner" or "goals after a substitution" are
+one ordered scan of PlaySequence per game instead of self-joins on
+time_of_play strings. Plays without a time sort last and start a sequence.
+
+csv_to_sql.py calls refresh_sequences() after loading Play; pass game_ids to
+redo only those games.
+"""
+from itertools import groupby
+
+SEQUENCE_GAP = 30       # seconds without a play that end a sequence
+BATCH_ROWS = 5000
+
+PLAYS_SQL = """
+SELECT pl.game_id, pl.season, pl.play_id, pl.event_type, pl.time_of_play, p.university_id
+FROM Play pl
+LEFT JOIN Player p ON p.player_id = pl.player_id
+{where}
+ORDER BY pl.game_id
+"""
+
+INSERT_SQL = """
+INSERT INTO PlaySequence (game_id, seq, play_id, season, event_type, elapsed_seconds, team_id,
+                          possession_id, sequence_id, prev_event_type, gap_seconds)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def elapsed_seconds(time_of_play):
+    """
+    "MM:SS" or "HH:MM:SS" (minutes may run past 59) -> seconds, None if
+    missing or malformed.
+    """
+    if not time_of_play:
+        return None
+    parts = str(time_of_play).strip().split(":")
+    try:
+        values = [int(p) for p in parts]
+    except ValueError:
+        return None
+    if len(values) == 2:
+        return values[0] * 60 + values[1]
+    if len(values) == 3:
+        return values[0] * 3600 + values[1] * 60 + values[2]
+    return None
+
+
+def game_sequence(plays):
+    """
+    One game's plays as (game_id, season, play_id, event_type, time_of_play,
+    team_id) tuples -> PlaySequence rows in clock order.
+    """
+    timed = sorted(
+        ((elapsed_seconds(p[4]), p) for p in plays),
+        key=lambda t: (t[0] is None, t[0] or 0, t[1][2]),
+    )
+
+    rows = []
+    possession = sequence = 0
+    possession_team = None
+    prev_event = prev_elapsed = None
+    for seq, (elapsed, (game_id, season, play_id, event_type, _, team_id)) in enumerate(timed, 1):
+        gap = elapsed - prev_elapsed if elapsed is not None and prev_elapsed is not None else None
+
+        new_possession = (
+            possession == 0
+            or prev_event == "GOAL"
+            or (team_id is not None and possession_team is not None and team_id != possession_team)
+        )
+        if new_possession:
+            possession += 1
+            possession_team = team_id
+        elif possession_team is None:
+            possession_team = team_id
+
+        if new_possession or gap is None or gap > SEQUENCE_GAP:
+            sequence += 1
+
+        rows.append((game_id, seq, play_id, season, event_type, elapsed, team_id,
+                     possession, sequence, prev_event, gap))
+        prev_event, prev_elapsed = event_type, elapsed
+    return rows
+
+
+def refresh_sequences(conn, game_ids=None):
+    """
+    Rebuild PlaySequence, for every game or only for game_ids.
+    """
+    cur = conn.cursor()
+
+    where = ""
+    if game_ids is not None:
+        cur.execute("DROP TABLE IF EXISTS temp.sequence_games")
+        cur.execute("CREATE TEMP TABLE sequence_games (game_id INTEGER PRIMARY KEY)")
+        cur.executemany("INSERT OR IGNORE INTO temp.sequence_games VALUES (?)",
+                        ((gid,) for gid in game_ids))
+        where = "WHERE pl.game_id IN (SELECT game_id FROM temp.sequence_games)"
+        cur.execute("DELETE FROM PlaySequence WHERE game_id IN (SELECT game_id FROM temp.sequence_games)")
+    else:
+        cur.execute("DELETE FROM PlaySequence")
+
+    # plays are read (a game at a time, in game order) on one cursor while
+    # rows are written on another
+    plays = conn.execute(PLAYS_SQL.format(where=where))
+    batch = []
+    total = 0
+    for _, game in groupby(plays, key=lambda p: p[0]):
+        batch.extend(game_sequence(game))
+        if len(batch) >= BATCH_ROWS:
+            cur.executemany(INSERT_SQL, batch)
+            total += len(batch)
+            batch = []
+    cur.executemany(INSERT_SQL, batch)
+    total += len(batch)
+
+    cur.execute("DROP TABLE IF EXISTS temp.sequence_games")
+    conn.commit()
+    print(f"Refreshed {total} rows in PlaySequence")
@@ -0,0 +1,424 @@
+"""
+Monte Carlo projections of conference standings and conference
+tournaments, written to SimTeamOdds and SimRankOdds.
+
+Goals are Poisson: the home team scores exp(mu + home + attack[h] -
+defense[a]) on average, the away team exp(mu + attack[a] - defense[h]),
+fitted from the games played by the as-of date. A run plays every remaining
+conference game, ranks each conference (independents and conferences of
+fewer than MIN_CONFERENCE_TEAMS excluded) by points (3/1/0), goal difference,
+goals and a coin toss, then plays a single-elimination tournament between
+the top TOURNAMENT_TEAMS (higher seed at home, a level game decided 50/50).
+Runs go in batches of BATCH_RUNS, each batch one array of goals per game
+for every run at once, and the batches are spread over a process pool.
+
+    python simulate.py [season] [--as-of YYYY-MM-DD] [--runs N] [--workers N] [--seed N]
+
+Run from the repository root after csv_to_sql.py. Without --as-of every
+scored game counts as played; with it, later games are replayed.
+"""
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy import sparse
+
+DB_FILE = "D3WomensSoccer.db"
+DEFAULT_SEASON = 2025
+
+RUNS = 100_000
+BATCH_RUNS = 5_000
+WORKERS = os.cpu_count() or 1
+TOURNAMENT_TEAMS = 8
+# smaller conferences get no standings or tournament (their teams no rows)
+MIN_CONFERENCE_TEAMS = 4
+# goal counts past this tail probability are folded into the last one
+MAX_TAIL = 1e-6
+
+# standings key = POINTS_KEY * points + GOAL_DIFF_KEY * (goal difference +
+# GOAL_DIFF_OFFSET) + goals, exact in float64 while goals < GOAL_DIFF_KEY
+POINTS_KEY = 10.0 ** 7
+GOAL_DIFF_KEY = 10.0 ** 3
+GOAL_DIFF_OFFSET = 5000
+
+FIT_ITERATIONS = 200
+# pseudo-goals scored and allowed against an average opponent, at the
+# average rate, added to every team's totals: pulls teams with few games
+# (and blowout-inflated ratings) toward average
+PRIOR_GOALS = 3.0
+
+GAMES_SQL = """
+SELECT g.home_team_id, g.away_team_id, g.home_score, g.away_score, g.game_date
+FROM Game g
+WHERE g.season = ?
+  AND g.home_team_id IS NOT NULL AND g.away_team_id IS NOT NULL
+"""
+
+# independents (IND, DIII Independent, ...) share a conference id but have no
+# standings or tournament, so they count as unaffiliated
+TEAMS_SQL = """
+SELECT u.university_id,
+       CASE WHEN c.seo LIKE '%independent%' THEN NULL ELSE u.conference_id END
+FROM University u
+LEFT JOIN Conference c ON c.conference_id = u.conference_id
+ORDER BY u.university_id
+"""
+
+
+def fit_rates(home, away, home_goals, away_goals, n):
+    """
+    Poisson attack/defense ratings by alternating multiplicative updates.
+    Returns (mu, home advantage, attack[n], defense[n]).
+    """
+    mu = np.log(max((home_goals.sum() + away_goals.sum()) / max(2 * len(home), 1), 1e-3))
+    home_edge = 0.0
+    attack = np.zeros(n)
+    defense = np.zeros(n)
+
+    def rates():
+        return (np.exp(mu + home_edge + attack[home] - defense[away]),
+                np.exp(mu + attack[away] - defense[home]))
+
+    if not home_goals.sum() or not away_goals.sum():
+        # nothing (or no goals) played yet: every team average
+        return mu, home_edge, attack, defense
+
+    scored = np.bincount(home, home_goals, n) + np.bincount(away, away_goals, n)
+    allowed = np.bincount(away, home_goals, n) + np.bincount(home, away_goals, n)
+    for _ in range(FIT_ITERATIONS):
+        lam_home, lam_away = rates()
+        expected = np.bincount(home, lam_home, n) + np.bincount(away, lam_away, n)
+        # expected / exp(attack): goals expected from an average attack
+        attack = np.log((scored + PRIOR_GOALS) / (expected * np.exp(-attack) + PRIOR_GOALS))
+
+        lam_home, lam_away = rates()
+        expected = np.bincount(away, lam_home, n) + np.bincount(home, lam_away, n)
+        defense = -np.log((allowed + PRIOR_GOALS) / (expected * np.exp(defense) + PRIOR_GOALS))
+
+        attack -= attack.mean()
+        defense -= defense.mean()
+        lam_home, lam_away = rates()
+        mu += np.log((home_goals.sum() + away_goals.sum()) / (lam_home.sum() + lam_away.sum()))
+        lam_home, _ = rates()
+        home_edge += np.log(home_goals.sum() / lam_home.sum())
+    return mu, home_edge, attack, defense
+
+
+def load_model(conn, season, as_of=None):
+    """
+    Everything a worker needs, as plain arrays: team ids and conferences,
+    fitted rates, the points/goals already banked in conference play and
+    the remaining conference games.
+    """
+    teams, conferences = map(np.array, zip(*conn.execute(TEAMS_SQL).fetchall()))
+    teams = teams.astype(np.int64)
+    conferences = np.array([-1 if c is None else c for c in conferences], dtype=np.int64)
+    n = len(teams)
+    ids, sizes = np.unique(conferences[conferences >= 0], return_counts=True)
+    conferences[np.isin(conferences, ids[sizes < MIN_CONFERENCE_TEAMS])] = -1
+
+    rows = conn.execute(GAMES_SQL, (season,)).fetchall()
+    home_ids = np.array([r[0] for r in rows], dtype=np.int64)
+    away_ids = np.array([r[1] for r in rows], dtype=np.int64)
+    home = np.searchsorted(teams, home_ids).clip(0, max(n - 1, 0))
+    away = np.searchsorted(teams, away_ids).clip(0, max(n - 1, 0))
+    known = (teams[home] == home_ids) & (teams[away] == away_ids) if n else np.zeros(0, dtype=bool)
+    played = np.array([
+        r[2] is not None and r[3] is not None and (as_of is None or (r[4] or "") <= as_of)
+        for r in rows
+    ], dtype=bool) & known
+    home_goals = np.array([r[2] or 0 for r in rows], dtype=np.int64)
+    away_goals = np.array([r[3] or 0 for r in rows], dtype=np.int64)
+    conference_game = known & (conferences[home] == conferences[away]) & (conferences[home] >= 0)
+
+    mu, home_edge, attack, defense = fit_rates(
+        home[played], away[played], home_goals[played], away_goals[played], n)
+
+    banked = played & conference_game
+    hg, ag = home_goals[banked], away_goals[banked]
+    h, a = home[banked], away[banked]
+    points = (np.bincount(h, 3 * (hg > ag) + (hg == ag), n)
+              + np.bincount(a, 3 * (ag > hg) + (hg == ag), n))
+    goal_diff = np.bincount(h, hg - ag, n) + np.bincount(a, ag - hg, n)
+    goals = np.bincount(h, hg, n) + np.bincount(a, ag, n)
+
+    remaining = ~played & conference_game
+    return {
+        "teams": teams,
+        "conferences": conferences,
+        "mu": mu,
+        "home_edge": home_edge,
+        "attack": attack,
+        "defense": defense,
+        "points": points.astype(np.int64),
+        "goal_diff": goal_diff.astype(np.int64),
+        "goals": goals.astype(np.int64),
+        "home": home[remaining],
+        "away": away[remaining],
+    }
+
+
+def bracket_order(k):
+    """
+    Seed (0 = top) in each bracket slot for k = 2^m teams; neighbouring
+    slots meet in the first round, e.g. 8 -> [0, 7, 3, 4, 1, 6, 2, 5].
+    """
+    order = [0]
+    while len(order) < k:
+        size = 2 * len(order)
+        order = [x for s in order for x in (s, size - 1 - s)]
+    return np.array(order)
+
+
+def tournament_size(teams):
+    k = 1
+    while k * 2 <= min(TOURNAMENT_TEAMS, teams):
+        k *= 2
+    return k
+
+
+def goal_cdf(lam):
+    """
+    P(goals <= k) for k = 0, 1, ..., K, one column per rate, with K the
+    first count past which every rate's tail is below MAX_TAIL.
+    """
+    pmf = np.exp(-lam)
+    cdf = [pmf]
+    k = 0
+    while (1 - cdf[-1]).max(initial=0) > MAX_TAIL:
+        k += 1
+        pmf = pmf * lam / k
+        cdf.append(cdf[-1] + pmf)
+    return np.array(cdf)
+
+
+def draw_goals(uniform, cdf):
+    """
+    Inverse-CDF Poisson draws, uniform (games, runs) against cdf (K + 1,
+    games): the number of cdf rows each uniform exceeds (capped at K), much
+    cheaper than Generator.poisson for small rates. Games are lined up by
+    how many rows their own tail needs, so row k is only compared for the
+    games that reach it.
+    """
+    needed = (cdf < 1 - MAX_TAIL).sum(axis=0)
+    order = np.argsort(needed, kind="stable")
+    needed = needed[order]
+    cdf = cdf[:, order].astype(uniform.dtype)
+    goals = np.zeros(uniform.shape, dtype=np.int8)
+    # uniforms are independent, so row i of `uniform` serves game order[i]
+    for k in range(needed[-1] if len(needed) else 0):
+        first = np.searchsorted(needed, k, side="right")
+        goals[first:] += uniform[first:] > cdf[k, first:, None]
+    return goals[np.argsort(order)]
+
+
+def host_win_probability(model):
+    """
+    (n, n): P(team i wins a knockout game at home to team j), a level
+    game counting half; filled in for teams in the same conference.
+    """
+    conferences = model["conferences"]
+    host, visitor = np.nonzero((conferences[:, None] == conferences[None, :]) & (conferences[:, None] >= 0))
+    attack, defense = model["attack"], model["defense"]
+    lam_host = np.exp(model["mu"] + model["home_edge"] + attack[host] - defense[visitor])
+    lam_visitor = np.exp(model["mu"] + attack[visitor] - defense[host])
+    cdf = goal_cdf(np.r_[lam_host, lam_visitor])
+    pmf = np.diff(cdf, axis=0, prepend=0)
+    host_pmf, visitor_pmf = np.split(pmf, 2, axis=1)
+    visitor_below = np.cumsum(visitor_pmf, axis=0) - visitor_pmf
+
+    n = len(conferences)
+    p = np.zeros((n, n))
+    p[host, visitor] = (host_pmf * (visitor_below + 0.5 * visitor_pmf)).sum(axis=0)
+    return p
+
+
+def play_bracket(seeded, win_probability, rng):
+    """
+    seeded: (runs, k) team positions by seed. Returns each run's champion.
+    """
+    order = bracket_order(seeded.shape[1])
+    slots = seeded[:, order]
+    seeds = np.broadcast_to(order, slots.shape)
+    while slots.shape[1] > 1:
+        top, bottom = slots[:, 0::2], slots[:, 1::2]
+        top_seed, bottom_seed = seeds[:, 0::2], seeds[:, 1::2]
+        top_hosts = top_seed < bottom_seed
+        host = np.where(top_hosts, top, bottom)
+        visitor = np.where(top_hosts, bottom, top)
+        host_wins = rng.random(host.shape) < win_probability[host, visitor]
+
+        slots = np.where(host_wins, host, visitor)
+        seeds = np.where(host_wins, np.minimum(top_seed, bottom_seed), np.maximum(top_seed, bottom_seed))
+    return slots[:, 0]
+
+
+def result_keys(max_goals):
+    """
+    Standings-key contribution of every possible score, indexed by
+    home_goals * (max_goals + 1) + away_goals, for home and away team.
+    A team's standings key is POINTS_KEY * points + GOAL_DIFF_KEY * goal
+    difference + goals, so one sort orders by all three.
+    """
+    home_goals, away_goals = np.divmod(np.arange((max_goals + 1) ** 2), max_goals + 1)
+    draw = home_goals == away_goals
+    home_points = 3 * (home_goals > away_goals) + draw
+    away_points = 3 * (away_goals > home_goals) + draw
+    margin = home_goals - away_goals
+    return (POINTS_KEY * home_points + GOAL_DIFF_KEY * margin + home_goals,
+            POINTS_KEY * away_points - GOAL_DIFF_KEY * margin + away_goals)
+
+
+def simulate_runs(model, runs, seed):
+    """
+    Play `runs` seasons; returns summed outcome counts per team.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(model["teams"])
+    games = len(model["home"])
+    lam_home = np.exp(model["mu"] + model["home_edge"]
+                      + model["attack"][model["home"]] - model["defense"][model["away"]])
+    lam_away = np.exp(model["mu"] + model["attack"][model["away"]] - model["defense"][model["home"]])
+    home_cdf, away_cdf = np.split(goal_cdf(np.r_[lam_home, lam_away]), 2, axis=1)
+    max_goals = len(home_cdf) - 1
+    home_key, away_key = result_keys(max_goals)
+    # (n, 2 * games): column g credits the home team, column games + g the away team
+    incidence = sparse.csr_matrix(
+        (np.ones(2 * games), (np.r_[model["home"], model["away"]], np.arange(2 * games))),
+        shape=(n, 2 * games))
+    # the goal-difference term is offset so the key stays positive
+    banked = (POINTS_KEY * model["points"] + GOAL_DIFF_KEY * (model["goal_diff"] + GOAL_DIFF_OFFSET)
+              + model["goals"])
+    win_probability = host_win_probability(model)
+
+    members = [np.flatnonzero(model["conferences"] == c)
+               for c in np.unique(model["conferences"][model["conferences"] >= 0])]
+    widest = max((len(m) for m in members), default=1)
+    counts = {
+        "points": np.zeros(n),
+        "ranks": np.zeros((n, widest), dtype=np.int64),
+        "first": np.zeros(n, dtype=np.int64),
+        "tournament": np.zeros(n, dtype=np.int64),
+        "champion": np.zeros(n, dtype=np.int64),
+    }
+
+    done = 0
+    while done < runs:
+        batch = min(BATCH_RUNS, runs - done)
+        # game-major (games, batch), so each game's runs are contiguous
+        home_goals = draw_goals(rng.random((games, batch), dtype=np.float32), home_cdf)
+        away_goals = draw_goals(rng.random((games, batch), dtype=np.float32), away_cdf)
+        score = home_goals.astype(np.int32) * (max_goals + 1) + away_goals
+
+        # per-game results -> per-team standings keys (batch, n)
+        results = np.empty((2 * games, batch))
+        np.take(home_key, score, out=results[:games])
+        np.take(away_key, score, out=results[games:])
+        key = (banked[:, None] + incidence @ results).T
+        counts["points"] += np.floor(key / POINTS_KEY).sum(axis=0)
+        # a coin toss below the last tiebreak
+        key += rng.random((batch, n))
+
+        for team_idx in members:
+            ranked = team_idx[np.argsort(-key[:, team_idx], axis=1)]
+            np.add.at(counts["ranks"], (ranked, np.arange(len(team_idx))), 1)
+            counts["first"] += np.bincount(ranked[:, 0], minlength=n)
+            k = tournament_size(len(team_idx))
+            counts["tournament"] += np.bincount(ranked[:, :k].ravel(), minlength=n)
+            champion = play_bracket(ranked[:, :k], win_probability, rng)
+            counts["champion"] += np.bincount(champion, minlength=n)
+        done += batch
+    return counts
+
+
+def simulate(model, runs=RUNS, workers=WORKERS, seed=None):
+    """
+    Split runs into one chunk per worker (independent random streams from
+    `seed`) and sum the counts.
+    """
+    chunks = [runs // workers + (i < runs % workers) for i in range(workers)]
+    chunks = [c for c in chunks if c]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    if len(chunks) == 1:
+        results = [simulate_runs(model, chunks[0], seeds[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+            results = list(pool.map(simulate_runs, [model] * len(chunks), chunks, seeds))
+    return {key: sum(r[key] for r in results) for key in results[0]}
+
+
+def write_odds(conn, season, as_of, model, counts, runs):
+    conn.execute("DELETE FROM SimTeamOdds WHERE season = ?", (season,))
+    conn.execute("DELETE FROM SimRankOdds WHERE season = ?", (season,))
+
+    ranks = counts["ranks"]
+    expected_rank = (ranks * np.arange(1, ranks.shape[1] + 1)).sum(axis=1) / runs
+    odds = []
+    rank_odds = []
+    for i in np.flatnonzero(model["conferences"] >= 0):
+        team = int(model["teams"][i])
+        odds.append((
+            season, team, int(model["conferences"][i]), as_of, runs,
+            float(counts["points"][i] / runs), float(expected_rank[i]),
+            float(counts["first"][i] / runs), float(counts["tournament"][i] / runs),
+            float(counts["champion"][i] / runs),
+        ))
+        for r in np.flatnonzero(ranks[i]):
+            rank_odds.append((season, team, int(r) + 1, float(ranks[i, r] / runs)))
+
+    conn.executemany(
+        "INSERT INTO SimTeamOdds (season, university_id, conference_id, as_of, runs, expected_points, "
+        "expected_rank, p_first, p_tournament, p_champion) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        odds,
+    )
+    conn.executemany(
+        "INSERT INTO SimRankOdds (season, university_id, rank, probability) VALUES (?, ?, ?, ?)",
+        rank_odds,
+    )
+    conn.commit()
+    return len(odds)
+
+
+def main(argv):
+    season = DEFAULT_SEASON
+    as_of = None
+    runs = RUNS
+    workers = WORKERS
+    seed = None
+
+    args = list(argv)
+    while args:
+        arg = args.pop(0)
+        if arg == "--as-of":
+            as_of = args.pop(0)
+        elif arg == "--runs":
+            runs = int(args.pop(0))
+        elif arg == "--workers":
+            workers = int(args.pop(0))
+        elif arg == "--seed":
+            seed = int(args.pop(0))
+        elif arg.isdigit():
+            season = int(arg)
+        else:
+            print(f"Unknown argument {arg}")
+            return 2
+
+    conn = sqlite3.connect(DB_FILE)
+    start = time.perf_counter()
+    model = load_model(conn, season, as_of)
+    print(f"Fitted {len(model['teams'])} teams; {len(model['home'])} conference games to play "
+          f"(home edge x{np.exp(model['home_edge']):.2f})")
+
+    counts = simulate(model, runs, max(workers, 1), seed)
+    count = write_odds(conn, season, as_of, model, counts, runs)
+    conn.close()
+    print(f"Simulated {runs} runs of {season} in {time.perf_counter() - start:.1f}s; "
+          f"{count} SimTeamOdds rows")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
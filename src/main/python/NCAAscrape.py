@@ -1,7 +1,17 @@
 import requests
+import sys
 import time
 import json
 from datetime import datetime
+import games
+import gamestats
+import players
+import plays
+import rankings
+import university
+from functools import partial
+from pipeline import Stage, run_pipeline
+from seasons import DEFAULT_SEASON, season_path
 from university import populate_university_conf
 from rankings import populate_rankings
 from games import populate_games, write_game_ids
@@ -38,26 +48,67 @@ def ncaa_get(path, params=None, headers=None, timeout=30):
     return r.json()
 
 
-def main():
-    # UNIVERSITY + CONFERENCE
-    populate_university_conf()
+def build_stages(seasons=(DEFAULT_SEASON,)):
+    """
+    One DAG for every requested season; per-season stages read and write
+    their own partition, so seasons crawl concurrently (the shared API
+    throttle still bounds the request rate).
+    """
+    # Inputs/outputs mirror the files each populate_* reads and writes;
+    # the pipeline derives stage order from them.
+    stages = [
+        # UNIVERSITY + CONFERENCE (shared by all seasons)
+        Stage("university", partial(populate_university_conf, seasons),
+              outputs=[university.UNIVERSITY_CSV, university.CONFERENCE_CSV]),
 
-    # RANKINGS
-    populate_rankings()
+        # RANKINGS (different site; current season only). Poll names are
+        # resolved against University.csv, but the poll itself changes weekly.
+        Stage(f"rankings:{max(seasons)}", partial(populate_rankings, max(seasons)),
+              inputs=[rankings.UNIVERSITY_CSV],
+              outputs=[season_path(max(seasons), rankings.RANKINGS_CSV),
+                       rankings.NAME_MATCH_CACHE],
+              skip_unchanged=False),
+    ]
 
-    # GAMES
-    populate_games()
+    for season in seasons:
+        def part(filename):
+            return season_path(season, filename)
 
-    # GAMESTATS 
-    populate_game_stats()
-    
-    # PLAYERS
-    populate_players_from_gamestats()
+        stages += [
+            # GAME IDS
+            Stage(f"game_ids:{season}", partial(write_game_ids, season),
+                  outputs=[part(games.GAME_IDS_FILE)]),
 
-    # PLAY-BY-PLAY
-    populate_plays()
+            # GAMES
+            Stage(f"games:{season}", partial(populate_games, season),
+                  inputs=[part(games.GAME_IDS_FILE)],
+                  outputs=[part(games.GAME_CSV_FILE)]),
+
+            # GAMESTATS
+            Stage(f"gamestats:{season}", partial(populate_game_stats, season),
+                  inputs=[part(gamestats.GAME_IDS_FILE)],
+                  outputs=[part(gamestats.GAMESTATS_CSV)]),
+
+            # PLAYERS
+            Stage(f"players:{season}", partial(populate_players_from_gamestats, season),
+                  inputs=[part(players.GAMESTATS_CSV)],
+                  outputs=[part(players.PLAYERS_CSV)]),
+
+            # PLAY-BY-PLAY
+            Stage(f"plays:{season}", partial(populate_plays, season),
+                  inputs=[part(plays.PLAYER_CSV_FILE), part(plays.GAME_IDS_FILE)],
+                  outputs=[part(plays.PLAY_CSV_FILE)]),
+        ]
+
+    return stages
+
+
+def main(seasons=(DEFAULT_SEASON,), force=False):
+    run_pipeline(build_stages(seasons), force=force)
 
 
 
 if __name__ == "__main__":
-    main()
+    # python NCAAscrape.py [season ...] [--force]
+    seasons = [int(a) for a in sys.argv[1:] if a.isdigit()] or [DEFAULT_SEASON]
+    main(seasons, force="--force" in sys.argv)
@@ -1,14 +1,31 @@
+import threading
 import time
 import requests
+from pipeline import count_request
 
 BASE_URL = "https://ncaa-api.henrygd.me"
 RATE_LIMIT_DELAY = 0.25  # 4 req/sec
 
+# Shared across threads so concurrent pipeline stages stay under the limit
+_rate_lock = threading.Lock()
+_next_request_at = 0.0
+
 class NCAAAPIError(Exception):
     pass
 
+def _throttle():
+    global _next_request_at
+    with _rate_lock:
+        now = time.monotonic()
+        delay = _next_request_at - now
+        _next_request_at = max(now, _next_request_at) + RATE_LIMIT_DELAY
+    if delay > 0:
+        time.sleep(delay)
+
 def ncaa_get(endpoint, params=None):
     url = f"{BASE_URL}{endpoint}"
+    _throttle()
+    count_request()
     response = requests.get(url, params=params, timeout=10)
 
     if response.status_code != 200:
@@ -16,5 +33,4 @@ def ncaa_get(endpoint, params=None):
             f"Error {response.status_code} for {url}: {response.text}"
         )
 
-    time.sleep(RATE_LIMIT_DELAY)
     return response.json()
@@ -1,70 +1,194 @@
-from flask import Flask, render_template, request
+from datetime import date
+from flask import Flask, Response, jsonify, render_template, request, stream_with_context
+import base64
+import json
+import os
+import re
 import sqlite3
+import time
+
+import console
+import export
+import profiling
+import results_graph
+import season_stats
+from cache import ResultCache
+from db import db_version, get_db, reset_steps, set_deadline, vm_steps
 
 app = Flask(__name__)
 
-def get_db():
-    return sqlite3.connect("D3WomensSoccer.db")
+# Canned query results, reused until the database is rebuilt
+RESULT_CACHE = ResultCache()
+
+# Seconds a request's queries may run before they are interrupted (503);
+# bulk exports and NDJSON streams are exempt
+REQUEST_TIMEOUT = float(os.environ.get("D3_REQUEST_TIMEOUT", "10"))
+
+@app.before_request
+def start_deadline():
+    set_deadline(REQUEST_TIMEOUT)
+
+@app.errorhandler(sqlite3.OperationalError)
+def query_interrupted(e):
+    if "interrupted" not in str(e):
+        raise e
+    return jsonify({"error": f"query exceeded the {REQUEST_TIMEOUT:g}s request timeout"}), 503
+
+def get_seasons(db):
+    cur = db.execute("SELECT DISTINCT season FROM Game ORDER BY season DESC")
+    return [r[0] for r in cur.fetchall()]
+
+def cached_query(db, version, name, sql, params):
+    """
+    (headers, rows) for sql, from RESULT_CACHE when this database version
+    has already run it with these params.
+    """
+    key = (version, name, tuple(sorted(params.items())))
+    result = RESULT_CACHE.get(key)
+    if result is None:
+        reset_steps()
+        start = time.perf_counter()
+        cur = db.execute(sql, params)
+        rows = cur.fetchall()
+        ms = (time.perf_counter() - start) * 1000
+        profiling.record(db, name, sql, params, ms, len(rows), vm_steps())
+        result = ([d[0] for d in cur.description], rows)
+        RESULT_CACHE.put(key, result)
+    return result
+
+def param_choices(db, version, spec):
+    if "choices_sql" not in spec:
+        return None
+    _, rows = cached_query(db, version, spec["choices_sql"], spec["choices_sql"], {})
+    return [r[0] for r in rows]
+
+def default_params(query):
+    return {name: spec["default"] for name, spec in query.get("params", {}).items()}
+
+def parse_params(db, version, query, values):
+    """
+    Typed, validated values for query's params from request values; blank
+    fields take the default. Returns (params, errors).
+    """
+    params = {}
+    errors = []
+    for name, spec in query.get("params", {}).items():
+        raw = values.get(name, "").strip()
+        if raw == "":
+            params[name] = spec["default"]
+            continue
+        try:
+            value = PARAM_TYPES[spec["type"]](raw)
+        except ValueError:
+            errors.append(f"{spec['label']}: {raw!r} is not a valid {spec['type']}")
+            continue
+        if "min" in spec and value < spec["min"]:
+            errors.append(f"{spec['label']}: must be at least {spec['min']}")
+        elif "max" in spec and value > spec["max"]:
+            errors.append(f"{spec['label']}: must be at most {spec['max']}")
+        elif "choices_sql" in spec and value not in param_choices(db, version, spec):
+            errors.append(f"{spec['label']}: unknown value {raw!r}")
+        else:
+            params[name] = value
+    return params, errors
 
 @app.route("/", methods=["GET", "POST"])
 def query_runner():
-    selected = request.form.get("query")
+    # form posts and URL parameters (?query=...&season=...&conference=...)
+    values = request.values
+    selected = values.get("query")
     rows = []
     headers = []
+    errors = []
+
+    db = get_db()
+    version = db_version()
+    seasons = get_seasons(db)
+    # Every query is scoped to one season (indexed season column); default to the latest
+    season = values.get("season", type=int)
+    if season not in seasons:
+        season = seasons[0] if seasons else None
 
+    params = {}
     if selected in QUERIES:
-        db = get_db()
-        cur = db.cursor()
-        cur.execute(QUERIES[selected]["sql"])
-        rows = cur.fetchall()
-        headers = [d[0] for d in cur.description]
-        db.close()
+        params, errors = parse_params(db, version, QUERIES[selected], values)
+        if not errors:
+            headers, rows = cached_query(
+                db, version, selected, QUERIES[selected]["sql"], {"season": season, **params}
+            )
+
+    # Form fields for every query's params; the page shows the selected one's
+    fields = {}
+    for key, q in QUERIES.items():
+        fields[key] = [
+            {
+                "name": name,
+                "label": spec["label"],
+                "type": spec["type"],
+                "value": params.get(name, spec["default"]) if key == selected else spec["default"],
+                "choices": param_choices(db, version, spec),
+                "min": spec.get("min"),
+                "max": spec.get("max"),
+            }
+            for name, spec in q.get("params", {}).items()
+        ]
 
     return render_template(
         "queries.html",
         queries=QUERIES,
         selected=selected,
+        seasons=seasons,
+        season=season,
+        fields=fields,
+        errors=errors,
         rows=rows,
         headers=headers
     )
 
-QUERIES = { # same as in queries.sql
-    "goals_per_minute_2025": {
-        "label": "Which player scored the most goals per minute (2025 season)?",
+# Query parameters: each entry in a query's "params" is a typed form field
+# (and URL parameter) bound by name, with a default and optional min/max
+# or a choices_sql listing the allowed values.
+PARAM_TYPES = {
+    "int": int,
+    "float": float,
+    "str": str,
+    "date": lambda v: date.fromisoformat(v).isoformat(),
+}
+
+CONFERENCE_CHOICES = "SELECT conference_name FROM Conference ORDER BY conference_name"
+EVENT_CHOICES = "SELECT DISTINCT event_type FROM PlaySequence WHERE event_type IS NOT NULL ORDER BY event_type"
+
+# "order_by" lists a query's ORDER BY as output columns, ending in a unique
+# column; the JSON API pages through results by seeking past the last row.
+QUERIES = { # same as in queries.sql; :season is bound from the season dropdown
+    "goals_per_minute": {
+        "label": "Which player scored the most goals per minute?",
+        "order_by": [("goals_per_minute", "DESC"), ("player_id", "ASC")],
         "sql": """
 SELECT
-  player_id,
-  first_name,
-  last_name,
-  total_goals,
-  total_minutes,
-  1.0 * total_goals / NULLIF(total_minutes, 0) AS goals_per_minute
-FROM (
-  SELECT
-    gs.player_id,
-    p.first_name,
-    p.last_name,
-    SUM(gs.goals)   AS total_goals,
-    SUM(gs.minutes) AS total_minutes
-  FROM GameStats gs
-  JOIN Game g
-    ON g.game_id = gs.game_id
-  JOIN Player p
-    ON gs.player_id = p.player_id
-  GROUP BY
-    gs.player_id,
-    p.first_name,
-    p.last_name
-)
-WHERE total_minutes > 0
-ORDER BY goals_per_minute DESC
-LIMIT 1;
+  pss.player_id,
+  p.first_name,
+  p.last_name,
+  pss.total_goals,
+  pss.total_minutes,
+  pss.goals_per_minute
+FROM PlayerSeasonStats pss
+JOIN Player p
+  ON p.player_id = pss.player_id
+WHERE pss.season = :season
+  AND pss.goals_per_minute IS NOT NULL
+ORDER BY pss.goals_per_minute DESC
+LIMIT :limit;
 
-"""
+""",
+        "params": {
+            "limit": {"label": "Players", "type": "int", "default": 1, "min": 1, "max": 100},
+        },
     },
 
-    "nescac_minutes_300_500": {
-        "label": "Players from NESCAC universities with 300–500 total minutes",
+    "conference_minutes_range": {
+        "label": "Players from a conference with total minutes in a range",
+        "order_by": [("total_minutes", "DESC"), ("player_id", "ASC")],
         "sql": """
 SELECT
   p.player_id,
@@ -72,20 +196,28 @@ SELECT
   p.last_name,
   p.position,
   u.name AS university_name,
-  SUM(gs.minutes) AS total_minutes
+  pss.total_minutes
 FROM Player p
 JOIN University u ON u.university_id = p.university_id
 JOIN Conference c ON c.conference_id = u.conference_id
-JOIN GameStats gs ON gs.player_id = p.player_id
-GROUP BY p.player_id
-HAVING c.conference_name = 'NESCAC'
-   AND total_minutes BETWEEN 300 AND 500
-ORDER BY total_minutes DESC;
-"""
+JOIN PlayerSeasonStats pss
+  ON pss.player_id = p.player_id
+ AND pss.season = :season
+WHERE c.conference_name = :conference
+  AND pss.total_minutes BETWEEN :min_minutes AND :max_minutes
+ORDER BY pss.total_minutes DESC;
+""",
+        "params": {
+            "conference": {"label": "Conference", "type": "str", "default": "NESCAC",
+                           "choices_sql": CONFERENCE_CHOICES},
+            "min_minutes": {"label": "Min minutes", "type": "int", "default": 300, "min": 0},
+            "max_minutes": {"label": "Max minutes", "type": "int", "default": 500, "min": 0},
+        },
     },
 
     "late_goals_multiple": {
-        "label": "Players who scored more than once with <10 minutes remaining",
+        "label": "Players with several goals late in games",
+        "order_by": [("late_goals", "DESC"), ("player_id", "ASC")],
         "sql": """
 SELECT
   p.player_id,
@@ -95,118 +227,83 @@ SELECT
 FROM Play pl
 JOIN Player p ON p.player_id = pl.player_id
 JOIN Game g ON g.game_id = pl.game_id
-WHERE pl.event_type = 'GOAL'
-  AND CAST(substr(pl.time_of_play, 1, 2) AS INTEGER) >= 80
+WHERE pl.season = :season
+  AND pl.event_type = 'GOAL'
+  AND CAST(substr(pl.time_of_play, 1, 2) AS INTEGER) >= :from_minute
 GROUP BY p.player_id
-HAVING late_goals > 1
+HAVING late_goals >= :min_goals
 ORDER BY late_goals DESC;
-"""
+""",
+        "params": {
+            "from_minute": {"label": "From minute", "type": "int", "default": 80, "min": 0, "max": 120},
+            "min_goals": {"label": "Min goals", "type": "int", "default": 2, "min": 1},
+        },
     },
 
-    "uaa_vs_nescac_shutouts": {
-        "label": "UAA vs NESCAC: total shutouts against non-conference opponents",
+    "nonconf_shutouts": {
+        "label": "Two conferences: total shutouts against non-conference opponents",
+        "order_by": [("total_shutouts_vs_nonconf", "DESC"), ("conf", "ASC")],
         "sql": """
-WITH games_with_confs AS (
-  SELECT
-    g.game_id,
-    g.home_team_id,
-    g.away_team_id,
-    g.home_score,
-    g.away_score,
-    ch.conference_name AS home_conf,
-    ca.conference_name AS away_conf
-  FROM Game g
-  JOIN University uh ON uh.university_id = g.home_team_id
-  JOIN University ua ON ua.university_id = g.away_team_id
-  LEFT JOIN Conference ch ON ch.conference_id = uh.conference_id
-  LEFT JOIN Conference ca ON ca.conference_id = ua.conference_id
-),
-shutouts AS (
-  SELECT
-    home_conf AS conf,
-    CASE WHEN away_score = 0 AND home_conf != away_conf THEN 1 ELSE 0 END AS shutout_nonconf
-  FROM games_with_confs
-  UNION ALL
-  SELECT
-    away_conf AS conf,
-    CASE WHEN home_score = 0 AND home_conf != away_conf THEN 1 ELSE 0 END AS shutout_nonconf
-  FROM games_with_confs
-)
-SELECT conf, SUM(shutout_nonconf) AS total_shutouts_vs_nonconf
-FROM shutouts
-WHERE conf IN ('UAA', 'NESCAC')
-GROUP BY conf
+SELECT
+  c.conference_name AS conf,
+  cr.nonconf_shutouts AS total_shutouts_vs_nonconf
+FROM ConferenceRollup cr
+JOIN Conference c ON c.conference_id = cr.conference_id
+WHERE cr.season = :season
+  AND cr.week = 0
+  AND c.conference_name IN (:conference_a, :conference_b)
 ORDER BY total_shutouts_vs_nonconf DESC;
-"""
+""",
+        "params": {
+            "conference_a": {"label": "Conference", "type": "str", "default": "UAA",
+                             "choices_sql": CONFERENCE_CHOICES},
+            "conference_b": {"label": "vs conference", "type": "str", "default": "NESCAC",
+                             "choices_sql": CONFERENCE_CHOICES},
+        },
     },
 
     "away_more_than_home": {
         "label": "Teams with more away wins than home wins",
+        "order_by": [("away_wins", "DESC"), ("university_id", "ASC")],
         "sql": """
-WITH results AS (
-  SELECT
-    game_id,
-    home_team_id,
-    away_team_id,
-    home_score,
-    away_score,
-    CASE
-      WHEN home_score > away_score THEN home_team_id
-      WHEN away_score > home_score THEN away_team_id
-      ELSE NULL
-    END AS winner_id
-  FROM Game
-),
-home_wins AS (
-  SELECT home_team_id AS university_id, COUNT(*) AS home_wins
-  FROM results
-  WHERE winner_id = home_team_id
-  GROUP BY home_team_id
-),
-away_wins AS (
-  SELECT away_team_id AS university_id, COUNT(*) AS away_wins
-  FROM results
-  WHERE winner_id = away_team_id
-  GROUP BY away_team_id
-)
 SELECT
   u.university_id,
   u.name,
-  COALESCE(aw.away_wins, 0) AS away_wins,
-  COALESCE(hw.home_wins, 0) AS home_wins
-FROM University u
-LEFT JOIN home_wins hw ON hw.university_id = u.university_id
-LEFT JOIN away_wins aw ON aw.university_id = u.university_id
-WHERE COALESCE(aw.away_wins, 0) > COALESCE(hw.home_wins, 0)
+  SUM(tg.result = 'W' AND NOT tg.is_home) AS away_wins,
+  SUM(tg.result = 'W' AND tg.is_home)     AS home_wins
+FROM TeamGame tg
+JOIN University u ON u.university_id = tg.university_id
+WHERE tg.season = :season
+GROUP BY tg.university_id
+HAVING away_wins > home_wins
 ORDER BY away_wins DESC;
 """
     },
 
     "avg_goals_per_team": {
         "label": "Average goals per game by university",
+        "order_by": [("avg_goals_per_game", "DESC"), ("university_id", "ASC")],
         "sql": """
-WITH team_game_goals AS (
-  SELECT home_team_id AS university_id, home_score AS goals FROM Game
-  UNION ALL
-  SELECT away_team_id AS university_id, away_score AS goals FROM Game
-)
 SELECT
   u.university_id,
   u.name,
-  AVG(goals * 1.0) AS avg_goals_per_game
-FROM team_game_goals tgg
-JOIN University u ON u.university_id = tgg.university_id
-GROUP BY u.university_id
+  AVG(tg.goals_for * 1.0) AS avg_goals_per_game
+FROM TeamGame tg
+JOIN University u ON u.university_id = tg.university_id
+WHERE tg.season = :season
+GROUP BY tg.university_id
 ORDER BY avg_goals_per_game DESC;
 """
     },
     "game_winning_goals": {
         "label": "Games decided by a game-winning goal and who scored it",
+        "order_by": [("game_date", "ASC"), ("game_id", "ASC")],
         "sql": """
 WITH one_goal_games AS (
   SELECT *
   FROM Game
-  WHERE ABS(home_score - away_score) = 1
+  WHERE season = :season
+    AND ABS(home_score - away_score) = 1
 ),
 goal_events AS (
   SELECT
@@ -218,7 +315,8 @@ goal_events AS (
       ORDER BY pl.time_of_play DESC
     ) AS rn
   FROM Play pl
-  WHERE pl.event_type = 'GOAL'
+  WHERE pl.season = :season
+    AND pl.event_type = 'GOAL'
 )
 SELECT
   g.game_id,
@@ -234,8 +332,9 @@ ORDER BY g.game_date;
 """
     },
 
-    "most_corners_oct_12": {
-        "label": "Team with the most corners on October 12, 2025",
+    "most_corners_on_date": {
+        "label": "Teams with the most corners on a given date",
+        "order_by": [("corners", "DESC"), ("university_id", "ASC")],
         "sql": """
 SELECT
   u.university_id,
@@ -245,75 +344,69 @@ FROM Play pl
 JOIN Game g ON g.game_id = pl.game_id
 JOIN University u ON u.university_id IN (g.home_team_id, g.away_team_id)
 WHERE pl.event_type = 'CORNER'
-  AND g.game_date = '2025-10-12'
+  AND g.game_date = :game_date
 GROUP BY u.university_id
 ORDER BY corners DESC
-LIMIT 1;
-"""
+LIMIT :limit;
+""",
+        "params": {
+            "game_date": {"label": "Date", "type": "date", "default": "2025-10-12"},
+            "limit": {"label": "Teams", "type": "int", "default": 1, "min": 1, "max": 100},
+        },
     },
     "conference_total_goals": {
         "label": "Conference with the most total goals scored",
+        "order_by": [("total_goals", "DESC"), ("conference_name", "ASC")],
         "sql": """
-WITH team_goals AS (
-  SELECT home_team_id AS university_id, home_score AS goals FROM Game
-  UNION ALL
-  SELECT away_team_id AS university_id, away_score AS goals FROM Game
-)
 SELECT
   c.conference_name,
-  SUM(tg.goals) AS total_goals
-FROM team_goals tg
-JOIN University u ON u.university_id = tg.university_id
-JOIN Conference c ON c.conference_id = u.conference_id
-GROUP BY c.conference_name
+  cr.goals_for AS total_goals
+FROM ConferenceRollup cr
+JOIN Conference c ON c.conference_id = cr.conference_id
+WHERE cr.season = :season
+  AND cr.week = 0
 ORDER BY total_goals DESC;
+"""
+    },
+    "conference_records": {
+        "label": "Conference records in and out of conference play",
+        "order_by": [("nonconf_win_pct", "DESC"), ("conference_name", "ASC")],
+        "sql": """
+SELECT
+  c.conference_name,
+  cr.conf_wins || '-' || cr.conf_losses || '-' || cr.conf_ties AS in_conference,
+  cr.nonconf_wins || '-' || cr.nonconf_losses || '-' || cr.nonconf_ties AS non_conference,
+  ROUND((cr.nonconf_wins + 0.5 * cr.nonconf_ties) / NULLIF(cr.nonconf_games, 0), 3)
+    AS nonconf_win_pct,
+  cr.nonconf_goals_for - cr.nonconf_goals_against AS nonconf_goal_diff
+FROM ConferenceRollup cr
+JOIN Conference c ON c.conference_id = cr.conference_id
+WHERE cr.season = :season
+  AND cr.week = 0
+ORDER BY nonconf_win_pct DESC;
 """
     },
 
     "ranked_once": {
-        "label": "Teams ranked in the Top 25 at most once",
+        "label": "Teams ranked in the Top 25 in only a few weeks",
+        "order_by": [("team_name", "ASC")],
         "sql": """
-WITH ranked_names AS (
-  SELECT rank_week, rank_1  AS team_name FROM Rankings WHERE rank_1  IS NOT NULL UNION ALL
-  SELECT rank_week, rank_2  FROM Rankings WHERE rank_2  IS NOT NULL UNION ALL
-  SELECT rank_week, rank_3  FROM Rankings WHERE rank_3  IS NOT NULL UNION ALL
-  SELECT rank_week, rank_4  FROM Rankings WHERE rank_4  IS NOT NULL UNION ALL
-  SELECT rank_week, rank_5  FROM Rankings WHERE rank_5  IS NOT NULL UNION ALL
-  SELECT rank_week, rank_6  FROM Rankings WHERE rank_6  IS NOT NULL UNION ALL
-  SELECT rank_week, rank_7  FROM Rankings WHERE rank_7  IS NOT NULL UNION ALL
-  SELECT rank_week, rank_8  FROM Rankings WHERE rank_8  IS NOT NULL UNION ALL
-  SELECT rank_week, rank_9  FROM Rankings WHERE rank_9  IS NOT NULL UNION ALL
-  SELECT rank_week, rank_10 FROM Rankings WHERE rank_10 IS NOT NULL UNION ALL
-  SELECT rank_week, rank_11 FROM Rankings WHERE rank_11 IS NOT NULL UNION ALL
-  SELECT rank_week, rank_12 FROM Rankings WHERE rank_12 IS NOT NULL UNION ALL
-  SELECT rank_week, rank_13 FROM Rankings WHERE rank_13 IS NOT NULL UNION ALL
-  SELECT rank_week, rank_14 FROM Rankings WHERE rank_14 IS NOT NULL UNION ALL
-  SELECT rank_week, rank_15 FROM Rankings WHERE rank_15 IS NOT NULL UNION ALL
-  SELECT rank_week, rank_16 FROM Rankings WHERE rank_16 IS NOT NULL UNION ALL
-  SELECT rank_week, rank_17 FROM Rankings WHERE rank_17 IS NOT NULL UNION ALL
-  SELECT rank_week, rank_18 FROM Rankings WHERE rank_18 IS NOT NULL UNION ALL
-  SELECT rank_week, rank_19 FROM Rankings WHERE rank_19 IS NOT NULL UNION ALL
-  SELECT rank_week, rank_20 FROM Rankings WHERE rank_20 IS NOT NULL UNION ALL
-  SELECT rank_week, rank_21 FROM Rankings WHERE rank_21 IS NOT NULL UNION ALL
-  SELECT rank_week, rank_22 FROM Rankings WHERE rank_22 IS NOT NULL UNION ALL
-  SELECT rank_week, rank_23 FROM Rankings WHERE rank_23 IS NOT NULL UNION ALL
-  SELECT rank_week, rank_24 FROM Rankings WHERE rank_24 IS NOT NULL UNION ALL
-  SELECT rank_week, rank_25 FROM Rankings WHERE rank_25 IS NOT NULL
-),
-rank_counts AS (
-  SELECT team_name, COUNT(DISTINCT rank_week) AS weeks_ranked
-  FROM ranked_names
-  GROUP BY team_name
-)
-SELECT team_name
-FROM rank_counts
-WHERE weeks_ranked <= 1
+SELECT COALESCE(u.name, r.team_name) AS team_name
+FROM Rankings r
+LEFT JOIN University u ON u.university_id = r.university_id
+WHERE r.season = :season
+GROUP BY COALESCE(r.university_id, r.team_name)
+HAVING COUNT(DISTINCT r.rank_week) <= :max_weeks
 ORDER BY team_name;
-"""
+""",
+        "params": {
+            "max_weeks": {"label": "Max weeks ranked", "type": "int", "default": 1, "min": 1},
+        },
     },
 
     "latest_goal_each_game": {
         "label": "Player who scored the latest goal in each game",
+        "order_by": [("game_id", "ASC")],
         "sql": """
 SELECT
   pl.game_id,
@@ -323,26 +416,722 @@ SELECT
   MAX(pl.time_of_play) AS latest_goal_time
 FROM Play pl
 JOIN Player p ON p.player_id = pl.player_id
-WHERE pl.event_type = 'GOAL'
-GROUP BY pl.game_id;
+WHERE pl.season = :season
+  AND pl.event_type = 'GOAL'
+GROUP BY pl.game_id
+ORDER BY pl.game_id;
 """
     }, 
     "most_minutes_played": {
     "label": "Players with the most total minutes played",
+    "order_by": [("total_minutes", "DESC"), ("player_id", "ASC")],
     "sql": """
 SELECT
-  gs.player_id,
+  pss.player_id,
   u.name AS university_name,
-  SUM(gs.minutes) AS total_minutes
-FROM GameStats gs
-JOIN Player p ON gs.player_id = p.player_id
+  pss.total_minutes
+FROM PlayerSeasonStats pss
+JOIN Player p ON pss.player_id = p.player_id
 JOIN University u ON u.university_id = p.university_id
-GROUP BY gs.player_id
-ORDER BY total_minutes DESC
-LIMIT 10;
-"""
-}, 
+WHERE pss.season = :season
+ORDER BY pss.total_minutes DESC
+LIMIT :limit;
+""",
+    "params": {
+        "limit": {"label": "Players", "type": "int", "default": 10, "min": 1, "max": 500},
+    },
+},
+    "team_ratings": {
+    "label": "Team ratings (Elo and goal-margin rating) as of a week",
+    "order_by": [("elo", "DESC"), ("university_id", "ASC")],
+    "sql": """
+SELECT
+  tr.university_id,
+  u.name AS university_name,
+  tr.week,
+  tr.games,
+  ROUND(tr.elo, 1) AS elo,
+  ROUND(tr.margin_rating, 2) AS margin_rating
+FROM TeamRating tr
+JOIN University u ON u.university_id = tr.university_id
+WHERE tr.season = :season
+  AND tr.week = (
+    SELECT MAX(week) FROM TeamRating
+    WHERE season = :season AND (:week = 0 OR week <= :week)
+  )
+ORDER BY tr.elo DESC, tr.university_id;
+""",
+    "params": {
+        "week": {"label": "As of week (0 = latest)", "type": "int", "default": 0, "min": 0, "max": 53},
+    },
+},
+    "team_rpi": {
+    "label": "RPI and strength of schedule as of a week",
+    "order_by": [("rpi", "DESC"), ("university_id", "ASC")],
+    "sql": """
+SELECT
+  r.rpi_rank,
+  r.university_id,
+  u.name AS university_name,
+  r.week,
+  r.wins,
+  r.losses,
+  r.ties,
+  ROUND(r.wp, 4) AS wp,
+  ROUND(r.owp, 4) AS owp,
+  ROUND(r.oowp, 4) AS oowp,
+  ROUND(r.sos, 4) AS sos,
+  ROUND(r.rpi, 4) AS rpi
+FROM TeamRPI r
+JOIN University u ON u.university_id = r.university_id
+WHERE r.season = :season
+  AND r.week = (
+    SELECT MAX(week) FROM TeamRPI
+    WHERE season = :season AND (:week = 0 OR week <= :week)
+  )
+ORDER BY r.rpi DESC, r.university_id;
+""",
+    "params": {
+        "week": {"label": "As of week (0 = latest)", "type": "int", "default": 0, "min": 0, "max": 53},
+    },
+},
+    "sim_odds": {
+    "label": "Simulated conference finish and tournament odds (run simulate.py first)",
+    "order_by": [("expected_rank", "ASC"), ("university_id", "ASC")],
+    "sql": """
+SELECT
+  u.name AS university_name,
+  s.university_id,
+  s.as_of,
+  s.runs,
+  ROUND(s.expected_points, 2) AS expected_points,
+  ROUND(s.expected_rank, 2) AS expected_rank,
+  ROUND(s.p_first, 4) AS p_first,
+  ROUND(s.p_tournament, 4) AS p_tournament,
+  ROUND(s.p_champion, 4) AS p_champion
+FROM SimTeamOdds s
+JOIN University u ON u.university_id = s.university_id
+JOIN Conference c ON c.conference_id = s.conference_id
+WHERE s.season = :season
+  AND c.conference_name = :conference
+ORDER BY ROUND(s.expected_rank, 2), s.university_id;
+""",
+    "params": {
+        "conference": {"label": "Conference", "type": "str", "default": "NESCAC",
+                       "choices_sql": CONFERENCE_CHOICES},
+    },
+},
+    "events_after": {
+    "label": "Teams' plays of one type soon after their own play of another (e.g. shots within 30 seconds of the team's own corner)",
+    "order_by": [("events_after", "DESC"), ("university_id", "ASC")],
+    "sql": """
+WITH ordered AS (
+  SELECT
+    ps.team_id,
+    ps.event_type,
+    ps.elapsed_seconds,
+    MAX(CASE WHEN ps.event_type = :after_event THEN ps.elapsed_seconds END) OVER (
+      PARTITION BY ps.game_id, ps.team_id ORDER BY ps.seq
+      ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+    ) AS last_after
+  FROM PlaySequence ps
+  WHERE ps.season = :season
+    AND ps.event_type IN (:event, :after_event)
+    AND ps.team_id IS NOT NULL
+)
+SELECT
+  o.team_id AS university_id,
+  u.name AS university_name,
+  COUNT(*) AS events,
+  SUM(o.elapsed_seconds - o.last_after <= :within) AS events_after,
+  ROUND(100.0 * SUM(o.elapsed_seconds - o.last_after <= :within) / COUNT(*), 1) AS pct_after
+FROM ordered o
+JOIN University u ON u.university_id = o.team_id
+WHERE o.event_type = :event
+GROUP BY o.team_id
+ORDER BY events_after DESC, o.team_id
+LIMIT :limit;
+""",
+    "params": {
+        "event": {"label": "Play", "type": "str", "default": "SHOT",
+                  "choices_sql": EVENT_CHOICES},
+        "after_event": {"label": "After", "type": "str", "default": "CORNER",
+                        "choices_sql": EVENT_CHOICES},
+        "within": {"label": "Within seconds", "type": "int", "default": 30, "min": 0, "max": 600},
+        "limit": {"label": "Teams", "type": "int", "default": 25, "min": 1, "max": 500},
+    },
+},
+    "player_form": {
+    "label": "Players in form: goals in their last 5 games (and last 30 days), minutes trend",
+    "order_by": [("goals_last_5", "DESC"), ("player_id", "ASC")],
+    "sql": """
+SELECT
+  f.player_id,
+  p.first_name,
+  p.last_name,
+  u.name AS university_name,
+  f.game_date AS last_game,
+  f.goals_last_games AS goals_last_5,
+  f.assists_last_games AS assists_last_5,
+  f.shots_last_games AS shots_last_5,
+  f.goals_last_days AS goals_last_30_days,
+  f.minutes_last_games AS minutes_last_5,
+  ROUND(1.0 * f.minutes_last_games / f.games_last_games
+        - 1.0 * f.minutes_season / f.games_season, 1) AS minutes_trend
+FROM PlayerForm f
+JOIN Player p ON p.player_id = f.player_id
+LEFT JOIN University u ON u.university_id = p.university_id
+WHERE f.season = :season
+  AND f.latest = 1
+ORDER BY f.goals_last_games DESC, f.player_id
+LIMIT :limit;
+""",
+    "params": {
+        "limit": {"label": "Players", "type": "int", "default": 25, "min": 1, "max": 500},
+    },
+},
+    "team_form": {
+    "label": "Teams in form: points in their last 5 games (and last 30 days)",
+    "order_by": [("points_last_5", "DESC"), ("university_id", "ASC")],
+    "sql": """
+SELECT
+  f.university_id,
+  u.name AS university_name,
+  f.game_date AS last_game,
+  f.points_last_games AS points_last_5,
+  f.goals_for_last_games AS goals_for_last_5,
+  f.goals_against_last_games AS goals_against_last_5,
+  f.points_last_days AS points_last_30_days,
+  f.games_last_days AS games_last_30_days,
+  f.points_season
+FROM TeamForm f
+JOIN University u ON u.university_id = f.university_id
+WHERE f.season = :season
+  AND f.latest = 1
+ORDER BY f.points_last_games DESC, f.university_id
+LIMIT :limit;
+""",
+    "params": {
+        "limit": {"label": "Teams", "type": "int", "default": 25, "min": 1, "max": 500},
+    },
+},
 }
 
+# Play search (PlaySearch FTS5 index over Play.description)
+
+SEARCH_PAGE_SIZE = 25
+SEARCH_TERM = re.compile(r'"[^"]*"|[^\s"]+')
+
+SEARCH_SQL = """
+SELECT
+  pl.play_id,
+  pl.game_id,
+  g.game_date,
+  pl.event_type,
+  pl.time_of_play,
+  pl.description
+FROM PlaySearch
+JOIN Play pl ON pl.play_id = PlaySearch.rowid
+JOIN Game g ON g.game_id = pl.game_id
+WHERE PlaySearch MATCH :match
+  AND (:season IS NULL OR pl.season = :season)
+  AND (:game_id IS NULL OR pl.game_id = :game_id)
+  AND (:event_type IS NULL OR pl.event_type = :event_type)
+  AND (:team_id IS NULL OR pl.game_id IN (
+        SELECT game_id FROM TeamGame WHERE university_id = :team_id))
+ORDER BY PlaySearch.rank
+LIMIT :limit OFFSET :offset;
+"""
+
+def fts_query(text):
+    """
+    Turn free text into an FTS5 query: every word (or "quoted phrase") must
+    appear. Terms are quoted so punctuation in names can't break the syntax.
+    """
+    terms = []
+    for term in SEARCH_TERM.findall(text or ""):
+        term = term.strip('"').strip()
+        if term:
+            terms.append('"' + term.replace('"', '""') + '"')
+    return " ".join(terms)
+
+@app.route("/search")
+def play_search():
+    q = request.args.get("q", "").strip()
+    season = request.args.get("season", type=int)
+    game_id = request.args.get("game_id", type=int)
+    team_id = request.args.get("team_id", type=int)
+    event_type = request.args.get("event_type") or None
+    page = max(request.args.get("page", 1, type=int), 1)
+
+    db = get_db()
+    seasons = get_seasons(db)
+    teams = db.execute(
+        "SELECT university_id, name FROM University ORDER BY name"
+    ).fetchall()
+    event_types = [r[0] for r in db.execute(
+        "SELECT DISTINCT event_type FROM Play WHERE event_type IS NOT NULL ORDER BY event_type"
+    )]
+
+    rows = []
+    headers = []
+    has_next = False
+    match = fts_query(q)
+    if match:
+        cur = db.execute(SEARCH_SQL, {
+            "match": match,
+            "season": season,
+            "game_id": game_id,
+            "event_type": event_type,
+            "team_id": team_id,
+            # one extra row tells us whether there is a next page
+            "limit": SEARCH_PAGE_SIZE + 1,
+            "offset": (page - 1) * SEARCH_PAGE_SIZE,
+        })
+        rows = cur.fetchall()
+        headers = [d[0] for d in cur.description]
+        has_next = len(rows) > SEARCH_PAGE_SIZE
+        rows = rows[:SEARCH_PAGE_SIZE]
+
+    return render_template(
+        "search.html",
+        q=q,
+        season=season,
+        game_id=game_id,
+        team_id=team_id,
+        event_type=event_type,
+        seasons=seasons,
+        teams=teams,
+        event_types=event_types,
+        rows=rows,
+        headers=headers,
+        page=page,
+        has_next=has_next,
+    )
+
+# Player leaderboards (NumPy season stats, see season_stats.py)
+
+LEADERBOARD_SIZE = 25
+
+def leaderboard_args(values, seasons):
+    season = values.get("season", type=int)
+    if season not in seasons:
+        season = seasons[0] if seasons else None
+    split = values.get("split", "all")
+    limit = min(max(values.get("limit", LEADERBOARD_SIZE, type=int), 1), 500)
+    min_minutes = max(values.get("min_minutes", season_stats.MIN_MINUTES, type=int), 0)
+    ascending = values.get("order") == "asc"
+    return season, split, limit, min_minutes, ascending
+
+@app.route("/leaderboards")
+def leaderboards():
+    db = get_db()
+    seasons = get_seasons(db)
+    season, split, limit, min_minutes, ascending = leaderboard_args(request.args, seasons)
+    stats = season_stats.season_stats(db, db_version(), season)
+    stat = request.args.get("stat", "goals_per90")
+
+    board, error = [], None
+    try:
+        board = stats.leaderboard(stat, split, limit, ascending, min_minutes)
+    except KeyError as e:
+        error = str(e)
+
+    return render_template(
+        "leaderboards.html",
+        seasons=seasons,
+        season=season,
+        stats=stats.stat_names(),
+        stat=stat,
+        splits=season_stats.SPLITS,
+        split=split,
+        limit=limit,
+        min_minutes=min_minutes,
+        order="asc" if ascending else "desc",
+        board=board,
+        error=error,
+    )
+
+@app.route("/api/leaderboards")
+def api_leaderboards():
+    db = get_db()
+    seasons = get_seasons(db)
+    season = leaderboard_args(request.args, seasons)[0]
+    stats = season_stats.season_stats(db, db_version(), season)
+    return jsonify({"season": season, "stats": stats.stat_names(), "splits": season_stats.SPLITS})
+
+@app.route("/api/leaderboards/<stat>")
+def api_leaderboard(stat):
+    db = get_db()
+    seasons = get_seasons(db)
+    season, split, limit, min_minutes, ascending = leaderboard_args(request.args, seasons)
+    stats = season_stats.season_stats(db, db_version(), season)
+    try:
+        board = stats.leaderboard(stat, split, limit, ascending, min_minutes)
+    except KeyError as e:
+        return jsonify({"error": str(e)}), 404
+    return jsonify({"season": season, "stat": stat, "split": split, "players": board})
+
+# Players with the closest per-90 shots, SOG, goals, assists and cards
+# (season_stats.SIMILARITY_FEATURES) in one season
+SIMILAR_PLAYERS = 10
+
+@app.route("/api/players/<int:player_id>/similar")
+def api_similar_players(player_id):
+    db = get_db()
+    seasons = get_seasons(db)
+    season = leaderboard_args(request.args, seasons)[0]
+    k = min(max(request.args.get("k", SIMILAR_PLAYERS, type=int), 1), 100)
+    stats = season_stats.season_stats(db, db_version(), season)
+    try:
+        player = stats.profile(player_id)
+        similar = stats.similar(player_id, k)
+    except KeyError:
+        return jsonify({"error": f"player {player_id} has under {season_stats.MIN_MINUTES} "
+                                 f"minutes in {season}"}), 404
+    return jsonify({"season": season, "player": player, "similar": similar})
+
+# Head-to-head records and chains of wins (results_graph.py)
+
+def graph_args(values, seasons):
+    season = values.get("season", type=int)
+    if season not in seasons:
+        season = seasons[0] if seasons else None
+    max_depth = min(max(values.get("max_depth", results_graph.MAX_CHAIN, type=int), 1), 20)
+    return season, max_depth
+
+@app.route("/results-graph")
+def results_graph_page():
+    db = get_db()
+    seasons = get_seasons(db)
+    season, max_depth = graph_args(request.args, seasons)
+    graph = results_graph.results_graph(db, db_version(), season)
+    teams = sorted(((int(t), graph.names.get(int(t), str(t))) for t in graph.teams), key=lambda t: t[1])
+    team = request.args.get("team", type=int)
+    opponent = request.args.get("opponent", type=int)
+
+    h2h = chain = None
+    if team and opponent and team != opponent:
+        h2h = graph.head_to_head(team, opponent)
+        chain = graph.win_chain(team, opponent, max_depth)
+
+    return render_template(
+        "results_graph.html",
+        seasons=seasons,
+        season=season,
+        teams=teams,
+        team=team,
+        opponent=opponent,
+        max_depth=max_depth,
+        h2h=h2h,
+        chain=chain,
+    )
+
+@app.route("/api/head-to-head/<int:team>/<int:opponent>")
+def api_head_to_head(team, opponent):
+    db = get_db()
+    season = graph_args(request.args, get_seasons(db))[0]
+    graph = results_graph.results_graph(db, db_version(), season)
+    return jsonify({"season": season, **graph.head_to_head(team, opponent)})
+
+@app.route("/api/win-chain/<int:team>/<int:opponent>")
+def api_win_chain(team, opponent):
+    db = get_db()
+    season, max_depth = graph_args(request.args, get_seasons(db))
+    graph = results_graph.results_graph(db, db_version(), season)
+    return jsonify({"season": season, "max_depth": max_depth,
+                    "chain": graph.win_chain(team, opponent, max_depth)})
+
+# Ad-hoc SQL console (guards in console.py)
+
+@app.route("/console", methods=["GET", "POST"])
+def sql_console():
+    values = request.values
+    sql = values.get("sql", "")
+    if not sql.strip():
+        return render_template("console.html", sql=sql, limits=console_limits())
+
+    if not console.acquire_slot():
+        msg = "the console is busy with other queries; try again shortly"
+        if values.get("format") == "ndjson":
+            return jsonify({"error": msg}), 429
+        return render_template("console.html", sql=sql, error=msg, limits=console_limits()), 429
+
+    db = get_db()
+    events = console.run(db, sql)
+
+    if values.get("format") == "ndjson":
+        def stream():
+            try:
+                for kind, data in events:
+                    if kind == "rows":
+                        yield "".join(json.dumps(list(row)) + "\n" for row in data)
+                    else:
+                        yield json.dumps({kind: data}) + "\n"
+            except console.ConsoleError as e:
+                yield json.dumps({"error": str(e)}) + "\n"
+            finally:
+                console.release_slot()
+        return Response(stream_with_context(stream()), mimetype="application/x-ndjson")
+
+    headers, rows, stats, error = [], [], None, None
+    try:
+        for kind, data in events:
+            if kind == "columns":
+                headers = data
+            elif kind == "rows":
+                rows.extend(data)
+            else:
+                stats = data
+    except console.ConsoleError as e:
+        error = str(e)
+    finally:
+        console.release_slot()
+
+    return render_template(
+        "console.html",
+        sql=sql,
+        headers=headers,
+        rows=rows,
+        stats=stats,
+        error=error,
+        limits=console_limits(),
+    ), 400 if error else 200
+
+def console_limits():
+    return {
+        "seconds": console.TIME_BUDGET,
+        "vm_steps": console.STEP_BUDGET,
+        "rows": console.MAX_ROWS,
+    }
+
+# Query profile (see profiling.py)
+
+@app.route("/admin/queries")
+def admin_queries():
+    return render_template(
+        "admin.html",
+        stats=profiling.summary(),
+        slow=profiling.recent_slow(),
+        threshold=profiling.SLOW_QUERY_MS,
+        cache=RESULT_CACHE.stats(),
+    )
+
+@app.route("/admin/queries.json")
+def admin_queries_json():
+    return jsonify({
+        "slow_query_ms": profiling.SLOW_QUERY_MS,
+        "queries": profiling.summary(),
+        "recent_slow": profiling.recent_slow(),
+        "cache": RESULT_CACHE.stats(),
+    })
+
+# JSON API
+#
+#   GET /api/queries                  query names, labels and params
+#   GET /api/queries/<name>?season=&<param>=&page_size=&after=
+#       one page of rows; "next" is the cursor for the following page.
+#       page_size is separate from a query's own `limit` param (a cap on
+#       the result being paged through)
+#   GET /api/queries/<name>?format=ndjson[&after=]
+#       every row (after the cursor) streamed as JSON lines
+
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 1000
+STREAM_BATCH = 500
+
+def seek_after(col, direction, value, placeholder):
+    """
+    Condition for col sorting strictly after value. NULLs sort first
+    ascending and last descending, as SQLite orders them.
+    """
+    if direction == "ASC":
+        return f"{col} IS NOT NULL" if value is None else f"{col} > {placeholder}"
+    return None if value is None else f"({col} < {placeholder} OR {col} IS NULL)"
+
+def keyset_sql(query, after=None):
+    """
+    query's SQL wrapped to order by its "order_by" columns and, given the
+    previous page's last key values, start right after that row.
+    Returns (sql, extra params).
+    """
+    inner = query["sql"].strip().rstrip(";")
+    order = [(f'q."{col}"', direction) for col, direction in query["order_by"]]
+    params = {}
+    where = ""
+    if after is not None:
+        seeks = []
+        for i, (col, direction) in enumerate(order):
+            cond = seek_after(col, direction, after[i], f":_k{i}")
+            if cond is None:
+                continue
+            ties = [f"{c} IS :_k{j}" for j, (c, _) in enumerate(order[:i])]
+            seeks.append("(" + " AND ".join(ties + [cond]) + ")")
+        params = {f"_k{i}": v for i, v in enumerate(after)}
+        where = "WHERE " + (" OR ".join(seeks) if seeks else "0")
+    order_sql = ", ".join(f"{col} {direction}" for col, direction in order)
+    return f"SELECT * FROM ({inner}) AS q {where} ORDER BY {order_sql}", params
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode("ascii")
+
+def decode_cursor(token, size):
+    if not token:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise ValueError("malformed cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("cursor does not match this query")
+    return values
+
+def stream_rows(db, sql, params):
+    cur = db.execute(sql, params)
+    yield json.dumps({"columns": [d[0] for d in cur.description]}) + "\n"
+    while True:
+        batch = cur.fetchmany(STREAM_BATCH)
+        if not batch:
+            break
+        yield "".join(json.dumps(list(row)) + "\n" for row in batch)
+
+@app.route("/api/queries")
+def api_queries():
+    return jsonify({
+        key: {
+            "label": q["label"],
+            "order_by": [col for col, _ in q["order_by"]],
+            "params": {
+                name: {k: v for k, v in spec.items() if k != "choices_sql"}
+                for name, spec in q.get("params", {}).items()
+            },
+        }
+        for key, q in QUERIES.items()
+    })
+
+@app.route("/api/queries/<name>")
+def api_query(name):
+    if name not in QUERIES:
+        return jsonify({"error": f"unknown query {name!r}"}), 404
+    query = QUERIES[name]
+    values = request.args
+
+    db = get_db()
+    version = db_version()
+    seasons = get_seasons(db)
+    season = values.get("season", type=int)
+    if season not in seasons:
+        season = seasons[0] if seasons else None
+
+    params, errors = parse_params(db, version, query, values)
+    if errors:
+        return jsonify({"errors": errors}), 400
+    try:
+        after = decode_cursor(values.get("after"), len(query["order_by"]))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    sql, seek_params = keyset_sql(query, after)
+    params = {"season": season, **params}
+
+    if values.get("format") == "ndjson":
+        set_deadline(None)
+        return Response(
+            stream_with_context(stream_rows(db, sql, {**params, **seek_params})),
+            mimetype="application/x-ndjson",
+        )
+
+    limit = min(max(values.get("page_size", API_PAGE_SIZE, type=int), 1), API_MAX_PAGE_SIZE)
+    # one extra row tells us whether there is a next page
+    headers, rows = cached_query(
+        db, version, f"api:{name}", f"{sql} LIMIT :_limit",
+        {**params, **seek_params, "_limit": limit + 1},
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        key_cols = [headers.index(col) for col, _ in query["order_by"]]
+        next_cursor = encode_cursor([rows[-1][i] for i in key_cols])
+
+    return jsonify({
+        "query": name,
+        "season": season,
+        "params": params,
+        "columns": headers,
+        "rows": [list(row) for row in rows],
+        "next": next_cursor,
+    })
+
+# Bulk export
+#
+#   GET /export/table/<table>?format=csv|arrow&gzip=1[&season=]
+#   GET /export/query/<name>?format=csv|arrow&gzip=1&season=&<param>=
+#
+# Streamed from the cursor in batches; nothing is cached or fully loaded.
+
+EXPORT_TABLES = [
+    "Conference", "University", "Rankings", "Game", "TeamGame", "Player",
+    "Play", "GameStats", "PlayerSeasonStats", "TeamRollup", "ConferenceRollup",
+]
+
+def export_response(cur, filename, declared=None):
+    fmt = request.args.get("format", "csv")
+    if fmt not in export.FORMATS:
+        return jsonify({"error": f"format must be one of {sorted(export.FORMATS)}"}), 400
+    if fmt == "arrow" and export.pa is None:
+        return jsonify({"error": "arrow export needs pyarrow installed on the server"}), 501
+
+    mimetype, ext = export.FORMATS[fmt]
+    chunks = export.csv_chunks(cur) if fmt == "csv" else export.arrow_chunks(cur, declared)
+    filename = f"{filename}.{ext}"
+    if request.args.get("gzip") in ("1", "true"):
+        chunks = export.gzip_chunks(chunks)
+        mimetype = "application/gzip"
+        filename += ".gz"
+
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@app.route("/export/table/<table>")
+def export_table(table):
+    if table not in EXPORT_TABLES:
+        return jsonify({"error": f"unknown table {table!r}"}), 404
+    set_deadline(None)
+    db = get_db()
+    declared = {r[1]: r[2] for r in db.execute(f"PRAGMA table_info({table})")}
+
+    season = request.args.get("season", type=int)
+    filename = table
+    if season is not None and "season" in declared:
+        cur = db.execute(f"SELECT * FROM {table} WHERE season = ?", (season,))
+        filename = f"{table}_{season}"
+    else:
+        cur = db.execute(f"SELECT * FROM {table}")
+    return export_response(cur, filename, declared)
+
+@app.route("/export/query/<name>")
+def export_query(name):
+    if name not in QUERIES:
+        return jsonify({"error": f"unknown query {name!r}"}), 404
+    query = QUERIES[name]
+
+    db = get_db()
+    version = db_version()
+    seasons = get_seasons(db)
+    season = request.args.get("season", type=int)
+    if season not in seasons:
+        season = seasons[0] if seasons else None
+
+    params, errors = parse_params(db, version, query, request.args)
+    if errors:
+        return jsonify({"errors": errors}), 400
+    set_deadline(None)
+    sql, _ = keyset_sql(query)
+    cur = db.execute(sql, {"season": season, **params})
+    return export_response(cur, f"{name}_{season}")
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5001, debug=True)
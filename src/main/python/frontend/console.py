@@ -0,0 +1,123 @@
+"""
+Ad-hoc SQL for the /console page. Only single SELECT statements run: an
+authorizer denies every action but reads and function calls, on top of the
+read-only connection. Each query gets a wall-time and VM-step budget
+(enforced by the connection's progress handler), a row cap and a size cap
+on every string, blob and row (SQLITE_LIMIT_LENGTH, which also holds inside
+a single function call, where the progress handler never runs), and at most
+MAX_CONCURRENT console queries run per process, so a runaway query costs
+one thread for TIME_BUDGET seconds and bounded memory at worst.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+import profiling
+from db import reset_steps, set_deadline, set_step_limit, vm_steps
+
+TIME_BUDGET = float(os.environ.get("D3_CONSOLE_TIMEOUT", "2"))
+STEP_BUDGET = int(os.environ.get("D3_CONSOLE_MAX_STEPS", "50000000"))
+MAX_ROWS = int(os.environ.get("D3_CONSOLE_MAX_ROWS", "5000"))
+MAX_VALUE_BYTES = int(os.environ.get("D3_CONSOLE_MAX_VALUE_BYTES", "1000000"))
+MAX_CONCURRENT = 2
+BATCH_ROWS = 500
+
+ALLOWED_ACTIONS = {
+    sqlite3.SQLITE_SELECT,
+    sqlite3.SQLITE_READ,
+    sqlite3.SQLITE_FUNCTION,
+    getattr(sqlite3, "SQLITE_RECURSIVE", 33),   # WITH RECURSIVE
+}
+# functions that make filler of any requested size (printf/format by
+# padding, e.g. '%.*c'); past the length limit they still spend the CPU
+# building it, in one call the progress handler can't interrupt
+DENIED_FUNCTIONS = {"randomblob", "zeroblob", "printf", "format"}
+
+_slots = threading.BoundedSemaphore(MAX_CONCURRENT)
+
+
+class ConsoleError(Exception):
+    pass
+
+
+def authorizer(action, arg1, arg2, db_name, source):
+    if action == sqlite3.SQLITE_FUNCTION and (arg2 or "").lower() in DENIED_FUNCTIONS:
+        return sqlite3.SQLITE_DENY
+    return sqlite3.SQLITE_OK if action in ALLOWED_ACTIONS else sqlite3.SQLITE_DENY
+
+
+def acquire_slot():
+    return _slots.acquire(blocking=False)
+
+
+def release_slot():
+    _slots.release()
+
+
+def _error_message(e):
+    msg = str(e)
+    if "interrupted" in msg:
+        return (f"query stopped: over its budget of {TIME_BUDGET:g}s "
+                f"or {STEP_BUDGET:,} VM steps")
+    if "not authorized" in msg:
+        return ("only read-only SELECT queries can be run here "
+                f"(and not {', '.join(sorted(DENIED_FUNCTIONS))})")
+    if "too big" in msg:
+        return f"query stopped: a value or row is over {MAX_VALUE_BYTES:,} bytes"
+    return msg
+
+
+def run(conn, sql):
+    """
+    Run sql under the console guards, yielding ("columns", names), then
+    ("rows", batch) up to MAX_ROWS rows, then ("done", stats) with timing,
+    VM steps, truncation and the query plan. Raises ConsoleError with a
+    message for the user; the guards are removed however it ends.
+    """
+    sql = sql.strip().rstrip(";").strip()
+    if not sql:
+        raise ConsoleError("enter a query")
+
+    conn.set_authorizer(authorizer)
+    max_length = conn.setlimit(sqlite3.SQLITE_LIMIT_LENGTH, MAX_VALUE_BYTES)
+    set_deadline(TIME_BUDGET)
+    set_step_limit(STEP_BUDGET)
+    reset_steps()
+    start = time.perf_counter()
+    count = 0
+    try:
+        try:
+            plan = [r[3] for r in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+            cur = conn.execute(sql)
+        except (sqlite3.Error, sqlite3.Warning) as e:
+            raise ConsoleError(_error_message(e))
+        if cur.description is None:
+            raise ConsoleError("only read-only SELECT queries can be run here")
+        yield "columns", [d[0] for d in cur.description]
+
+        try:
+            while count < MAX_ROWS:
+                batch = cur.fetchmany(min(BATCH_ROWS, MAX_ROWS - count))
+                if not batch:
+                    break
+                count += len(batch)
+                yield "rows", batch
+            truncated = count == MAX_ROWS and cur.fetchone() is not None
+        except sqlite3.Error as e:
+            raise ConsoleError(_error_message(e))
+
+        ms = (time.perf_counter() - start) * 1000
+        profiling.record(conn, "console", sql, {}, ms, count, vm_steps())
+        yield "done", {
+            "ms": round(ms, 2),
+            "rows": count,
+            "vm_steps": vm_steps(),
+            "truncated": truncated,
+            "plan": plan,
+        }
+    finally:
+        conn.set_authorizer(None)
+        conn.setlimit(sqlite3.SQLITE_LIMIT_LENGTH, max_length)
+        set_step_limit(None)
+        set_deadline(None)
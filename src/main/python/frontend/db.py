@@ -0,0 +1,253 @@
+"""
+Read-only SQLite connections for the frontend, one per worker thread,
+reused across requests so the page cache stays warm.
+
+    D3_DB_FILE=/path/to/D3WomensSoccer.db   database to serve (default: repo root)
+    D3_DB_IMMUTABLE=1                       the file is a frozen snapshot
+    D3_DB_SNAPSHOT=1                        serve from an in-memory copy
+"""
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import quote
+
+# csv_to_sql.py builds the database in the repository root
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", ".."))
+DB_FILE = os.environ.get("D3_DB_FILE", os.path.join(ROOT_DIR, "D3WomensSoccer.db"))
+
+# immutable=1 skips file locking and change detection; only safe when
+# nothing will write the file while the app is up
+IMMUTABLE = os.environ.get("D3_DB_IMMUTABLE") == "1"
+
+# Snapshot mode: DB_FILE is copied into a shared-cache in-memory database
+# with the backup API and every thread reads that copy. A new build on disk
+# is copied into a fresh snapshot and swapped in; threads move over on their
+# next get_db(). Checks for a new build happen at most this often (seconds).
+SNAPSHOT = os.environ.get("D3_DB_SNAPSHOT") == "1"
+SNAPSHOT_CHECK_INTERVAL = 2.0
+
+MMAP_SIZE = 256 * 1024 * 1024   # bytes
+CACHE_SIZE_KB = 64 * 1024       # page cache per connection
+# prepared statements kept per connection; every canned query's SQL is
+# fixed text with bound params, so each is compiled once per thread
+STATEMENT_CACHE_SIZE = 256
+
+# VM instructions between progress callbacks, which count steps for the
+# query profile and check the request deadline
+PROGRESS_STEPS = 1000
+
+_local = threading.local()
+
+_snapshot = None        # (generation, uri, anchor connection, build id)
+_snapshot_checked = 0.0
+_snapshot_lock = threading.Lock()
+_generations = itertools.count(1)
+
+
+def _reset_after_fork():
+    # SQLite connections must not be used across fork; a worker forked
+    # from a warmed-up parent opens its own (and loads its own snapshot)
+    global _local, _snapshot, _snapshot_lock
+    _local = threading.local()
+    _snapshot = None
+    _snapshot_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def db_uri(path=DB_FILE, immutable=IMMUTABLE):
+    uri = f"file:{quote(os.path.abspath(path))}?mode=ro"
+    if immutable:
+        uri += "&immutable=1"
+    return uri
+
+
+def connect(path=DB_FILE, immutable=IMMUTABLE):
+    """
+    New read-only connection with the read-side pragmas set.
+    """
+    conn = sqlite3.connect(db_uri(path, immutable), uri=True,
+                           cached_statements=STATEMENT_CACHE_SIZE)
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+    conn.execute("PRAGMA query_only = ON")
+    conn.set_progress_handler(_progress, PROGRESS_STEPS)
+    return conn
+
+
+def connect_snapshot(uri):
+    """
+    Reader on an in-memory snapshot. read_uncommitted skips the shared-cache
+    table locks, which guard nothing here since no one writes.
+    """
+    conn = sqlite3.connect(uri, uri=True, cached_statements=STATEMENT_CACHE_SIZE)
+    conn.execute("PRAGMA read_uncommitted = ON")
+    conn.execute("PRAGMA query_only = ON")
+    conn.set_progress_handler(_progress, PROGRESS_STEPS)
+    return conn
+
+
+def set_deadline(seconds):
+    """
+    Interrupt this thread's queries once `seconds` have passed (None: no
+    limit). Interrupted queries raise sqlite3.OperationalError.
+    """
+    _local.deadline = time.monotonic() + seconds if seconds else None
+
+
+def set_step_limit(steps):
+    """
+    Interrupt this thread's queries once they have run `steps` VM
+    instructions since reset_steps() (None: no limit).
+    """
+    _local.step_limit = steps
+
+
+def reset_steps():
+    _local.steps = 0
+
+
+def vm_steps():
+    """
+    VM instructions run on this thread since reset_steps(), to the nearest
+    PROGRESS_STEPS.
+    """
+    return getattr(_local, "steps", 0)
+
+
+def _progress():
+    _local.steps = getattr(_local, "steps", 0) + PROGRESS_STEPS
+    step_limit = getattr(_local, "step_limit", None)
+    if step_limit is not None and _local.steps > step_limit:
+        return 1
+    deadline = getattr(_local, "deadline", None)
+    return 1 if deadline is not None and time.monotonic() > deadline else 0
+
+
+def _file_id(path):
+    st = os.stat(path)
+    return (st.st_dev, st.st_ino)
+
+
+def get_db():
+    """
+    This thread's connection, opened on first use. If the database file has
+    been replaced (not just rewritten in place) the connection is reopened,
+    since the old one would keep reading the unlinked file. In snapshot
+    mode the connection follows the current snapshot instead.
+    """
+    if SNAPSHOT:
+        snap = current_snapshot()
+        source, open_conn = snap[0], lambda: connect_snapshot(snap[1])
+    else:
+        source, open_conn = _file_id(DB_FILE), connect
+
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.source != source:
+        conn.close()
+        conn = None
+    if conn is None:
+        conn = open_conn()
+        _local.conn = conn
+        _local.source = source
+    return conn
+
+
+# Snapshot mode
+
+def load_snapshot():
+    """
+    Copy DB_FILE into a new in-memory database and make it current. The
+    previous snapshot's anchor is closed; its memory is freed once the last
+    thread still reading it moves on.
+    """
+    global _snapshot
+    start = time.perf_counter()
+    generation = next(_generations)
+    uri = f"file:d3snapshot_{os.getpid()}_{generation}?mode=memory&cache=shared"
+
+    # the anchor keeps the in-memory database alive between readers
+    anchor = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    source = connect()
+    try:
+        source.backup(anchor)
+        build = build_id(source)
+    finally:
+        source.close()
+
+    old, _snapshot = _snapshot, (generation, uri, anchor, build)
+    if old is not None:
+        old[2].close()
+    print(f"[db] loaded snapshot {generation} (build {build}) in "
+          f"{time.perf_counter() - start:.2f}s")
+    return _snapshot
+
+
+def _disk_build():
+    try:
+        conn = connect()
+    except sqlite3.Error:
+        return None
+    try:
+        return build_id(conn)
+    finally:
+        conn.close()
+
+
+def current_snapshot():
+    """
+    The snapshot to serve, loading the first one on demand. Every
+    SNAPSHOT_CHECK_INTERVAL one thread checks the build id on disk and swaps
+    in a new snapshot if it changed; the others keep reading the old one
+    meanwhile. A build still in progress has no build id and is ignored.
+    """
+    global _snapshot_checked
+    snap = _snapshot
+    now = time.monotonic()
+    if snap is not None and now - _snapshot_checked < SNAPSHOT_CHECK_INTERVAL:
+        return snap
+    if not _snapshot_lock.acquire(blocking=snap is None):
+        return snap
+    try:
+        if _snapshot is None:
+            load_snapshot()
+        elif now - _snapshot_checked >= SNAPSHOT_CHECK_INTERVAL:
+            build = _disk_build()
+            if build is not None and build != _snapshot[3]:
+                load_snapshot()
+        _snapshot_checked = now
+        return _snapshot
+    finally:
+        _snapshot_lock.release()
+
+
+def build_id(conn):
+    try:
+        row = conn.execute("SELECT build_id FROM BuildInfo").fetchone()
+    except sqlite3.OperationalError:
+        # built before BuildInfo existed
+        return None
+    return row[0] if row else None
+
+
+def db_version():
+    """
+    Stamp that changes whenever csv_to_sql.py rebuilds the database or the
+    file is swapped for another: file identity and mtime plus the build id
+    recorded in the database.
+    """
+    conn = get_db()
+    if SNAPSHOT:
+        return ("snapshot", _local.source, build_id(conn))
+    st = os.stat(DB_FILE)
+    return (st.st_dev, st.st_ino, st.st_mtime_ns, build_id(conn))
+
+
+def close_db():
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
@@ -0,0 +1,149 @@
+"""
+Streaming exports of a cursor as CSV or Arrow IPC (columnar), optionally
+gzipped. Rows are pulled from the cursor in batches and each batch is
+encoded and yielded before the next is fetched, so memory stays bounded by
+BATCH_ROWS whatever the result size.
+
+Arrow output needs pyarrow (`pip install pyarrow`); CSV has no extra
+dependencies.
+"""
+import csv
+import io
+import zlib
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+BATCH_ROWS = 5000
+GZIP_LEVEL = 6
+
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+# SQLite declared type -> Arrow type name, matched like SQLite's affinity
+# rules (first fragment found wins); BOOLEAN columns hold 0/1
+DECLARED_TYPES = [
+    ("INT", "int64"),
+    ("BOOL", "int64"),
+    ("CHAR", "string"),
+    ("CLOB", "string"),
+    ("TEXT", "string"),
+    ("BLOB", "binary"),
+    ("REAL", "float64"),
+    ("FLOA", "float64"),
+    ("DOUB", "float64"),
+]
+
+
+def csv_chunks(cur):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow([d[0] for d in cur.description])
+    while True:
+        rows = cur.fetchmany(BATCH_ROWS)
+        if not rows:
+            break
+        writer.writerows(rows)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    # header only, for an empty result
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def declared_arrow_type(decl):
+    decl = (decl or "").upper()
+    for fragment, type_name in DECLARED_TYPES:
+        if fragment in decl:
+            return type_name
+    # other NUMERIC affinity (DATE, TIME, ...) holds text in this schema
+    return "string"
+
+
+def inferred_arrow_type(values):
+    """
+    Arrow type for a query column from its first batch: float if any value
+    is a float, int if all are ints, binary if all are bytes, otherwise
+    string.
+    """
+    kinds = {type(v) for v in values if v is not None}
+    if kinds and kinds <= {int, float}:
+        return "float64" if float in kinds else "int64"
+    if kinds == {bytes}:
+        return "binary"
+    return "string"
+
+
+def arrow_chunks(cur, declared=None):
+    """
+    Arrow IPC stream, one record batch per fetch. Column types come from
+    `declared` (name -> SQLite declared type, for table exports) or are
+    inferred from the first batch; the stream's schema can't change after
+    that, so later values are widened into their column where that is
+    lossless (arrow_value) and otherwise end the stream with a ValueError.
+    """
+    names = [d[0] for d in cur.description]
+    rows = cur.fetchmany(BATCH_ROWS)
+
+    types = []
+    for i, name in enumerate(names):
+        if declared and name in declared:
+            types.append(declared_arrow_type(declared[name]))
+        else:
+            types.append(inferred_arrow_type([row[i] for row in rows]))
+    schema = pa.schema([(name, getattr(pa, t)()) for name, t in zip(names, types)])
+
+    sink = io.BytesIO()
+    writer = pa.ipc.new_stream(sink, schema)
+    while rows:
+        columns = [
+            pa.array([arrow_value(row[i], t, field.name) for row in rows], type=field.type)
+            for i, (field, t) in enumerate(zip(schema, types))
+        ]
+        writer.write_batch(pa.record_batch(columns, schema=schema))
+        yield _drain(sink)
+        rows = cur.fetchmany(BATCH_ROWS)
+    writer.close()
+    yield _drain(sink)
+
+
+def arrow_value(value, type_name, column):
+    # SQLite columns are loosely typed: anything widens to string, ints to
+    # float, integral floats to int; a value that would lose information
+    # (2.5 in an int64 column, text in a numeric one) aborts the export
+    # instead of being truncated
+    if value is None:
+        return None
+    if type_name == "string":
+        return value if isinstance(value, str) else str(value)
+    if type_name == "float64" and isinstance(value, (int, float)):
+        return float(value)
+    if type_name == "int64" and isinstance(value, int):
+        return value
+    if type_name == "int64" and isinstance(value, float) and value.is_integer():
+        return int(value)
+    if type_name == "binary" and isinstance(value, bytes):
+        return value
+    raise ValueError(f"export aborted: column {column!r} is {type_name} but got {value!r}; "
+                     f"export as format=csv instead")
+
+
+def _drain(sink):
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
+
+
+def gzip_chunks(chunks, level=GZIP_LEVEL):
+    comp = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip container
+    for chunk in chunks:
+        data = comp.compress(chunk)
+        if data:
+            yield data
+    yield comp.flush()
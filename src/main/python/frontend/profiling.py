@@ -0,0 +1,87 @@
+"""
+Per-query execution profile: wall time, rows returned and SQLite VM steps
+for every query the app actually runs (result cache hits aren't counted).
+Executions slower than SLOW_QUERY_MS are appended to SLOW_LOG as JSON lines
+with their EXPLAIN QUERY PLAN.
+
+Samples live in the process, so under serve.py each worker reports its own.
+"""
+import json
+import math
+import os
+import statistics
+import threading
+import time
+from collections import defaultdict, deque
+
+from db import ROOT_DIR
+
+SLOW_QUERY_MS = float(os.environ.get("D3_SLOW_QUERY_MS", "200"))
+SLOW_LOG = os.environ.get("D3_SLOW_LOG", os.path.join(ROOT_DIR, "slow_queries.log"))
+SAMPLES_PER_QUERY = 1000   # most recent executions kept per query
+RECENT_SLOW = 50           # slow entries kept in memory for the admin page
+
+_samples = defaultdict(lambda: deque(maxlen=SAMPLES_PER_QUERY))
+_slow = deque(maxlen=RECENT_SLOW)
+_lock = threading.Lock()
+
+
+def record(conn, name, sql, params, ms, rows, steps):
+    with _lock:
+        _samples[name].append((ms, rows, steps))
+    if ms < SLOW_QUERY_MS:
+        return
+
+    plan = [r[3] for r in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+    entry = {
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "query": name,
+        "ms": round(ms, 2),
+        "rows": rows,
+        "vm_steps": steps,
+        "params": params,
+        "plan": plan,
+    }
+    line = json.dumps(entry, default=str)
+    with _lock:
+        _slow.append(entry)
+        with open(SLOW_LOG, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    print(f"[slow query] {name} {ms:.1f} ms, {rows} rows, ~{steps} VM steps")
+
+
+def percentile(values, pct):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not values:
+        return None
+    k = max(math.ceil(pct / 100 * len(values)) - 1, 0)
+    return values[min(k, len(values) - 1)]
+
+
+def summary():
+    """
+    name -> count, p50/p95/p99/max ms, median rows and VM steps.
+    """
+    with _lock:
+        snapshot = {name: list(s) for name, s in _samples.items()}
+
+    out = {}
+    for name, samples in sorted(snapshot.items()):
+        ms = sorted(s[0] for s in samples)
+        out[name] = {
+            "count": len(samples),
+            "p50_ms": round(percentile(ms, 50), 3),
+            "p95_ms": round(percentile(ms, 95), 3),
+            "p99_ms": round(percentile(ms, 99), 3),
+            "max_ms": round(ms[-1], 3),
+            "median_rows": statistics.median(s[1] for s in samples),
+            "median_vm_steps": statistics.median(s[2] for s in samples),
+        }
+    return out
+
+
+def recent_slow():
+    with _lock:
+        return list(reversed(_slow))
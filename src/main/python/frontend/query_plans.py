@@ -0,0 +1,149 @@
+"""
+EXPLAIN QUERY PLAN + timing for every entry in QUERIES.
+
+    python query_plans.py [path/to/D3WomensSoccer.db] [--repeat N] [--season YYYY]
+
+Each query is timed against the database as built ("indexed") and against
+an in-memory copy with the workload indexes (idx_*) dropped ("no_idx").
+Plan steps that still read a whole table are listed as full scans.
+Queries with params run with their defaults.
+"""
+import re
+import sqlite3
+import statistics
+import sys
+import time
+
+from app import QUERIES, default_params
+from db import DB_FILE
+REPEAT = 5
+
+SCAN_STEP = re.compile(r"^SCAN (\w+)$")
+TABLE_REF = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.I)
+SQL_WORDS = {
+    "where", "on", "join", "left", "inner", "cross", "natural", "using",
+    "group", "order", "limit", "union", "having", "window",
+}
+
+
+def query_plan(conn, sql, params):
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def table_aliases(sql):
+    """
+    alias (or bare name) -> name, for every FROM/JOIN reference in sql
+    """
+    aliases = {}
+    for name, alias in TABLE_REF.findall(sql):
+        aliases[name.lower()] = name
+        if alias and alias.lower() not in SQL_WORDS:
+            aliases[alias.lower()] = name
+    return aliases
+
+
+def full_scans(conn, sql, plan):
+    """
+    Tables read by a plain "SCAN <alias>" step (no index). Scans of CTEs
+    and subqueries are intermediate results, not table reads, so they're
+    skipped.
+    """
+    tables = {r[0].lower() for r in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table'"
+    )}
+    aliases = table_aliases(sql)
+
+    scans = []
+    for step in plan:
+        m = SCAN_STEP.match(step)
+        if not m:
+            continue
+        name = aliases.get(m.group(1).lower(), m.group(1))
+        if name.lower() in tables:
+            scans.append(name)
+    return scans
+
+
+def time_query(conn, sql, params, repeat=REPEAT):
+    """
+    Median wall time in milliseconds over `repeat` runs.
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def without_workload_indexes(conn):
+    """
+    In-memory copy of the database with every idx_* index dropped.
+    """
+    mem = sqlite3.connect(":memory:")
+    conn.backup(mem)
+    names = [r[0] for r in mem.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx\\_%' ESCAPE '\\'"
+    )]
+    for name in names:
+        mem.execute(f"DROP INDEX {name}")
+    return mem
+
+
+def latest_season(conn):
+    row = conn.execute("SELECT MAX(season) FROM Game").fetchone()
+    return row[0]
+
+
+def main(argv):
+    db_file = DB_FILE
+    repeat = REPEAT
+    season = None
+
+    args = list(argv)
+    while args:
+        arg = args.pop(0)
+        if arg == "--repeat":
+            repeat = int(args.pop(0))
+        elif arg == "--season":
+            season = int(args.pop(0))
+        else:
+            db_file = arg
+
+    conn = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
+    if season is None:
+        season = latest_season(conn)
+    baseline = without_workload_indexes(conn)
+
+    print(f"Database: {db_file}  season: {season}  repeat: {repeat}")
+    print()
+    print(f"{'query':<26} {'no_idx ms':>10} {'indexed ms':>11} {'speedup':>8}  full scans")
+    print("-" * 80)
+
+    flagged = {}
+    for name, q in QUERIES.items():
+        sql = q["sql"]
+        params = {"season": season, **default_params(q)}
+        before = time_query(baseline, sql, params, repeat)
+        after = time_query(conn, sql, params, repeat)
+        plan = query_plan(conn, sql, params)
+        scans = full_scans(conn, sql, plan)
+        if scans:
+            flagged[name] = plan
+
+        speedup = before / after if after else float("inf")
+        print(f"{name:<26} {before:>10.2f} {after:>11.2f} {speedup:>7.1f}x  {', '.join(scans) or '-'}")
+
+    for name, plan in flagged.items():
+        print()
+        print(f"{name} plan:")
+        for step in plan:
+            print(f"  {step}")
+
+    baseline.close()
+    conn.close()
+    return 1 if flagged else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,216 @@
+"""
+Results graph for "has A played B?" and "is there a chain of wins from A to
+B?". A season's scored games are folded into
+
+* head-to-head summaries: one entry per team pair in sorted arrays (key
+  low_id * TEAM_KEY + high_id), with games, each side's wins, ties and goals
+* a "beat" graph in CSR form: for team position i, indices[indptr[i]:
+  indptr[i + 1]] are the positions of the teams it has beaten
+
+so a head-to-head lookup is one binary search and the shortest chain of
+wins is a breadth-first search over the arrays, at most MAX_CHAIN games long.
+
+Graphs are cached per season. On a new database version only the games
+added since are folded in (the graph is rebuilt if a loaded game changed).
+"""
+import threading
+from collections import deque
+
+import numpy as np
+
+# university ids are below this, so low * TEAM_KEY + high is a unique pair key
+TEAM_KEY = 10 ** 8
+MAX_CHAIN = 6
+
+GAMES_SQL = """
+SELECT game_id, home_team_id, away_team_id, home_score, away_score, game_date
+FROM Game
+WHERE season = ?
+  AND home_score IS NOT NULL AND away_score IS NOT NULL
+  AND home_team_id IS NOT NULL AND away_team_id IS NOT NULL
+"""
+
+# per pair, from the lower team id's side
+SUMMARY_FIELDS = ["games", "low_wins", "high_wins", "ties", "low_goals", "high_goals"]
+
+
+class ResultsGraph:
+
+    def __init__(self, season, names):
+        self.season = season
+        self.names = names
+        self.games = {}          # game_id -> (home, away, home_score, away_score, date)
+        self.pair_games = {}     # pair key -> [game_id, ...] in date order
+        self.pairs = np.zeros(0, dtype=np.int64)
+        self.summary = np.zeros((0, len(SUMMARY_FIELDS)), dtype=np.int64)
+        self.teams = np.zeros(0, dtype=np.int64)
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int64)
+
+    def extended(self, rows, names):
+        """
+        A new graph with the (game_id, home, away, home_score, away_score,
+        date) rows not already in this one folded in; this one is left as
+        is for requests still reading it.
+        """
+        graph = ResultsGraph(self.season, names)
+        graph.games = dict(self.games)
+        graph.pair_games = dict(self.pair_games)
+        graph.pairs, graph.summary = self.pairs, self.summary
+        graph._add_games([r for r in rows if r[0] not in self.games])
+        return graph
+
+    def _add_games(self, rows):
+        if not rows:
+            self._build_adjacency()
+            return
+        touched = set()
+        for r in rows:
+            key = pair_key(r[1], r[2])
+            self.games[r[0]] = tuple(r[1:])
+            self.pair_games[key] = self.pair_games.get(key, []) + [r[0]]
+            touched.add(key)
+        for key in touched:
+            self.pair_games[key].sort(key=lambda g: (self.games[g][4] or "", g))
+
+        g = np.array([r[1:5] for r in rows], dtype=np.int64)
+        home, away, home_score, away_score = g.T
+        home_low = home < away
+        low_score = np.where(home_low, home_score, away_score)
+        high_score = np.where(home_low, away_score, home_score)
+        new = np.column_stack([
+            np.ones(len(g), dtype=np.int64),
+            low_score > high_score,
+            high_score > low_score,
+            low_score == high_score,
+            low_score,
+            high_score,
+        ]).astype(np.int64)
+
+        keys = np.r_[self.pairs, np.minimum(home, away) * TEAM_KEY + np.maximum(home, away)]
+        self.pairs, inverse = np.unique(keys, return_inverse=True)
+        summary = np.zeros((len(self.pairs), len(SUMMARY_FIELDS)), dtype=np.int64)
+        np.add.at(summary, inverse.reshape(-1), np.r_[self.summary, new])
+        self.summary = summary
+        self._build_adjacency()
+
+    def _build_adjacency(self):
+        low, high = self.pairs // TEAM_KEY, self.pairs % TEAM_KEY
+        self.teams = np.unique(np.r_[low, high])
+        low, high = np.searchsorted(self.teams, low), np.searchsorted(self.teams, high)
+        low_won = self.summary[:, 1] > 0
+        high_won = self.summary[:, 2] > 0
+        src = np.r_[low[low_won], high[high_won]]
+        dst = np.r_[high[low_won], low[high_won]]
+        order = np.argsort(src, kind="stable")
+        self.indices = dst[order]
+        self.indptr = np.r_[0, np.cumsum(np.bincount(src, minlength=len(self.teams)))]
+
+    def _position(self, team):
+        i = int(np.searchsorted(self.teams, team))
+        return i if i < len(self.teams) and self.teams[i] == team else None
+
+    def _game(self, game_id):
+        home, away, home_score, away_score, game_date = self.games[game_id]
+        return {
+            "game_id": game_id,
+            "date": game_date,
+            "home": self.names.get(home, home),
+            "away": self.names.get(away, away),
+            "home_score": home_score,
+            "away_score": away_score,
+        }
+
+    def head_to_head(self, a, b):
+        """
+        Summary of a's games against b (from a's side) and the games.
+        """
+        key = pair_key(a, b)
+        i = int(np.searchsorted(self.pairs, key))
+        found = i < len(self.pairs) and self.pairs[i] == key
+        s = dict(zip(SUMMARY_FIELDS, self.summary[i].tolist())) if found else dict.fromkeys(SUMMARY_FIELDS, 0)
+        a_low = a < b
+        return {
+            "team": self.names.get(a, a),
+            "opponent": self.names.get(b, b),
+            "games": s["games"],
+            "wins": s["low_wins"] if a_low else s["high_wins"],
+            "losses": s["high_wins"] if a_low else s["low_wins"],
+            "ties": s["ties"],
+            "goals_for": s["low_goals"] if a_low else s["high_goals"],
+            "goals_against": s["high_goals"] if a_low else s["low_goals"],
+            "results": [self._game(g) for g in self.pair_games.get(key, [])],
+        }
+
+    def win_chain(self, a, b, max_depth=MAX_CHAIN):
+        """
+        Shortest chain of wins a beat x1, x1 beat x2, ..., xn beat b, as one
+        game per link, with at most max_depth links; None if there is none.
+        """
+        start, goal = self._position(a), self._position(b)
+        if start is None or goal is None or start == goal:
+            return None
+        parent = np.full(len(self.teams), -1, dtype=np.int64)
+        parent[start] = start
+        queue = deque([(start, 0)])
+        while queue:
+            node, depth = queue.popleft()
+            if depth == max_depth:
+                continue
+            for nxt in self.indices[self.indptr[node]:self.indptr[node + 1]].tolist():
+                if parent[nxt] != -1:
+                    continue
+                parent[nxt] = node
+                if nxt == goal:
+                    return self._chain(parent, goal)
+                queue.append((nxt, depth + 1))
+        return None
+
+    def _chain(self, parent, node):
+        links = []
+        while parent[node] != node:
+            winner, loser = int(self.teams[parent[node]]), int(self.teams[node])
+            # the latest game the winner won
+            won = [g for g in self.pair_games[pair_key(winner, loser)] if winning_team(self.games[g]) == winner]
+            links.append({"winner": self.names.get(winner, winner),
+                          "loser": self.names.get(loser, loser),
+                          **self._game(won[-1])})
+            node = parent[node]
+        return links[::-1]
+
+
+def pair_key(a, b):
+    return min(a, b) * TEAM_KEY + max(a, b)
+
+
+def winning_team(game):
+    home, away, home_score, away_score, _ = game
+    if home_score == away_score:
+        return None
+    return home if home_score > away_score else away
+
+
+_graphs = {}   # season -> (version, ResultsGraph)
+_lock = threading.Lock()
+
+
+def results_graph(conn, version, season):
+    """
+    ResultsGraph for season as of database version: cached, and on a new
+    version updated with the games added since (rebuilt if any changed).
+    """
+    with _lock:
+        cached = _graphs.get(season)
+        if cached and cached[0] == version:
+            return cached[1]
+
+        rows = conn.execute(GAMES_SQL, (season,)).fetchall()
+        names = dict(conn.execute("SELECT university_id, name FROM University"))
+        graph = cached[1] if cached else ResultsGraph(season, names)
+        current = {r[0]: tuple(r[1:]) for r in rows}
+        if any(current.get(g) != game for g, game in graph.games.items()):
+            # a loaded game changed or is gone
+            graph = ResultsGraph(season, names)
+        graph = graph.extended(rows, names)
+        _graphs[season] = (version, graph)
+        return graph
@@ -0,0 +1,274 @@
+"""
+Columnar season stats. A season of GameStats, TeamGame and Player is
+loaded once into NumPy arrays and joined there (for home/away and
+conference splits); every player total, per-90 rate, ratio and percentile
+rank is then computed with vectorized group sums (rows sorted by player,
+np.add.reduceat), so one load serves every leaderboard.
+
+Stats are named "<base>" (season total), "<base>_per90" (except for
+NOT_PER90) and the ratios in RATIOS; each exists for every split in SPLITS.
+
+Player similarity uses the same load: the qualified players' per-90
+SIMILARITY_FEATURES are standardized into one matrix per season, and the
+players nearest one player (Euclidean distance) come from a single
+matrix-vector product over it.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# GameStats columns summed per player
+BASE_STATS = [
+    "minutes", "played", "started", "goals", "assists", "shots",
+    "shots_on_target", "pk_attempt", "pk_made", "gw", "yc", "rc",
+]
+
+# games (and minutes) get no per-90 rate
+NOT_PER90 = {"minutes", "played", "started"}
+
+# name -> (numerator, denominator); goal_contributions is goals + assists.
+# shot_pct and sog_pct as in PlayerDerivedStats / PlayerSeasonStats
+RATIOS = {
+    "shot_pct": ("shots_on_target", "shots"),
+    "sog_pct": ("goals", "shots_on_target"),
+    "goals_per_shot": ("goals", "shots"),
+    "pk_pct": ("pk_made", "pk_attempt"),
+    "goals_per_start": ("goals", "started"),
+    "minutes_per_game": ("minutes", "played"),
+}
+
+SPLITS = ["all", "home", "away", "conference", "nonconference"]
+
+# default minutes (in the split) for a player to appear on a leaderboard
+# and count in its percentiles; also the bar for the similarity search
+MIN_MINUTES = 270
+CACHED_SEASONS = 4
+SIMILARITY_FEATURES = [
+    "shots_per90", "shots_on_target_per90", "goals_per90", "assists_per90", "yc_per90", "rc_per90",
+]
+# university ids are below this, so game_id * TEAM_KEY + university_id is a
+# unique int64 key for a TeamGame row
+TEAM_KEY = 10 ** 8
+
+GAMESTATS_SQL = f"""
+SELECT player_id, game_id, {", ".join(f"COALESCE({c}, 0)" for c in BASE_STATS)}
+FROM GameStats
+WHERE season = ?
+"""
+
+TEAMGAME_SQL = """
+SELECT game_id, university_id, is_home, opponent_conference_id IS conference_id
+FROM TeamGame
+WHERE season = ?
+"""
+
+PLAYER_SQL = """
+SELECT p.player_id, p.university_id, p.first_name, p.last_name, p.position, u.name
+FROM Player p
+LEFT JOIN University u ON u.university_id = p.university_id
+"""
+
+
+def _columns(rows, width):
+    """
+    rows (tuples of numbers/None) -> float array of shape (len(rows), width)
+    """
+    # None converts to NaN
+    return np.array(rows, dtype=np.float64).reshape(len(rows), width)
+
+
+def _lookup(keys, table_keys, table_values, missing=np.nan):
+    """
+    table_values at the position of each key in table_keys (unsorted,
+    unique); `missing` where a key isn't present.
+    """
+    order = np.argsort(table_keys)
+    sorted_keys = table_keys[order]
+    pos = np.clip(np.searchsorted(sorted_keys, keys), 0, max(len(sorted_keys) - 1, 0))
+    found = sorted_keys[pos] == keys if len(sorted_keys) else np.zeros(len(keys), dtype=bool)
+    out = np.full(len(keys), missing, dtype=np.float64)
+    out[found] = table_values[order][pos[found]]
+    return out
+
+
+class SeasonStats:
+
+    def __init__(self, conn, season):
+        self.season = season
+        gs = _columns(conn.execute(GAMESTATS_SQL, (season,)).fetchall(), 2 + len(BASE_STATS))
+        tg = _columns(conn.execute(TEAMGAME_SQL, (season,)).fetchall(), 4)
+        players = conn.execute(PLAYER_SQL).fetchall()
+        self.players = {
+            r[0]: {"first_name": r[2], "last_name": r[3], "position": r[4], "university": r[5]}
+            for r in players
+        }
+
+        # group each player's games into one run
+        gs = gs[np.argsort(gs[:, 0], kind="stable")]
+        player_ids = gs[:, 0].astype(np.int64)
+        game_ids = gs[:, 1].astype(np.int64)
+        values = gs[:, 2:]
+
+        # player -> team -> that team's side of the game (TeamGame row),
+        # joined on game_id * TEAM_KEY + university_id
+        pl = _columns([(r[0], r[1]) for r in players], 2)
+        team = _lookup(player_ids, pl[:, 0].astype(np.int64), pl[:, 1])
+        keys = np.where(np.isnan(team), -1, game_ids * TEAM_KEY + np.nan_to_num(team).astype(np.int64))
+        tg_keys = tg[:, 0].astype(np.int64) * TEAM_KEY + tg[:, 1].astype(np.int64)
+        is_home = _lookup(keys, tg_keys, tg[:, 2])        # NaN: team unknown
+        conference = _lookup(keys, tg_keys, tg[:, 3])
+
+        starts = np.flatnonzero(np.r_[True, player_ids[1:] != player_ids[:-1]])[:len(gs)]
+        self.player_ids = player_ids[starts]
+
+        masks = {
+            "all": np.ones(len(gs), dtype=bool),
+            "home": is_home == 1,
+            "away": is_home == 0,
+            "conference": conference == 1,
+            "nonconference": conference == 0,
+        }
+
+        self.stats = {}
+        for split, mask in masks.items():
+            totals = np.add.reduceat(values * mask[:, None], starts, axis=0) if len(gs) else values
+            self._derive(split, totals)
+
+        self._similarity_matrix()
+
+    def _derive(self, split, totals):
+        col = {name: totals[:, i] for i, name in enumerate(BASE_STATS)}
+        col["goal_contributions"] = col["goals"] + col["assists"]
+        minutes = col["minutes"]
+        qualified = minutes >= MIN_MINUTES
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for name in list(col):
+                self.stats[(split, name)] = col[name]
+                if name not in NOT_PER90:
+                    self.stats[(split, f"{name}_per90")] = np.where(minutes > 0, col[name] * 90 / minutes, np.nan)
+            for name, (num, den) in RATIOS.items():
+                self.stats[(split, name)] = np.where(col[den] > 0, col[num] / col[den], np.nan)
+
+        self.stats[(split, "_qualified")] = qualified
+
+    def _similarity_matrix(self):
+        """
+        Qualified players' SIMILARITY_FEATURES as z-scores (one row per
+        player), with each row's squared norm for the distance expansion.
+        """
+        qualified = np.flatnonzero(self.stats[("all", "_qualified")])
+        features = np.column_stack([self.stats[("all", f)][qualified] for f in SIMILARITY_FEATURES])
+        if len(features):
+            std = features.std(axis=0)
+            features = (features - features.mean(axis=0)) / np.where(std > 0, std, 1)
+        self.similar_rows = qualified
+        self.similar_index = {int(self.player_ids[i]): n for n, i in enumerate(qualified)}
+        self.similar_matrix = features
+        self.similar_norms = (features ** 2).sum(axis=1)
+
+    def stat_names(self):
+        return sorted({name for split, name in self.stats if not name.startswith("_")})
+
+    def percentiles(self, split, name, min_minutes=MIN_MINUTES):
+        """
+        Percent of players with min_minutes in the split at or below each
+        player's value (NaN for the others).
+        """
+        values = self.stats[(split, name)]
+        qualified = (self.stats[(split, "minutes")] >= min_minutes) & ~np.isnan(values)
+        ranked = np.sort(values[qualified])
+        out = np.full(len(values), np.nan)
+        if len(ranked):
+            out[qualified] = np.searchsorted(ranked, values[qualified], side="right") / len(ranked) * 100
+        return out
+
+    def leaderboard(self, name, split="all", limit=25, ascending=False, min_minutes=MIN_MINUTES):
+        """
+        Top `limit` players by one stat in one split, as dicts with name,
+        university, minutes, value and percentile rank.
+        """
+        if (split, name) not in self.stats or name.startswith("_"):
+            raise KeyError(f"unknown stat {name!r} or split {split!r}")
+        values = self.stats[(split, name)]
+        minutes = self.stats[(split, "minutes")]
+        eligible = ~np.isnan(values) & (minutes >= min_minutes)
+
+        idx = np.flatnonzero(eligible)
+        order = np.argsort(values[idx], kind="stable")
+        if not ascending:
+            order = order[::-1]
+        idx = idx[order[:limit]]
+
+        pct = self.percentiles(split, name, min_minutes)
+        board = []
+        for i in idx:
+            pid = int(self.player_ids[i])
+            board.append({
+                "player_id": pid,
+                **self.players.get(pid, {}),
+                "minutes": int(minutes[i]),
+                "value": round(float(values[i]), 4),
+                "percentile": None if np.isnan(pct[i]) else round(float(pct[i]), 1),
+            })
+        return board
+
+
+    def similar(self, player_id, k=10):
+        """
+        The k qualified players whose per-90 profile is closest to
+        player_id's, nearest first. KeyError if player_id didn't reach
+        MIN_MINUTES this season.
+        """
+        if player_id not in self.similar_index:
+            raise KeyError(f"player {player_id} has no qualified stats this season")
+        n = self.similar_index[player_id]
+        # |a - b|^2 = |a|^2 + |b|^2 - 2 a.b, every player at once
+        dist = self.similar_norms + self.similar_norms[n] - 2 * (self.similar_matrix @ self.similar_matrix[n])
+        dist[n] = np.inf
+        k = min(k, len(dist) - 1)
+        if k <= 0:
+            return []
+        nearest = np.argpartition(dist, k - 1)[:k]
+        nearest = nearest[np.argsort(dist[nearest], kind="stable")]
+        return [self._profile(m, float(np.sqrt(max(dist[m], 0)))) for m in nearest]
+
+    def profile(self, player_id):
+        return self._profile(self.similar_index[player_id])
+
+    def _profile(self, n, distance=None):
+        i = self.similar_rows[n]
+        pid = int(self.player_ids[i])
+        entry = {
+            "player_id": pid,
+            **self.players.get(pid, {}),
+            "minutes": int(self.stats[("all", "minutes")][i]),
+            **{f: round(float(self.stats[("all", f)][i]), 3) for f in SIMILARITY_FEATURES},
+        }
+        if distance is not None:
+            entry["distance"] = round(distance, 4)
+        return entry
+
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def season_stats(conn, version, season):
+    """
+    SeasonStats for (database version, season), loaded once and kept for
+    the CACHED_SEASONS most recently used.
+    """
+    key = (version, season)
+    with _lock:
+        stats = _cache.get(key)
+        if stats is not None:
+            _cache.move_to_end(key)
+            return stats
+    stats = SeasonStats(conn, season)
+    with _lock:
+        _cache[key] = stats
+        while len(_cache) > CACHED_SEASONS:
+            _cache.popitem(last=False)
+    return stats
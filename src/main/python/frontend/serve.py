@@ -0,0 +1,130 @@
+"""
+Production server for the query app (gunicorn). The app is loaded and its
+result cache warmed once in the parent, then worker processes fork from it.
+A new csv_to_sql.py build triggers a graceful reload: the cache is rewarmed
+and workers are replaced after finishing their requests.
+
+    python serve.py [--bind HOST:PORT] [--workers N] [--threads N] [--timeout SECONDS]
+
+Run from anywhere; the database path comes from db.py (D3_DB_FILE).
+"""
+import os
+import signal
+import sys
+import threading
+import time
+
+from gunicorn.app.base import BaseApplication
+
+import db
+from app import QUERIES, RESULT_CACHE, app, cached_query, default_params, get_seasons
+
+BIND = "0.0.0.0:5001"
+WORKERS = min(2 * (os.cpu_count() or 1) + 1, 8)
+THREADS = 4
+# seconds a worker may go silent before it is restarted; per-query limits
+# are app.REQUEST_TIMEOUT
+TIMEOUT = 30
+GRACEFUL_TIMEOUT = 30
+WATCH_INTERVAL = 5  # seconds between checks for a new build
+
+
+def warm():
+    """
+    Run every canned query with its defaults for the latest season. Forked
+    workers inherit the filled result cache, and the OS page cache holds
+    the pages those queries touch.
+    """
+    start = time.perf_counter()
+    conn = db.get_db()
+    version = db.db_version()
+    seasons = get_seasons(conn)
+    season = seasons[0] if seasons else None
+    for name, q in QUERIES.items():
+        cached_query(conn, version, name, q["sql"], {"season": season, **default_params(q)})
+    db.close_db()
+    print(f"[serve] warmed {len(QUERIES)} queries in {time.perf_counter() - start:.2f}s "
+          f"({RESULT_CACHE.stats()['bytes']} bytes cached)")
+
+
+def current_build():
+    """
+    Build id of the database on disk, or None while csv_to_sql.py is
+    rebuilding it (BuildInfo is dropped first and written last).
+    """
+    try:
+        conn = db.connect()
+    except Exception:
+        return None
+    try:
+        return db.build_id(conn)
+    finally:
+        conn.close()
+
+
+def watch_builds(server):
+    seen = current_build()
+    while True:
+        time.sleep(WATCH_INTERVAL)
+        build = current_build()
+        if build is None or build == seen:
+            continue
+        seen = build
+        print(f"[serve] new database build {build}; reloading workers")
+        RESULT_CACHE.clear()
+        warm()
+        os.kill(server.pid, signal.SIGHUP)
+
+
+def when_ready(server):
+    threading.Thread(target=watch_builds, args=(server,), daemon=True).start()
+
+
+class QueryServer(BaseApplication):
+
+    def __init__(self, options):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return app
+
+
+def main(argv):
+    options = {
+        "bind": BIND,
+        "workers": WORKERS,
+        "threads": THREADS,
+        "worker_class": "gthread",
+        "timeout": TIMEOUT,
+        "graceful_timeout": GRACEFUL_TIMEOUT,
+        "preload_app": True,
+        "when_ready": when_ready,
+    }
+
+    args = list(argv)
+    while args:
+        arg = args.pop(0)
+        if arg == "--bind":
+            options["bind"] = args.pop(0)
+        elif arg == "--workers":
+            options["workers"] = int(args.pop(0))
+        elif arg == "--threads":
+            options["threads"] = int(args.pop(0))
+        elif arg == "--timeout":
+            options["timeout"] = int(args.pop(0))
+        else:
+            print(f"Unknown argument {arg}")
+            return 2
+
+    warm()
+    QueryServer(options).run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
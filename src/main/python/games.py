@@ -4,10 +4,14 @@ import json
 import time 
 from datetime import datetime
 from api import ncaa_get
+from seasons import DEFAULT_SEASON, MONTHS, season_path
 
-GAME_CSV_FILE = "../output/octdev.csv"
+# Per-season partition files, see seasons.season_path
+GAME_CSV_FILE = "Game.csv"
+GAME_IDS_FILE = "game_ids.json"
 GAME_CSV_FIELDS = [
     "game_id",
+    "season",
     "home_team_id",
     "away_team_id",
     "home_score",
@@ -29,15 +33,13 @@ def normalize_contest_date(date_str):
 def ncaa_get_game(game_id):
     return ncaa_get(f"/game/{game_id}")    
 
-def write_game_ids():
+def write_game_ids(season=DEFAULT_SEASON):
     sport = "soccer-women"
     division = "d3"
-    season = 2025
 
     game_ids = set()
 
-    for month in range(8, 12):
-        month_str = f"{month:02d}"
+    for month_str in MONTHS:
         print(f"Fetching schedule for {season}-{month_str}")
 
         schedule = ncaa_get(
@@ -74,7 +76,7 @@ def write_game_ids():
     game_ids = sorted(game_ids)
     print(f"Found {len(game_ids)} total games")
 
-    with open("game_ids.json", "w") as f:
+    with open(season_path(season, GAME_IDS_FILE), "w") as f:
         json.dump(game_ids, f)
 
     return game_ids
@@ -99,6 +101,8 @@ def parse_single_game_for_csv(game_data):
 
     return {
         "game_id": int(contest["id"]),
+        # fall sport: the season is the calendar year the game is played in
+        "season": dt.year,
         "home_team_id": int(home["teamId"]),
         "away_team_id": int(away["teamId"]),
         "home_score": home_score,
@@ -109,7 +113,7 @@ def parse_single_game_for_csv(game_data):
     }
 
 
-def games_to_csv(games, filename=GAME_CSV_FILE):
+def games_to_csv(games, filename):
     file_exists = os.path.isfile(filename)
 
     with open(filename, "a", newline="", encoding="utf-8") as f:
@@ -121,8 +125,8 @@ def games_to_csv(games, filename=GAME_CSV_FILE):
         for game in games:
             writer.writerow(game)
 
-def populate_games():
-    with open("validated_ids/validated_oct_nov_game_ids.json", "r") as f:
+def populate_games(season=DEFAULT_SEASON):
+    with open(season_path(season, GAME_IDS_FILE), "r") as f:
         game_ids = json.load(f)
 
     rows = []
@@ -149,4 +153,4 @@ def populate_games():
 
         time.sleep(0.15)
 
-    games_to_csv(rows, filename=GAME_CSV_FILE)
\ No newline at end of file
+    games_to_csv(rows, filename=season_path(season, GAME_CSV_FILE))
\ No newline at end of file
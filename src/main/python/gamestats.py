@@ -5,11 +5,15 @@ import json
 import hashlib
 from math import floor
 from api import ncaa_get, NCAAAPIError
+from seasons import DEFAULT_SEASON, season_path
 
-GAMESTATS_CSV = "../output/GameStats.csv"
+# Per-season partition files, see seasons.season_path
+GAMESTATS_CSV = "GameStats.csv"
+GAME_IDS_FILE = "game_ids.json"
 
 GAMESTATS_FIELDS = [
     "game_id",
+    "season",
     "player_id",
     "first_name",
     "last_name",
@@ -45,7 +49,7 @@ def make_player_id(team_id, first, last):
     return int(hashlib.md5(key).hexdigest()[:8], 16)
 
 
-def parse_boxscore_to_gamestats(boxscore_json):
+def parse_boxscore_to_gamestats(boxscore_json, season=DEFAULT_SEASON):
     game_id = int(boxscore_json["contestId"])
     rows = []
 
@@ -62,6 +66,7 @@ def parse_boxscore_to_gamestats(boxscore_json):
 
             rows.append({
                 "game_id": game_id,
+                "season": season,
                 "player_id": make_player_id(university_id, first, last),
                 "first_name": first,
                 "last_name": last,
@@ -84,7 +89,7 @@ def parse_boxscore_to_gamestats(boxscore_json):
     return rows
 
 
-def gamestats_to_csv(rows, filename=GAMESTATS_CSV):
+def gamestats_to_csv(rows, filename):
     if not rows:
         return
 
@@ -98,8 +103,8 @@ def gamestats_to_csv(rows, filename=GAMESTATS_CSV):
 
         writer.writerows(rows)
 
-def populate_game_stats():
-    with open("../output/game_ids.json", "r") as f:
+def populate_game_stats(season=DEFAULT_SEASON):
+    with open(season_path(season, GAME_IDS_FILE), "r") as f:
         game_ids = json.load(f)
 
     all_rows = []
@@ -113,7 +118,7 @@ def populate_game_stats():
                 print(f"Skipping game {gid}: no boxscore")
                 continue
 
-            rows = parse_boxscore_to_gamestats(boxscore)
+            rows = parse_boxscore_to_gamestats(boxscore, season)
             all_rows.extend(rows)   # ✅ FIX
 
         except NCAAAPIError as e:
@@ -121,7 +126,7 @@ def populate_game_stats():
         except Exception as e:
             print(f"Skipping game {gid}: {e}")
 
-    gamestats_to_csv(all_rows)
+    gamestats_to_csv(all_rows, season_path(season, GAMESTATS_CSV))
     print(f"Wrote {len(all_rows)} game stat rows")
 
 
@@ -0,0 +1,205 @@
+# pipeline.py
+import csv
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, List
+
+STATE_FILE = "../output/pipeline_state.json"
+MAX_WORKERS = 4
+
+_local = threading.local()
+
+
+class Stage:
+    """
+    One unit of the scrape. `inputs` and `outputs` are file paths; a stage
+    runs after every stage that writes one of its inputs. Stages whose
+    result depends on more than their input files (a live web page) set
+    skip_unchanged=False.
+    """
+
+    def __init__(self, name, func, inputs=(), outputs=(), skip_unchanged=True):
+        self.name = name
+        self.func = func
+        self.inputs = [os.path.normpath(p) for p in inputs]
+        self.outputs = [os.path.normpath(p) for p in outputs]
+        self.skip_unchanged = skip_unchanged
+
+
+# Request accounting (each stage runs on its own worker thread)
+
+def count_request():
+    _local.requests = getattr(_local, "requests", 0) + 1
+
+
+def _reset_requests():
+    _local.requests = 0
+
+
+def _request_count():
+    return getattr(_local, "requests", 0)
+
+
+# Input fingerprints
+
+def fingerprint(paths: List[str]) -> str:
+    h = hashlib.sha256()
+    for path in sorted(paths):
+        h.update(path.encode("utf-8"))
+        if not os.path.exists(path):
+            h.update(b"<missing>")
+            continue
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+def load_state(filename=STATE_FILE) -> Dict[str, dict]:
+    if not os.path.isfile(filename):
+        return {}
+    with open(filename, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(state: Dict[str, dict], filename=STATE_FILE):
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+
+
+def count_rows(path: str) -> int:
+    """
+    Data rows in a CSV (header excluded) or entries in a JSON list.
+    """
+    if not os.path.isfile(path):
+        return 0
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return len(data) if isinstance(data, list) else 0
+    with open(path, newline="", encoding="utf-8") as f:
+        return max(sum(1 for _ in csv.reader(f)) - 1, 0)
+
+
+# Scheduling
+
+def build_dependencies(stages: List[Stage]) -> Dict[str, set]:
+    writers = {}
+    for s in stages:
+        for out in s.outputs:
+            if out in writers:
+                raise ValueError(f"{out} is written by both {writers[out]} and {s.name}")
+            writers[out] = s.name
+
+    deps = {}
+    for s in stages:
+        deps[s.name] = {
+            writers[p] for p in s.inputs
+            if p in writers and writers[p] != s.name
+        }
+
+    # Reject cycles up front instead of deadlocking later
+    done = set()
+    remaining = dict(deps)
+    while remaining:
+        ready = [n for n, d in remaining.items() if d <= done]
+        if not ready:
+            raise ValueError(f"Stage dependency cycle among: {sorted(remaining)}")
+        for n in ready:
+            done.add(n)
+            del remaining[n]
+
+    return deps
+
+
+def _run_stage(stage: Stage) -> dict:
+    _reset_requests()
+    start = time.perf_counter()
+    stage.func()
+    return {
+        "seconds": time.perf_counter() - start,
+        "requests": _request_count(),
+        "rows": sum(count_rows(p) for p in stage.outputs),
+    }
+
+
+def run_pipeline(stages: List[Stage], force=False, max_workers=MAX_WORKERS,
+                 state_file=STATE_FILE) -> Dict[str, dict]:
+    """
+    Run stages concurrently in dependency order. A stage with declared
+    inputs is skipped when those inputs hash the same as on its last
+    successful run and its outputs still exist.
+    """
+    by_name = {s.name: s for s in stages}
+    deps = build_dependencies(stages)
+    state = load_state(state_file)
+
+    results: Dict[str, dict] = {}
+    pending = set(by_name)
+    running = {}
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            for name in sorted(pending):
+                if not deps[name] <= set(results):
+                    continue
+                pending.discard(name)
+                stage = by_name[name]
+
+                failed = [d for d in deps[name] if results[d]["status"] in ("failed", "blocked")]
+                if failed:
+                    results[name] = {"status": "blocked", "seconds": 0.0, "rows": 0, "requests": 0}
+                    continue
+
+                fp = fingerprint(stage.inputs) if stage.inputs else None
+                prev = state.get(name, {})
+                if (not force and stage.skip_unchanged and fp is not None
+                        and prev.get("inputs") == fp
+                        and all(os.path.exists(p) for p in stage.outputs)):
+                    results[name] = {
+                        "status": "skipped",
+                        "seconds": 0.0,
+                        "rows": sum(count_rows(p) for p in stage.outputs),
+                        "requests": 0,
+                    }
+                    continue
+
+                print(f"[pipeline] starting {name}")
+                running[pool.submit(_run_stage, stage)] = (name, fp)
+
+            if not running:
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                name, fp = running.pop(fut)
+                try:
+                    res = fut.result()
+                    res["status"] = "ran"
+                    state[name] = {"inputs": fp}
+                    save_state(state, state_file)
+                except Exception as e:
+                    print(f"[pipeline] {name} failed: {type(e).__name__}: {e}")
+                    res = {"status": "failed", "seconds": 0.0, "rows": 0, "requests": 0}
+                results[name] = res
+                print(f"[pipeline] finished {name} ({res['status']})")
+
+    print_summary(stages, results, time.perf_counter() - start)
+    return results
+
+
+def print_summary(stages: List[Stage], results: Dict[str, dict], wall: float):
+    print()
+    print(f"{'stage':<18} {'status':<8} {'seconds':>9} {'rows':>8} {'requests':>9}")
+    print("-" * 56)
+    for s in stages:
+        r = results.get(s.name, {"status": "-", "seconds": 0.0, "rows": 0, "requests": 0})
+        print(f"{s.name:<18} {r['status']:<8} {r['seconds']:>9.1f} {r['rows']:>8} {r['requests']:>9}")
+    print("-" * 56)
+    total = sum(r["seconds"] for r in results.values())
+    print(f"Wall time {wall:.1f}s (sum of stages {total:.1f}s)")
@@ -1,9 +1,11 @@
 # players.py
 import csv
 import os
+from seasons import DEFAULT_SEASON, season_path
 
-PLAYERS_CSV = "../output/Player.csv"
-GAMESTATS_CSV = "../output/GameStats.csv"
+# Per-season partition files, see seasons.season_path
+PLAYERS_CSV = "Player.csv"
+GAMESTATS_CSV = "GameStats.csv"
 
 PLAYER_FIELDS = [
     "player_id",
@@ -14,15 +16,15 @@ PLAYER_FIELDS = [
     "university_id",
 ]
 
-def load_existing_players():
+def load_existing_players(filename):
     """
     Returns a set of (first_name, last_name, university_id)
     """
-    if not os.path.isfile(PLAYERS_CSV):
+    if not os.path.isfile(filename):
         return set()
 
     seen = set()
-    with open(PLAYERS_CSV, newline="", encoding="utf-8") as f:
+    with open(filename, newline="", encoding="utf-8") as f:
         for r in csv.DictReader(f):
             key = (
                 r["first_name"].strip().lower(),
@@ -33,11 +35,12 @@ def load_existing_players():
     return seen
 
 
-def populate_players_from_gamestats():
-    seen_players = load_existing_players()
+def populate_players_from_gamestats(season=DEFAULT_SEASON):
+    players_csv = season_path(season, PLAYERS_CSV)
+    seen_players = load_existing_players(players_csv)
     rows = []
 
-    with open(GAMESTATS_CSV, newline="", encoding="utf-8") as f:
+    with open(season_path(season, GAMESTATS_CSV), newline="", encoding="utf-8") as f:
         reader = csv.DictReader(f)
 
         for r in reader:
@@ -62,13 +65,13 @@ def populate_players_from_gamestats():
                 "university_id": int(r["university_id"]),
             })
 
-    write_players(rows)
+    write_players(rows, players_csv)
 
 
-def write_players(players):
-    file_exists = os.path.isfile(PLAYERS_CSV)
+def write_players(players, filename):
+    file_exists = os.path.isfile(filename)
 
-    with open(PLAYERS_CSV, "a", newline="", encoding="utf-8") as f:
+    with open(filename, "a", newline="", encoding="utf-8") as f:
         writer = csv.DictWriter(f, fieldnames=PLAYER_FIELDS)
 
         if not file_exists:
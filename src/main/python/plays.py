@@ -7,18 +7,20 @@ from datetime import datetime
 from typing import Dict, List, Optional
 from api import ncaa_get, NCAAAPIError
 from extract_player_id import extract_player_id, extract_player_id_1, extract_player_id_2
+from seasons import DEFAULT_SEASON, season_path
 
-# Configuration
+# Configuration (per-season partition files, see seasons.season_path)
 
-PLAY_CSV_FILE = "../output/OctNovPlay.csv"
-GAME_IDS_FILE = "../output/validated_ids/validated_oct_nov_game_ids.json"
-PLAYER_CSV_FILE = "../output/Player.csv"
+PLAY_CSV_FILE = "Play.csv"
+GAME_IDS_FILE = "game_ids.json"
+PLAYER_CSV_FILE = "Player.csv"
 
 RATE_LIMIT_DELAY = 0.25  # 5 req/sec
 
 PLAY_FIELDS = [
     "play_id",
     "game_id",
+    "season",
     "player_id",
     "time_of_play",
     "event_type",
@@ -74,9 +76,9 @@ def classify_event(text: Optional[str]) -> str:
     return "OTHER"
 
 
-def load_players() -> Dict[tuple, int]:
+def load_players(filename) -> Dict[tuple, int]:
     lookup: Dict[tuple, int] = {}
-    with open(PLAYER_CSV_FILE, newline="", encoding="utf-8") as f:
+    with open(filename, newline="", encoding="utf-8") as f:
         for r in csv.DictReader(f):
             lookup[
                 (
@@ -96,7 +98,8 @@ def ncaa_get_play_by_play(game_id: int) -> dict:
 
 def parse_game_plays(pbp: dict,
                      player_lookup: Dict[tuple, int],
-                     play_id_start: int) -> List[dict]:
+                     play_id_start: int,
+                     season: int = DEFAULT_SEASON) -> List[dict]:
 
     contest_id = pbp.get("contestId")
     if not contest_id:
@@ -136,6 +139,7 @@ def parse_game_plays(pbp: dict,
                 rows.append({
                     "play_id": play_id,
                     "game_id": contest_id,
+                    "season": season,
                     "player_id": pid,
                     "time_of_play": clock,
                     "event_type": event_type,
@@ -148,21 +152,21 @@ def parse_game_plays(pbp: dict,
     return rows
 
 
-def write_plays(rows: List[dict]):
-    file_exists = os.path.isfile(PLAY_CSV_FILE)
+def write_plays(rows: List[dict], filename: str):
+    file_exists = os.path.isfile(filename)
 
-    with open(PLAY_CSV_FILE, "a", newline="", encoding="utf-8") as f:
+    with open(filename, "a", newline="", encoding="utf-8") as f:
         writer = csv.DictWriter(f, fieldnames=PLAY_FIELDS)
         if not file_exists:
             writer.writeheader()
         writer.writerows(rows)
 
 
-def populate_plays():
-    player_lookup = load_players()
+def populate_plays(season=DEFAULT_SEASON):
+    player_lookup = load_players(season_path(season, PLAYER_CSV_FILE))
     print(f"Loaded {len(player_lookup)} players")
 
-    with open(GAME_IDS_FILE) as f:
+    with open(season_path(season, GAME_IDS_FILE)) as f:
         game_ids = json.load(f)
 
     total = 0
@@ -176,11 +180,12 @@ def populate_plays():
             rows = parse_game_plays(
                 pbp,
                 player_lookup,
-                play_id_counter
+                play_id_counter,
+                season,
             )
 
             play_id_counter += len(rows)
-            write_plays(rows)
+            write_plays(rows, season_path(season, PLAY_CSV_FILE))
             total += len(rows)
 
         except NCAAAPIError:
@@ -1,14 +1,18 @@
 import csv
 import os
 import re
+import sys
 from shutil import copyfile
+from seasons import DEFAULT_SEASON, season_dir
 
-PLAYER_CSV = "../output/Player.csv"
-PLAY_CSV = "../output/Play.csv"
-GAMESTATS_CSV = "../output/GameStats.csv"
+# Per-season partition files, see seasons.season_path
+PLAYER_CSV = "Player.csv"
+PLAY_CSV = "Play.csv"
+GAMESTATS_CSV = "GameStats.csv"
 
 FINAL_GAMESTATS_FIELDS = [
     "game_id",
+    "season",
     "player_id",
     "played",
     "started",
@@ -54,13 +58,14 @@ def normalize_position(pos: str):
     return pos.strip().upper()
 
 
-def normalize_player_csv():
-    backup = PLAYER_CSV + ".bak"
-    copyfile(PLAYER_CSV, backup)
+def normalize_player_csv(season=DEFAULT_SEASON):
+    player_csv = os.path.join(season_dir(season), PLAYER_CSV)
+    backup = player_csv + ".bak"
+    copyfile(player_csv, backup)
     print(f"Backup created: {backup}")
 
     rows = []
-    with open(PLAYER_CSV, newline="", encoding="utf-8") as f:
+    with open(player_csv, newline="", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         fieldnames = reader.fieldnames
 
@@ -70,7 +75,7 @@ def normalize_player_csv():
             r["position"] = normalize_position(r.get("position"))
             rows.append(r)
 
-    with open(PLAYER_CSV, "w", newline="", encoding="utf-8") as f:
+    with open(player_csv, "w", newline="", encoding="utf-8") as f:
         writer = csv.DictWriter(f, fieldnames=fieldnames)
         writer.writeheader()
         writer.writerows(rows)
@@ -78,13 +83,14 @@ def normalize_player_csv():
     print(f"Normalized Player.csv ({len(rows)} rows)")
 
 
-def normalize_play_csv():
-    backup = PLAY_CSV + ".bak"
-    copyfile(PLAY_CSV, backup)
+def normalize_play_csv(season=DEFAULT_SEASON):
+    play_csv = os.path.join(season_dir(season), PLAY_CSV)
+    backup = play_csv + ".bak"
+    copyfile(play_csv, backup)
     print(f"Backup created: {backup}")
 
     rows = []
-    with open(PLAY_CSV, newline="", encoding="utf-8") as f:
+    with open(play_csv, newline="", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         fieldnames = reader.fieldnames
 
@@ -92,26 +98,28 @@ def normalize_play_csv():
             r["time_of_play"] = normalize_time(r["time_of_play"])
             rows.append(r)
 
-    with open(PLAY_CSV, "w", newline="", encoding="utf-8") as f:
+    with open(play_csv, "w", newline="", encoding="utf-8") as f:
         writer = csv.DictWriter(f, fieldnames=fieldnames)
         writer.writeheader()
         writer.writerows(rows)
 
     print(f"Normalized Play.csv ({len(rows)} rows)")
 
-def postprocess_gamestats_csv():
-    backup = GAMESTATS_CSV + ".bak"
-    copyfile(GAMESTATS_CSV, backup)
+def postprocess_gamestats_csv(season=DEFAULT_SEASON):
+    gamestats_csv = os.path.join(season_dir(season), GAMESTATS_CSV)
+    backup = gamestats_csv + ".bak"
+    copyfile(gamestats_csv, backup)
     print(f"Backup created: {backup}")
 
     cleaned_rows = []
 
-    with open(GAMESTATS_CSV, newline="", encoding="utf-8") as f:
+    with open(gamestats_csv, newline="", encoding="utf-8") as f:
         reader = csv.DictReader(f)
 
         for r in reader:
             cleaned_rows.append({
                 "game_id": r["game_id"],
+                "season": r.get("season") or season,
                 "player_id": r["player_id"],
                 "played": r["played"],
                 "started": r["started"],
@@ -127,7 +135,7 @@ def postprocess_gamestats_csv():
                 "rc": r["rc"],
             })
 
-    with open(GAMESTATS_CSV, "w", newline="", encoding="utf-8") as f:
+    with open(gamestats_csv, "w", newline="", encoding="utf-8") as f:
         writer = csv.DictWriter(f, fieldnames=FINAL_GAMESTATS_FIELDS)
         writer.writeheader()
         writer.writerows(cleaned_rows)
@@ -140,12 +148,17 @@ def postprocess_gamestats_csv():
 # ==========================
 
 if __name__ == "__main__":
-    if not os.path.exists(PLAYER_CSV) or not os.path.exists(PLAY_CSV):
-        print("CSV files not found. Check paths.")
-        exit(1)
-
-    normalize_player_csv()
-    normalize_play_csv()
-    postprocess_gamestats_csv()
+    seasons = [int(a) for a in sys.argv[1:]] or [DEFAULT_SEASON]
+
+    for season in seasons:
+        part = season_dir(season)
+        if (not os.path.exists(os.path.join(part, PLAYER_CSV))
+                or not os.path.exists(os.path.join(part, PLAY_CSV))):
+            print(f"CSV files not found in {part}. Check paths.")
+            exit(1)
+
+        normalize_player_csv(season)
+        normalize_play_csv(season)
+        postprocess_gamestats_csv(season)
 
     print("✅ CSV normalization complete.")
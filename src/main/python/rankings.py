@@ -1,15 +1,37 @@
 import requests
 import csv
+import difflib
+import json
+import os
+import re
+import sys
 import time
+from typing import Dict, List, Optional
 from bs4 import BeautifulSoup
+from pipeline import count_request
+from seasons import DEFAULT_SEASON, season_path
 
 
 URL = "https://unitedsoccercoaches.org/rankings/college-rankings/ncaa-diii-women/"
-RANKINGS_CSV = "../output/Rankings.csv"
+RANKINGS_CSV = "Rankings.csv"  # per-season partition file
+UNIVERSITY_CSV = "../output/University.csv"
+NAME_MATCH_CACHE = "../output/ranking_name_matches.json"
 RATE_LIMIT_DELAY = 1.0  # be polite
 
+RANKINGS_FIELDS = ["season", "rank_week", "rank", "university_id", "team_name"]
+
+# Poll names too far from the NCAA name for the fuzzy match
+NAME_ALIASES = {
+    "Washington University (Mo.)": "Washington University in St. Louis",
+    "Claremont-Mudd-Scripps College": "Claremont McKenna-Harvey Mudd-Scripps Colleges",
+    "Wesleyan University": "Wesleyan University (Connecticut)",
+}
+
+NAME_STOPWORDS = {"university", "college", "colleges", "of", "the", "at", "in"}
+
 
 def fetch_html(url):
+    count_request()
     r = requests.get(
         url,
         headers={
@@ -65,8 +87,111 @@ def parse_ranking_table(table):
     return rankings
 
 
-def populate_rankings():
-    html = fetch_html(URL)
+# University name matching
+
+def normalize_school(name: str) -> str:
+    """
+    'Washington & Lee University' -> 'washington and lee university'
+    """
+    s = name.lower().replace("&", " and ")
+    s = re.sub(r"[^a-z0-9 ]+", " ", s)
+    return re.sub(r"\s+", " ", s).strip()
+
+
+def school_key(name: str) -> str:
+    """
+    Normalized name without generic words, so 'Penn State University-Harrisburg'
+    and 'Penn State Harrisburg' share the key 'penn state harrisburg'.
+    """
+    tokens = [t for t in normalize_school(name).split() if t not in NAME_STOPWORDS]
+    return " ".join(tokens)
+
+
+def load_university_index(filename=UNIVERSITY_CSV) -> Dict[str, Dict[str, int]]:
+    """
+    Lookup tables for matching poll names against University.name.
+    """
+    index = {"exact": {}, "key": {}}
+    with open(filename, newline="", encoding="utf-8") as f:
+        for r in csv.DictReader(f):
+            uid = int(r["university_id"])
+            index["exact"][normalize_school(r["name"])] = uid
+            index["key"].setdefault(school_key(r["name"]), uid)
+    return index
+
+
+def load_name_cache(filename=NAME_MATCH_CACHE) -> Dict[str, Optional[int]]:
+    if not os.path.isfile(filename):
+        return {}
+    with open(filename, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_name_cache(cache: Dict[str, Optional[int]], filename=NAME_MATCH_CACHE):
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+
+
+def resolve_university(name: str, index, cache: Dict[str, Optional[int]]) -> Optional[int]:
+    """
+    Poll name -> university_id. Tries the cache (hand edits there win),
+    then aliases, exact normalized name, stopword-free key, and finally a
+    close fuzzy match on the key. Every answer, including misses, is cached.
+    """
+    if name in cache:
+        return cache[name]
+
+    target = NAME_ALIASES.get(name, name)
+    uid = index["exact"].get(normalize_school(target))
+    if uid is None:
+        key = school_key(target)
+        uid = index["key"].get(key)
+        if uid is None:
+            close = difflib.get_close_matches(key, index["key"].keys(), n=1, cutoff=0.85)
+            if close:
+                uid = index["key"][close[0]]
+
+    cache[name] = uid
+    return uid
+
+
+def rankings_to_rows(season, weeks: List[Dict[int, str]], index, cache) -> List[dict]:
+    """
+    [{rank: school}, ...] per week -> long (season, rank_week, rank) rows
+    """
+    rows = []
+    for week_idx, rankings in enumerate(weeks, start=1):
+        for rank in sorted(rankings):
+            school = rankings[rank]
+            rows.append({
+                "season": season,
+                "rank_week": week_idx,
+                "rank": rank,
+                "university_id": resolve_university(school, index, cache),
+                "team_name": school,
+            })
+    return rows
+
+
+def write_rankings_csv(rows: List[dict], season):
+    rankings_csv = season_path(season, RANKINGS_CSV)
+    with open(rankings_csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=RANKINGS_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    unmatched = sorted({r["team_name"] for r in rows if r["university_id"] is None})
+    print(f"Wrote {len(rows)} ranking rows to {rankings_csv}")
+    if unmatched:
+        print(f"Unmatched schools (add to {NAME_MATCH_CACHE}): {', '.join(unmatched)}")
+
+
+def populate_rankings(season=DEFAULT_SEASON, url=URL):
+    """
+    The default URL only lists the current season's polls; pass the
+    archive page for older seasons.
+    """
+    html = fetch_html(url)
     soup = BeautifulSoup(html, "html.parser")
 
     ranking_tables = extract_week_tables(soup)
@@ -74,25 +199,38 @@ def populate_rankings():
         print("No ranking tables found.")
         return
 
-    rows = []
+    weeks = [r for r in (parse_ranking_table(t) for t in ranking_tables) if r]
 
-    for week_idx, table in enumerate(ranking_tables, start=1):
-        rankings = parse_ranking_table(table)
-        if not rankings:
-            continue
+    index = load_university_index()
+    cache = load_name_cache()
+    rows = rankings_to_rows(season, weeks, index, cache)
+    save_name_cache(cache)
 
-        row = {"rank_week": week_idx}
-        for i in range(1, 26):
-            row[f"rank_{i}"] = rankings.get(i)
+    write_rankings_csv(rows, season)
+    print(f"Wrote {len(weeks)} weeks of D3 Women's Soccer rankings")
 
-        rows.append(row)
 
-    # Write CSV
-    fieldnames = ["rank_week"] + [f"rank_{i}" for i in range(1, 26)]
-    with open(RANKINGS_CSV, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for row in rows:
-            writer.writerow(row)
+def convert_wide_rankings(wide_csv, season=DEFAULT_SEASON):
+    """
+    Rewrite an old one-row-per-week CSV (rank_week, rank_1..rank_25) into
+    the long per-season Rankings.csv.
+    """
+    weeks = []
+    with open(wide_csv, newline="", encoding="utf-8") as f:
+        for r in sorted(csv.DictReader(f), key=lambda r: int(r["rank_week"])):
+            weeks.append({i: r[f"rank_{i}"] for i in range(1, 26) if r.get(f"rank_{i}")})
+
+    index = load_university_index()
+    cache = load_name_cache()
+    rows = rankings_to_rows(season, weeks, index, cache)
+    save_name_cache(cache)
+
+    write_rankings_csv(rows, season)
+
 
-    print(f"Wrote {len(rows)} weeks of D3 Women's Soccer rankings to {RANKINGS_CSV}")
\ No newline at end of file
+if __name__ == "__main__":
+    # python rankings.py ../output/rankings.csv [season]
+    if len(sys.argv) > 1:
+        convert_wide_rankings(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_SEASON)
+    else:
+        populate_rankings()
@@ -0,0 +1,21 @@
+import os
+
+DEFAULT_SEASON = 2025
+
+# D3 women's soccer season typically spans Aug–Nov (+ some postseason in Dec)
+MONTHS = ["08", "09", "10", "11"]
+
+OUTPUT_DIR = "../output"
+
+
+def season_dir(season) -> str:
+    """
+    Per-season output partition, e.g. ../output/2025/
+    """
+    return os.path.join(OUTPUT_DIR, str(season))
+
+
+def season_path(season, filename) -> str:
+    path = season_dir(season)
+    os.makedirs(path, exist_ok=True)
+    return os.path.join(path, filename)
@@ -1,35 +1,15 @@
 import csv
-import time
-import requests
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
-
-BASE_URL = "https://ncaa-api.henrygd.me"
-RATE_LIMIT_DELAY = 0.25  # stay under 5 req/sec
+from api import ncaa_get, NCAAAPIError
+from seasons import DEFAULT_SEASON, MONTHS
 
 SPORT = "soccer-women"
 DIVISION = "d3"
 CONF = "all-conf"
 
-# D3 women's soccer season typically spans Aug–Nov (+ some postseason in Dec)
-MONTHS = ["08", "09", "10", "11"]
-YEAR = "2025"
-
 UNIVERSITY_CSV = "../output/University.csv"
-CONFERENCE_CSV = "./output/Conference.csv"
-
-
-class NCAAAPIError(Exception):
-    pass
-
-
-def ncaa_get(endpoint: str):
-    url = f"{BASE_URL}{endpoint}"
-    r = requests.get(url)
-    if r.status_code != 200:
-        raise NCAAAPIError(f"Error {r.status_code} for {url}: {r.text[:200]}")
-    time.sleep(RATE_LIMIT_DELAY)
-    return r.json()
+CONFERENCE_CSV = "../output/Conference.csv"
 
 
 def parse_mmddyyyy(date_str: str) -> Tuple[str, str, str]:
@@ -96,12 +76,16 @@ def extract_team(team: dict) -> Optional[dict]:
 
 
 def write_conferences_csv(conferences: Dict[str, dict], filename=CONFERENCE_CSV):
-    fieldnames = ["conference_id", "name", "seo"]
+    fieldnames = ["conference_id", "conference_name", "seo"]
     with open(filename, "w", newline="", encoding="utf-8") as f:
         w = csv.DictWriter(f, fieldnames=fieldnames)
         w.writeheader()
         for conf in sorted(conferences.values(), key=lambda x: x["conference_id"]):
-            w.writerow(conf)
+            w.writerow({
+                "conference_id": conf["conference_id"],
+                "conference_name": conf["name"],
+                "seo": conf["seo"],
+            })
 
 
 def write_universities_csv(universities: Dict[int, dict], filename=UNIVERSITY_CSV):
@@ -118,18 +102,25 @@ def write_universities_csv(universities: Dict[int, dict], filename=UNIVERSITY_CS
             })
 
 
-def populate_university_conf():
+def populate_university_conf(seasons=(DEFAULT_SEASON,)):
+    """
+    University and Conference are shared by every season, so one crawl
+    covers all requested seasons. Newest season is crawled first so a
+    school's current conference wins.
+    """
     # 1) Collect all dates with games
     all_dates: List[Tuple[str, str, str]] = []
-    for month in MONTHS:
-        try:
-            month_dates = get_game_dates_for_month(YEAR, month)
-            print(f"{YEAR}-{month}: {len(month_dates)} game dates")
-            all_dates.extend(month_dates)
-        except Exception as e:
-            print(f"Schedule fetch failed for {YEAR}-{month}: {e}")
-
-    all_dates = sorted(set(all_dates))
+    for season in sorted(seasons, reverse=True):
+        year = str(season)
+        for month in MONTHS:
+            try:
+                month_dates = get_game_dates_for_month(year, month)
+                print(f"{year}-{month}: {len(month_dates)} game dates")
+                all_dates.extend(month_dates)
+            except Exception as e:
+                print(f"Schedule fetch failed for {year}-{month}: {e}")
+
+    all_dates = sorted(set(all_dates), reverse=True)
     print(f"Total unique game dates: {len(all_dates)}")
 
     # 2) Crawl scoreboards and extract teams
@@ -177,8 +168,8 @@ def populate_university_conf():
                         universities[uid]["conference_id"] = conf_id
 
     # 3) Write outputs
-    write_conferences_csv(conferences, UNIVERSITY_CSV)
-    write_universities_csv(universities, CONFERENCE_CSV)
+    write_conferences_csv(conferences, CONFERENCE_CSV)
+    write_universities_csv(universities, UNIVERSITY_CSV)
 
     print(f"Universities written: {len(universities)}")
     print(f"Conferences written: {len(conferences)}")
@@ -0,0 +1,75 @@
+"""
+The JSON API pages through a query whose own `limit` param caps the result.
+Run from the repository root:
+
+    python -m pytest src/test/python
+"""
+import importlib
+import os
+import sqlite3
+import sys
+from datetime import date, timedelta
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+FRONTEND = os.path.join(ROOT, "src", "main", "python", "frontend")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, FRONTEND)
+
+import csv_to_sql  # noqa: E402
+import form  # noqa: E402
+
+TEAMS = 30
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("db") / "D3WomensSoccer.db")
+    conn = sqlite3.connect(path)
+    csv_to_sql.SCHEMA_FILE = os.path.join(ROOT, "D3WomensSoccerSchema.sql")
+    csv_to_sql.execute_schema(conn)
+    conn.execute("INSERT INTO Conference VALUES (1, 'NESCAC', 'nescac')")
+    conn.executemany("INSERT INTO University VALUES (?, ?, 1)",
+                     [(100 + t, f"Team {t}") for t in range(TEAMS)])
+    for t in range(TEAMS):
+        conn.execute(
+            "INSERT INTO Game (game_id, season, home_team_id, away_team_id, home_score, away_score, game_date) "
+            "VALUES (?, 2025, ?, ?, ?, 0, ?)",
+            (t + 1, 100 + t, 100 + (t + 1) % TEAMS, t % 3, (date(2025, 9, 1) + timedelta(days=t)).isoformat()),
+        )
+    form.refresh_form(conn)
+    conn.commit()
+    conn.close()
+
+    os.environ["D3_DB_FILE"] = path
+    for module in ("db", "app"):
+        sys.modules.pop(module, None)
+    app = importlib.import_module("app")
+    return app.app.test_client()
+
+
+def test_pages_through_query_with_own_limit(client):
+    seen = []
+    after = None
+    while True:
+        url = "/api/queries/team_form?season=2025&limit=25&page_size=10"
+        if after:
+            url += f"&after={after}"
+        body = client.get(url).get_json()
+        assert len(body["rows"]) == min(10, 25 - len(seen))
+        seen += [row[0] for row in body["rows"]]
+        after = body["next"]
+        if len(seen) < 25:
+            assert after is not None
+        if after is None:
+            break
+    stream = client.get("/api/queries/team_form?season=2025&limit=25&format=ndjson").get_data(as_text=True)
+    assert len(seen) == 25 == len(stream.strip().splitlines()) - 1
+    assert len(set(seen)) == 25
+
+
+def test_page_size_up_to_api_max(client):
+    response = client.get("/api/queries/team_form?season=2025&page_size=1000")
+    assert response.status_code == 200
+    assert len(response.get_json()["rows"]) == 25
@@ -0,0 +1,75 @@
+"""
+update_ratings() must leave TeamRating as refresh_ratings() would, also
+when an earlier season is loaded. Run from the repository root:
+
+    python -m pytest src/test/python
+"""
+import os
+import re
+import sqlite3
+import sys
+from datetime import date, timedelta
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+sys.path.insert(0, ROOT)
+
+import ratings  # noqa: E402
+
+SCHEMA = os.path.join(ROOT, "D3WomensSoccerSchema.sql")
+
+
+def make_db():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("""
+        CREATE TABLE Game (
+            game_id INTEGER PRIMARY KEY, season INTEGER, game_date DATE, game_time TEXT,
+            home_team_id INTEGER, away_team_id INTEGER, home_score INTEGER, away_score INTEGER
+        )
+    """)
+    with open(SCHEMA) as f:
+        conn.execute(re.search(r"CREATE TABLE TeamRating \(.*?\n\);", f.read(), re.S).group(0))
+
+    rng = np.random.default_rng(7)
+    game_id = 0
+    for season in (2024, 2025):
+        opening = date(season, 9, 1)
+        for day in range(0, 70, 3):
+            # teams 8 and 9 only start playing in the season's fourth week
+            teams = rng.permutation(10 if day >= 21 else 8)
+            for home, away in teams.reshape(-1, 2):
+                game_id += 1
+                conn.execute(
+                    "INSERT INTO Game VALUES (?, ?, ?, '19:00', ?, ?, ?, ?)",
+                    (game_id, season, (opening + timedelta(days=day)).isoformat(),
+                     100 + int(home), 100 + int(away), int(rng.poisson(1.6)), int(rng.poisson(1.2))),
+                )
+    return conn
+
+
+def snapshot(conn):
+    return conn.execute(
+        "SELECT season, week, university_id, games, elo, margin_rating FROM TeamRating "
+        "ORDER BY season, week, university_id"
+    ).fetchall()
+
+
+def test_update_matches_full_rebuild_across_seasons():
+    conn = make_db()
+    ratings.refresh_ratings(conn)
+    full = snapshot(conn)
+
+    # every 2025 game from its third week on
+    weeks = sorted({w for (w,) in conn.execute(
+        f"SELECT {ratings.WEEK} FROM Game WHERE season = 2025")})
+    game_ids = [g for (g,) in conn.execute(
+        f"SELECT game_id FROM Game WHERE season = 2025 AND {ratings.WEEK} >= ?", (weeks[2],))]
+    ratings.update_ratings(conn, game_ids)
+    updated = snapshot(conn)
+
+    assert len(updated) == len(full)
+    for a, b in zip(full, updated):
+        assert a[:4] == b[:4]
+        assert abs(a[4] - b[4]) < 1e-6
+        assert abs(a[5] - b[5]) < 1e-4